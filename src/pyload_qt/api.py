@@ -0,0 +1,342 @@
+# endpoints of the pyload api, and an awaitable interface for PyLoadClient
+#
+# coroutines run on the Qt event loop:
+# a Task sends the result of each awaited request back into its coroutine,
+# so a flow like csrf token -> login -> config is written as one function
+# instead of nested callbacks. no asyncio event loop is needed.
+#
+#   async def login_task(self):
+#       csrf_token = await self.api.get_csrf_token()
+#       ok = await self.api.login(username="pyload", password="pyload")
+#   api.run_task(self.login_task())
+
+import sys
+import time
+import traceback
+
+from PySide6.QtNetwork import QNetworkReply
+
+NetworkError = QNetworkReply.NetworkError
+
+
+# seconds until a request is aborted with TimeoutError
+DEFAULT_TIMEOUT = 30
+
+
+class Endpoint:
+    __slots__ = ("path", "method", "timeout")
+
+    def __init__(self, path, method="GET", timeout=DEFAULT_TIMEOUT):
+        self.path = path
+        self.method = method
+        self.timeout = timeout
+
+
+# all other names are GET requests to api/{name}
+ENDPOINTS = {
+    # the csrf token is parsed from the html login page
+    "_get_csrf_token": Endpoint("login"),
+    # https://github.com/pyload/pyload/commit/adf33b94e8f4f366e0538c0f9cba95be842c071f
+    # deprecate /api/login and /api/logout endpoints
+    "login": Endpoint("login", "POST"),
+    "logout": Endpoint("logout"),
+    # polled every few seconds, a late response is useless
+    "status": Endpoint("json/status", timeout=10),
+    "links": Endpoint("json/links", timeout=10),
+    # 15k packages take some time on a busy server
+    "get_queue_and_collector": Endpoint("api/get_queue_and_collector", timeout=120),
+    "push_to_queue": Endpoint("api/push_to_queue", "POST"),
+    "pull_from_queue": Endpoint("api/pull_from_queue", "POST"),
+    "restart_failed": Endpoint("api/restart_failed", "POST", timeout=120),
+    "delete_packages": Endpoint("api/delete_packages", "POST", timeout=120),
+    # large link lists dont fit into the url
+    "add_package": Endpoint("api/add_package", "POST", timeout=120),
+    "add_files": Endpoint("api/add_files", "POST", timeout=120),
+}
+
+
+def get_endpoint(name):
+    endpoint = ENDPOINTS.get(name)
+    if endpoint is None:
+        endpoint = ENDPOINTS[name] = Endpoint(f"api/{name}")
+    return endpoint
+
+
+# priorities of requests, lower is sent first
+# when the connections to the server are busy
+PRIORITY_INTERACTIVE = 0
+PRIORITY_POLLING = 1
+PRIORITY_BACKGROUND = 2
+
+
+class ApiRequest:
+    """
+    One http request of PyLoadClient, as passed to a transport.
+
+    args and kwargs are the arguments of the api call,
+    for recording and replay.
+    """
+    __slots__ = ("name", "method", "url", "args", "kwargs", "body", "headers", "priority", "timeout")
+
+    def __init__(
+            self,
+            name,
+            method,
+            url,
+            args=(),
+            kwargs=None,
+            body=None,
+            headers=None,
+            priority=PRIORITY_INTERACTIVE,
+            timeout=DEFAULT_TIMEOUT,
+        ):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.args = args
+        self.kwargs = {} if kwargs is None else kwargs
+        # bytes of the urlencoded form for POST requests
+        self.body = body
+        # dict of bytes -> bytes
+        self.headers = {} if headers is None else headers
+        self.priority = priority
+        self.timeout = timeout
+
+
+class ApiError(Exception):
+    """
+    A failed api call.
+
+    - name: name of the api call
+    - error: QNetworkReply.NetworkError
+    """
+    def __init__(self, name, error):
+        super().__init__(f"{name}: {error}")
+        self.name = name
+        self.error = error
+
+
+class ApiFuture:
+    """
+    Result of an api call or task, which can be awaited in a Task.
+
+    done callbacks are called with the future when the result is set.
+    """
+    def __init__(self, name=""):
+        self.name = name
+        self.start_time = time.monotonic()
+        self.end_time = None
+        self._result = None
+        self._exception = None
+        self._done = False
+        self._callbacks = []
+
+    def done(self):
+        return self._done
+
+    @property
+    def elapsed(self):
+        # seconds from start to result
+        end_time = self.end_time if self._done else time.monotonic()
+        return end_time - self.start_time
+
+    def result(self):
+        if not self._done:
+            raise RuntimeError(f"{self.name}: result is not set")
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        return self._exception
+
+    def add_done_callback(self, callback):
+        if self._done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def set_result(self, result):
+        self._finish(result, None)
+
+    def set_exception(self, exception):
+        self._finish(None, exception)
+
+    def _finish(self, result, exception):
+        if self._done:
+            return
+        self._done = True
+        self.end_time = time.monotonic()
+        self._result = result
+        self._exception = exception
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def __await__(self):
+        if not self._done:
+            yield self
+        return self.result()
+
+
+class Task(ApiFuture):
+    """
+    Run a coroutine which awaits ApiFuture objects.
+
+    The coroutine runs until its first await when the task is created,
+    and continues in the done callback of the awaited future.
+    """
+    def __init__(self, coro, name=None):
+        super().__init__(name or getattr(coro, "__qualname__", "task"))
+        self.coro = coro
+        self._step(None, None)
+
+    def _step(self, value, exception):
+        try:
+            if exception is not None:
+                future = self.coro.throw(exception)
+            else:
+                future = self.coro.send(value)
+        except StopIteration as stop:
+            self.set_result(stop.value)
+            return
+        except BaseException as exception:
+            self.set_exception(exception)
+            return
+        if not isinstance(future, ApiFuture):
+            self._step(None, TypeError(f"Task {self.name}: cannot await {future!r}"))
+            return
+        future.add_done_callback(self._wakeup)
+
+    def _wakeup(self, future):
+        exception = future.exception()
+        if exception is not None:
+            self._step(None, exception)
+        else:
+            self._step(future.result(), None)
+
+
+def _print_exception(task):
+    exception = task.exception()
+    if exception is not None:
+        print(f"Task {task.name} failed:", file=sys.stderr)
+        traceback.print_exception(exception)
+
+
+def run_task(coro, name=None):
+    """
+    Start a coroutine which is not awaited by another task.
+
+    Exceptions of the coroutine are printed.
+    """
+    task = Task(coro, name)
+    task.add_done_callback(_print_exception)
+    return task
+
+
+def gather(*awaitables, max_parallel=None, return_exceptions=False):
+    """
+    Wait for all awaitables, returns a future with the list of results.
+
+    Coroutines are started as tasks,
+    with at most max_parallel coroutines running at the same time.
+    With return_exceptions, exceptions are returned as results,
+    else the first exception is raised and the other results are dropped.
+    """
+    future = ApiFuture("gather")
+    results = [None] * len(awaitables)
+    pending = list(enumerate(awaitables))
+    pending.reverse()
+    num_running = 0
+    num_done = 0
+
+    def start_next():
+        nonlocal num_running
+        while pending and (max_parallel is None or num_running < max_parallel):
+            idx, awaitable = pending.pop()
+            if not isinstance(awaitable, ApiFuture):
+                awaitable = Task(awaitable)
+            num_running += 1
+            awaitable.add_done_callback(lambda done, idx=idx: on_done(idx, done))
+
+    def on_done(idx, done):
+        nonlocal num_running, num_done
+        num_running -= 1
+        num_done += 1
+        if future.done():
+            return
+        exception = done.exception()
+        if exception is not None and not return_exceptions:
+            future.set_exception(exception)
+            return
+        results[idx] = exception if exception is not None else done.result()
+        if num_done == len(awaitables):
+            future.set_result(results)
+            return
+        start_next()
+
+    if not awaitables:
+        future.set_result(results)
+    start_next()
+    return future
+
+
+class PyLoadApi:
+    """
+    Typed and awaitable interface of PyLoadClient.
+
+    Each method returns an ApiFuture,
+    which raises ApiError when awaited after a network error.
+    """
+    def __init__(self, client):
+        self.client = client
+
+    def call(self, api_name, /, *args, **kwargs):
+        future = ApiFuture(api_name)
+
+        def on_result(result):
+            if isinstance(result, NetworkError):
+                future.set_exception(ApiError(api_name, result))
+            else:
+                future.set_result(result)
+
+        getattr(self.client, api_name)(on_result, *args, **kwargs)
+        return future
+
+    def get_csrf_token(self) -> "ApiFuture[str | None]":
+        return self.call("_get_csrf_token")
+
+    def login(self, username: str, password: str) -> "ApiFuture[bool]":
+        return self.call("login", username=username, password=password)
+
+    def get_config(self) -> "ApiFuture[dict]":
+        return self.call("get_config")
+
+    def get_queue_and_collector(self) -> "ApiFuture[list[dict]]":
+        return self.call("get_queue_and_collector")
+
+    def get_package_data(self, package_id: int) -> "ApiFuture[dict]":
+        return self.call("get_package_data", package_id)
+
+    def status(self) -> "ApiFuture[dict]":
+        return self.call("status")
+
+    def links(self) -> "ApiFuture[dict]":
+        return self.call("links")
+
+    def add_package(self, name: str, links: list) -> "ApiFuture[int]":
+        return self.call("add_package", name=name, links=links)
+
+    def add_files(self, package_id: int, links: list) -> "ApiFuture[None]":
+        return self.call("add_files", package_id=package_id, links=links)
+
+    def set_package_data(self, package_id: int, data: dict) -> "ApiFuture[None]":
+        return self.call("set_package_data", package_id=package_id, data=data)
+
+    def delete_packages(self, package_ids: list) -> "ApiFuture[None]":
+        return self.call("delete_packages", package_ids=package_ids)
+
+    def restart_failed(self, link_ids: list = None) -> "ApiFuture[None]":
+        if link_ids is None:
+            return self.call("restart_failed")
+        return self.call("restart_failed", link_ids=link_ids)
@@ -0,0 +1,192 @@
+# record api traffic of PyLoadClient to a gzip compressed jsonl file
+# and replay it without a pyload server, with original or scaled timing.
+# this allows to benchmark the gui against the same data
+
+import gzip
+import json
+import time
+from collections import defaultdict, deque
+
+from PySide6.QtCore import (
+    QTimer,
+)
+from PySide6.QtNetwork import QNetworkReply
+
+NetworkError = QNetworkReply.NetworkError
+
+
+# these arguments are not written to recordings
+# the csrf_token changes between sessions, so it is dropped
+DROPPED_KWARGS = frozenset(("csrf_token",))
+# credentials of login and package passwords, replaced with REDACTED
+# also in nested values like set_package_data(data={"password": ...})
+SECRET_KEYS = frozenset(("username", "password", "api_key"))
+REDACTED = "<redacted>"
+
+
+def redact(value):
+    # copy of value with the secrets of nested dicts and lists redacted
+    if isinstance(value, dict):
+        return {
+            key: (REDACTED if key in SECRET_KEYS and val else redact(val))
+            for key, val in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def redact_kwargs(kwargs):
+    return redact({key: val for key, val in kwargs.items() if key not in DROPPED_KWARGS})
+
+
+def redact_body(body):
+    # package data and the queue have the passwords of packages
+    if not isinstance(body, str) or '"password"' not in body:
+        return body
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(redact(data))
+
+
+def request_key(name, args, kwargs):
+    # a replay matches recordings with other credentials
+    kwargs = redact_kwargs(kwargs)
+    return json.dumps([name, list(args), kwargs], sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ApiRecorder:
+    """
+    Write one json line per request and response.
+
+    fields of each line:
+
+    - t: start time of the request, in seconds since the start of the recording
+    - name, method, args, kwargs: the request
+    - error: QNetworkReply.NetworkError as int, 0 for success
+    - body: the response body as text, with secrets redacted
+    - duration: time between request and response, in seconds
+    """
+    def __init__(self, path, flush_every=100):
+        self.path = path
+        self.file = gzip.open(path, "wt", encoding="utf8")
+        self.start_time = time.monotonic()
+        self.flush_every = flush_every
+        self.num_records = 0
+
+    def record(self, name, method, args, kwargs, start_time, error, body):
+        if self.file is None:
+            return
+        duration = time.monotonic() - start_time
+        record = dict(
+            t=round(start_time - self.start_time, 4),
+            name=name,
+            method=method,
+            args=list(args),
+            kwargs=redact_kwargs(kwargs),
+            error=int(error.value),
+            body=redact_body(body),
+            duration=round(duration, 4),
+        )
+        self.file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        self.num_records += 1
+        # flush, so a crash loses at most flush_every records
+        if self.num_records % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        print(f"ApiRecorder: wrote {self.num_records} requests to {self.path}")
+
+
+def load_recording(path):
+    records = []
+    with gzip.open(path, "rt", encoding="utf8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+class ApiReplay:
+    """
+    Responses of a recording, by request key.
+
+    Repeated requests (refresh of the queue, status)
+    get the recorded responses in the recorded order,
+    the last response is repeated when the recording has no more responses.
+
+    time_scale scales the recorded durations:
+    1 is the original timing, 0.5 is twice as fast, 0 is no delay
+    """
+    def __init__(self, path, time_scale=1.0):
+        self.path = path
+        self.time_scale = time_scale
+        # request key -> deque of records
+        self.responses = defaultdict(deque)
+        self.num_missing = 0
+        for record in load_recording(path):
+            key = request_key(record["name"], record["args"], record["kwargs"])
+            self.responses[key].append(record)
+
+    def next_response(self, name, args, kwargs):
+        """
+        Returns (error, body, delay in seconds),
+        or None when the recording has no response for this request.
+        """
+        responses = self.responses.get(request_key(name, args, kwargs))
+        if not responses:
+            self.num_missing += 1
+            return None
+        record = responses.popleft() if len(responses) > 1 else responses[0]
+        return record["error"], record["body"], record["duration"] * self.time_scale
+
+
+class RecordingTransport:
+    """
+    Send requests with another transport and record them with an ApiRecorder.
+
+    The headers of requests are not recorded,
+    they have the Authorization and X-API-Key credentials of the server profile.
+    """
+    def __init__(self, transport, recorder):
+        self.transport = transport
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        # manager, ... of the inner transport
+        return getattr(self.transport, name)
+
+    def send(self, request, on_done):
+        start_time = time.monotonic()
+        def on_recorded_done(error, body):
+            self.recorder.record(
+                request.name, request.method, request.args, request.kwargs, start_time, error, body
+            )
+            on_done(error, body)
+        self.transport.send(request, on_recorded_done)
+
+
+class ReplayTransport:
+    """
+    Answer requests from an ApiReplay, without a pyload server.
+
+    Requests which are not in the recording fail with ContentNotFoundError.
+    """
+    def __init__(self, replay):
+        self.replay = replay
+
+    def send(self, request, on_done):
+        response = self.replay.next_response(request.name, request.args, request.kwargs)
+        if response is None:
+            print(f"{request.name}: no response in recording for args={request.args!r} kwargs={request.kwargs!r}")
+            response = (NetworkError.ContentNotFoundError.value, "", 0)
+        error, body, delay = response
+        error = NetworkError(error)
+        # like network replies, results are delivered from the event loop
+        QTimer.singleShot(int(delay * 1000), lambda: on_done(error, body))
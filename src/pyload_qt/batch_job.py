@@ -0,0 +1,97 @@
+# run one api call over many ids in chunks
+# so we dont send 10000 ids in one request
+# and we dont send 10000 requests with one id
+
+from PySide6.QtWidgets import (
+    QProgressDialog,
+)
+from PySide6.QtCore import (
+    Qt,
+)
+from PySide6.QtNetwork import QNetworkReply
+
+NetworkError = QNetworkReply.NetworkError
+
+
+def chunks(items, chunk_size):
+    for idx in range(0, len(items), chunk_size):
+        yield items[idx:(idx + chunk_size)]
+
+
+class BatchJob:
+    """
+    Call func(callback, **{kwarg: chunk}, **kwargs) for each chunk of items.
+
+    Only one request is in flight at a time,
+    so a busy server is not flooded with requests.
+
+    - on_chunk_done(chunk, result) is called after each successful chunk,
+      so the caller can update its local model incrementally
+    - on_done(done_items, errors) is called once at the end
+    """
+    def __init__(
+            self,
+            parent,
+            label,
+            func,
+            items,
+            kwarg,
+            chunk_size=500,
+            on_chunk_done=None,
+            on_done=None,
+            show_progress=True,
+            **kwargs,
+        ):
+        self.func = func
+        self.items = list(items)
+        self.kwarg = kwarg
+        self.kwargs = kwargs
+        self.chunks = list(chunks(self.items, chunk_size))
+        self.chunk_idx = 0
+        self.done_items = []
+        self.errors = []
+        self.on_chunk_done = on_chunk_done
+        self.on_done = on_done
+        self.canceled = False
+        self.progress = None
+        if show_progress and len(self.chunks) > 1:
+            self.progress = QProgressDialog(label, "Cancel", 0, len(self.items), parent)
+            self.progress.setWindowModality(Qt.WindowModal)
+            self.progress.setMinimumDuration(500)
+            self.progress.canceled.connect(self.cancel)
+
+    def start(self):
+        self._next_chunk()
+        return self
+
+    def cancel(self):
+        self.canceled = True
+
+    def _next_chunk(self):
+        if self.canceled or self.chunk_idx >= len(self.chunks):
+            self._finish()
+            return
+        chunk = self.chunks[self.chunk_idx]
+        kwargs = dict(self.kwargs)
+        kwargs[self.kwarg] = chunk
+        self.func(lambda result: self._on_chunk_result(chunk, result), **kwargs)
+
+    def _on_chunk_result(self, chunk, result):
+        if isinstance(result, NetworkError):
+            self.errors.append((chunk, result))
+        else:
+            self.done_items.extend(chunk)
+            if self.on_chunk_done:
+                self.on_chunk_done(chunk, result)
+        self.chunk_idx += 1
+        if self.progress:
+            self.progress.setValue(len(self.done_items) + sum(len(c) for c, _ in self.errors))
+        self._next_chunk()
+
+    def _finish(self):
+        if self.progress:
+            self.progress.reset()
+            self.progress.deleteLater()
+            self.progress = None
+        if self.on_done:
+            self.on_done(self.done_items, self.errors)
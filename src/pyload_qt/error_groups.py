@@ -0,0 +1,244 @@
+# group failed links by plugin and error message
+# to see which hoster or error dominates
+
+import re
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+    QMessageBox,
+)
+from PySide6.QtCore import (
+    Qt,
+    QTimer,
+)
+
+from . import link_status
+from .batch_job import BatchJob
+from .item_delegates import SizeDelegate
+from .package_cache import FAILED_LINKS_MAX_AGE
+
+
+_normalize_error_regex_list = [
+    # urls
+    (re.compile(r"\b[a-z]+://\S+", re.I), "<url>"),
+    # hashes, file ids, ...
+    (re.compile(r"\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b", re.I), "<id>"),
+    # numbers: timeouts, sizes, ...
+    # but keep http status codes: "404" and "503" are different errors
+    (re.compile(r"\b(?![45]\d\d\b)\d+(\.\d+)?\b"), "#"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize_error(error):
+    """
+    Remove variable parts from an error message.
+
+    "Operation timed out after 30001 milliseconds" -> "Operation timed out after # milliseconds"
+    """
+    error = error.strip()
+    for regex, replacement in _normalize_error_regex_list:
+        error = regex.sub(replacement, error)
+    return error
+
+
+class ErrorGroupIndex:
+    """
+    (plugin, normalized error) -> failed links
+
+    updated per package from PackageDataCache listener calls,
+    so we never rescan all links.
+    """
+    def __init__(self):
+        # (plugin, error) -> dict(fid -> (pid, size))
+        self.groups = {}
+        # pid -> list of (group_key, fid)
+        self.package_groups = {}
+        self.listeners = []
+
+    def on_package_data(self, pid, package_data):
+        for group_key, fid in self.package_groups.pop(pid, []):
+            group = self.groups[group_key]
+            del group[fid]
+            if not group:
+                del self.groups[group_key]
+        if package_data is not None:
+            package_groups = []
+            for link in package_data["links"]:
+                if link["status"] not in link_status.FAILED_STATUSES:
+                    continue
+                error = normalize_error(link["error"]) or link["statusmsg"]
+                group_key = (link["plugin"], error)
+                self.groups.setdefault(group_key, {})[link["fid"]] = (pid, link["size"])
+                package_groups.append((group_key, link["fid"]))
+            if package_groups:
+                self.package_groups[pid] = package_groups
+        for listener in self.listeners:
+            listener()
+
+    def group_link_ids(self, group_key):
+        return list(self.groups.get(group_key, {}).keys())
+
+    def group_package_ids(self, group_key):
+        return set(pid for pid, _size in self.groups.get(group_key, {}).values())
+
+
+class ErrorGroupsDialog(QDialog):
+    """
+    Table of failed link groups with bulk restart and remove.
+
+    - parent_pyload_ui: instance of PyLoadUI (main window)
+    """
+    def __init__(self, parent_pyload_ui):
+        super().__init__(parent=parent_pyload_ui)
+        self.pyload_ui = parent_pyload_ui
+        self.client = self.pyload_ui.client
+        self.index = self.pyload_ui.error_groups
+        self.setWindowTitle("Failed Link Errors")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 500)
+        self._init_ui()
+        # debounce index updates while packages are loaded
+        self.update_timer = QTimer(self)
+        self.update_timer.setInterval(500)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.populate_table)
+        self.index.listeners.append(self.update_timer.start)
+        self.finished.connect(lambda _result: self.index.listeners.remove(self.update_timer.start))
+        self.populate_table()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["Plugin", "Error", "Links", "Size"])
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.setColumnWidth(0, 150)
+        self.table.setColumnWidth(3, 90)
+        self.table.setItemDelegateForColumn(3, SizeDelegate(self.table))
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.load_btn = QPushButton("Load All Packages")
+        self.load_btn.setToolTip("Fetch link data of all unfinished packages which are not cached yet")
+        self.restart_btn = QPushButton("Restart Group")
+        self.remove_btn = QPushButton("Remove Group")
+        self.close_btn = QPushButton("Close")
+        btn_layout.addWidget(self.load_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.restart_btn)
+        btn_layout.addWidget(self.remove_btn)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+        self.load_btn.clicked.connect(self.load_all_packages)
+        self.restart_btn.clicked.connect(self.restart_selected_groups)
+        self.remove_btn.clicked.connect(self.remove_selected_groups)
+        self.close_btn.clicked.connect(self.accept)
+
+    def populate_table(self):
+        table = self.table
+        table.setSortingEnabled(False)
+        table.clearContents()
+        groups = self.index.groups
+        table.setRowCount(len(groups))
+        num_links = 0
+        for row, (group_key, group) in enumerate(groups.items()):
+            plugin, error = group_key
+            size = sum(size for _pid, size in group.values())
+            num_links += len(group)
+
+            item = QTableWidgetItem(plugin)
+            item.setData(Qt.UserRole, group_key)
+            table.setItem(row, 0, item)
+
+            item = QTableWidgetItem(error)
+            item.setToolTip(error)
+            table.setItem(row, 1, item)
+
+            item = QTableWidgetItem()
+            item.setData(Qt.DisplayRole, len(group))
+            table.setItem(row, 2, item)
+
+            item = QTableWidgetItem()
+            item.setData(Qt.DisplayRole, size)
+            table.setItem(row, 3, item)
+        table.setSortingEnabled(True)
+        num_packages = len(self.pyload_ui.queue_data_cache or [])
+        self.status_label.setText(
+            f"{num_links} failed links in {len(groups)} groups. "
+            f"Link data of {len(self.pyload_ui.package_cache)} of {num_packages} packages is loaded."
+        )
+
+    def get_selected_group_keys(self):
+        return self.pyload_ui.get_selected_row_ids(self.table)
+
+    def load_all_packages(self):
+        # finished packages have no failed links
+        pids = [
+            package["pid"]
+            for package in (self.pyload_ui.queue_data_cache or [])
+            if package["linksdone"] < package["linkstotal"]
+        ]
+        self.pyload_ui.package_cache.prefetch(pids, max_age=FAILED_LINKS_MAX_AGE)
+
+    def restart_selected_groups(self):
+        link_ids = []
+        for group_key in self.get_selected_group_keys():
+            link_ids += self.index.group_link_ids(group_key)
+        if not link_ids:
+            return
+        BatchJob(
+            self,
+            "Restarting failed links...",
+            self.client.restart_failed,
+            link_ids,
+            "link_ids",
+            on_chunk_done=lambda chunk, result: self.pyload_ui.set_links_restarted(chunk),
+            on_done=self.on_batch_done,
+        ).start()
+
+    def remove_selected_groups(self):
+        link_ids = []
+        for group_key in self.get_selected_group_keys():
+            link_ids += self.index.group_link_ids(group_key)
+        if not link_ids:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Confirm Removal",
+            f"Remove {len(link_ids)} links?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        BatchJob(
+            self,
+            "Removing failed links...",
+            self.client.delete_files,
+            link_ids,
+            "file_ids",
+            on_chunk_done=lambda chunk, result: self.pyload_ui.remove_links_from_cache(chunk),
+            on_done=self.on_batch_done,
+        ).start()
+
+    def on_batch_done(self, done_items, errors):
+        if errors:
+            QMessageBox.warning(self, "Error", f"Failed for {sum(len(c) for c, _ in errors)} links: {errors[0][1]}")
+        self.pyload_ui.refresh_bottom_view()
@@ -0,0 +1,128 @@
+# links per hoster plugin
+# most limits are per hoster (parallel downloads, daily traffic, waiting time)
+# so the sidebar shows which hosters are busy and which fail
+
+from . import link_status
+
+
+class HosterStats:
+    __slots__ = ("links", "queued", "active", "failed", "finished", "size")
+
+    def __init__(self):
+        self.links = 0
+        self.queued = 0
+        self.active = 0
+        self.failed = 0
+        self.finished = 0
+        # bytes of all links
+        self.size = 0
+
+    def add(self, counts, sign=1):
+        # counts: list of values in the order of __slots__
+        self.links += sign * counts[0]
+        self.queued += sign * counts[1]
+        self.active += sign * counts[2]
+        self.failed += sign * counts[3]
+        self.finished += sign * counts[4]
+        self.size += sign * counts[5]
+
+
+def package_hoster_counts(package_data):
+    # plugin -> list of counts in the order of HosterStats.__slots__
+    counts = {}
+    for link in package_data["links"]:
+        plugin = link["plugin"]
+        plugin_counts = counts.get(plugin)
+        if plugin_counts is None:
+            plugin_counts = counts[plugin] = [0, 0, 0, 0, 0, 0]
+        status = link["status"]
+        plugin_counts[0] += 1
+        if status in link_status.QUEUED_STATUSES:
+            plugin_counts[1] += 1
+        elif status in link_status.ACTIVE_STATUSES:
+            plugin_counts[2] += 1
+        elif status in link_status.FAILED_STATUSES:
+            plugin_counts[3] += 1
+        elif status in link_status.FINISHED_STATUSES:
+            plugin_counts[4] += 1
+        plugin_counts[5] += link["size"] or 0
+    return counts
+
+
+class HosterIndex:
+    """
+    plugin -> HosterStats and pids of packages with links of this plugin
+
+    updated per package from PackageDataCache listener calls:
+    the counts of the old package data are subtracted
+    and the counts of the new package data are added,
+    so we never rescan all links.
+    the cache drops packages which changed on the server,
+    their counts are kept until the package is fetched again
+    or removed from the queue (remove_packages).
+
+    listeners are called with (pid, set of changed plugins).
+    """
+    def __init__(self):
+        self.stats = {}
+        # plugin -> set of pids
+        self.plugin_pids = {}
+        # pid -> counts per plugin, see package_hoster_counts
+        self.package_counts = {}
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.stats)
+
+    def num_indexed_packages(self):
+        return len(self.package_counts)
+
+    def on_package_data(self, pid, package_data):
+        if package_data is None:
+            # evicted from the cache, keep the old counts
+            return
+        self._update(pid, package_hoster_counts(package_data))
+
+    def remove_packages(self, pids):
+        # packages which were removed from the queue
+        for pid in pids:
+            if pid in self.package_counts:
+                self._update(pid, {})
+
+    def _update(self, pid, new_counts):
+        old_counts = self.package_counts.pop(pid, {})
+        if old_counts == new_counts:
+            if new_counts:
+                self.package_counts[pid] = new_counts
+            return
+        changed = set()
+        for plugin, counts in old_counts.items():
+            stats = self.stats[plugin]
+            stats.add(counts, -1)
+            changed.add(plugin)
+            if plugin not in new_counts:
+                self.plugin_pids[plugin].discard(pid)
+            if stats.links == 0:
+                # the empty pid set is kept for filters
+                del self.stats[plugin]
+        for plugin, counts in new_counts.items():
+            stats = self.stats.get(plugin)
+            if stats is None:
+                stats = self.stats[plugin] = HosterStats()
+            stats.add(counts)
+            self.package_ids(plugin).add(pid)
+            changed.add(plugin)
+        if new_counts:
+            self.package_counts[pid] = new_counts
+        for listener in self.listeners:
+            listener(pid, changed)
+
+    def get(self, plugin):
+        return self.stats.get(plugin)
+
+    def package_ids(self, plugin):
+        # the set is updated in place, so filters can keep a reference
+        pids = self.plugin_pids.get(plugin)
+        if pids is None:
+            pids = self.plugin_pids[plugin] = set()
+        return pids
@@ -0,0 +1,99 @@
+# filter packages and downloads by hoster plugin, see HosterIndex
+
+from PySide6.QtWidgets import (
+    QListWidgetItem,
+    QListWidget,
+)
+from PySide6.QtCore import (
+    Qt,
+    Signal,
+    QSize,
+    QTimer,
+)
+
+from .item_delegates import format_size
+
+class HosterFilterWidget(QListWidget):
+    # plugin name, or "" for all hosters
+    hosterChanged = Signal(str)
+
+    def __init__(self, parent=None, hoster_index=None):
+        super().__init__(parent)
+        self.hoster_index = hoster_index
+        # plugin -> QListWidgetItem
+        self.plugin_items = {}
+        # plugins which changed since the last updateItems
+        self.changed_plugins = set()
+
+        self.all_item = HosterItem()
+        self.all_item.setData(Qt.DisplayRole, self.tr("All"))
+        self.all_item.setData(Qt.UserRole, "")
+        self.addItem(self.all_item)
+        self.setCurrentRow(0)
+        self.setSortingEnabled(True)
+
+        # debounce index updates while packages are loaded
+        self.update_timer = QTimer(self)
+        self.update_timer.setInterval(500)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.updateItems)
+        if hoster_index is not None:
+            hoster_index.listeners.append(self.onHostersChanged)
+            self.changed_plugins.update(hoster_index.stats)
+            self.updateItems()
+
+        self.currentItemChanged.connect(self.applyFilter)
+
+    def sizeHint(self):
+        num_visible_items = sum(1 for i in range(self.count()) if not self.item(i).isHidden())
+        return QSize(
+            self.sizeHintForColumn(0),
+            int((self.sizeHintForRow(0) + 2 * self.spacing()) * (num_visible_items + 0.5))
+        )
+
+    def onHostersChanged(self, _pid, plugins):
+        self.changed_plugins.update(plugins)
+        self.update_timer.start()
+
+    def updateItems(self):
+        # only the items of changed plugins are updated
+        plugins, self.changed_plugins = self.changed_plugins, set()
+        for plugin in plugins:
+            stats = self.hoster_index.get(plugin)
+            item = self.plugin_items.get(plugin)
+            if item is None:
+                if stats is None:
+                    continue
+                item = self.plugin_items[plugin] = HosterItem()
+                # the sort key must be set before the item is sorted in
+                item.setData(Qt.UserRole, plugin)
+                self.addItem(item)
+            if stats is None:
+                # keep the item of the current filter
+                item.setHidden(item is not self.currentItem())
+                item.setData(Qt.DisplayRole, f"{plugin} (0)")
+                item.setToolTip("")
+                continue
+            item.setHidden(False)
+            text = f"{plugin} ({stats.links})"
+            if stats.failed:
+                text = f"{plugin} ({stats.links}, {stats.failed} failed)"
+            item.setData(Qt.DisplayRole, text)
+            item.setToolTip(
+                f"{stats.active} active, {stats.queued} queued, {stats.failed} failed, "
+                f"{stats.finished} finished, {format_size(stats.size)}"
+            )
+        num_packages = self.hoster_index.num_indexed_packages()
+        self.all_item.setToolTip(f"links of {num_packages} indexed packages")
+        self.updateGeometry()
+
+    def applyFilter(self, item, _previous=None):
+        if item is None:
+            return
+        self.hosterChanged.emit(item.data(Qt.UserRole))
+
+
+class HosterItem(QListWidgetItem):
+    # sort by plugin name, "All" has the empty name and stays on top
+    def __lt__(self, other):
+        return self.data(Qt.UserRole).lower() < other.data(Qt.UserRole).lower()
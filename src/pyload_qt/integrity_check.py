@@ -0,0 +1,454 @@
+# verify finished downloads in the local storage folder
+# compare file sizes with the link size
+# and checksums with .sfv and .md5 files in the package folder
+
+import os
+import re
+import mmap
+import time
+import zlib
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QCheckBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+    QMessageBox,
+)
+from PySide6.QtCore import (
+    Qt,
+    QThread,
+    Signal,
+)
+
+from . import link_status
+from .batch_job import BatchJob
+from .item_delegates import SizeDelegate
+from .worker_threads import stop_thread_later
+
+OK = "ok"
+MISSING = "missing"
+TRUNCATED = "truncated"
+SIZE_MISMATCH = "size mismatch"
+CHECKSUM_MISMATCH = "checksum mismatch"
+ERROR = "error"
+
+# these files are downloaded again by "Restart Corrupted"
+# missing files are not restarted: extracted archives are often deleted
+CORRUPTED_STATUSES = frozenset((TRUNCATED, SIZE_MISMATCH, CHECKSUM_MISMATCH))
+
+# files larger than this are read with mmap
+mmap_min_size = 64 * 1024 * 1024
+block_size = 4 * 1024 * 1024
+
+_sfv_line_regex = re.compile(r"^(.+?)\s+([0-9a-f]{8})\s*$", re.I)
+_md5_line_regex = re.compile(r"^([0-9a-f]{32})\s+\*?(.+?)\s*$", re.I)
+
+
+def parse_checksum_files(folder_path):
+    """
+    Returns dict of file name -> (algorithm, hex digest)
+    from all .sfv and .md5 files in folder_path.
+    """
+    checksums = {}
+    try:
+        with os.scandir(folder_path) as it:
+            file_names = [dir_entry.name for dir_entry in it if dir_entry.is_file()]
+    except OSError:
+        return checksums
+    for file_name in file_names:
+        ext = os.path.splitext(file_name)[1].lower()
+        if ext not in (".sfv", ".md5"):
+            continue
+        try:
+            with open(os.path.join(folder_path, file_name), errors="replace") as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        for line in lines:
+            if line.startswith(";") or not line.strip():
+                # sfv comment
+                continue
+            if ext == ".sfv":
+                match = _sfv_line_regex.match(line)
+                if match:
+                    checksums[match.group(1)] = ("crc32", match.group(2).lower())
+            else:
+                match = _md5_line_regex.match(line)
+                if match:
+                    checksums[match.group(2)] = ("md5", match.group(1).lower())
+    return checksums
+
+
+# set by IntegrityChecker when the check is stopped
+_stop_event = None
+
+
+class CheckStopped(Exception):
+    pass
+
+
+def _init_worker(stop_event=None):
+    global _stop_event
+    _stop_event = stop_event
+    # lower priority of the worker processes.
+    # with the bfq and cfq io schedulers, the io priority follows the cpu priority
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+
+def check_file(path, expected_size, checksum=None, max_bytes_per_sec=0):
+    """
+    Returns (status, actual_size, detail).
+
+    This runs in a worker process.
+    """
+    try:
+        actual_size = os.stat(path).st_size
+    except FileNotFoundError:
+        return MISSING, 0, ""
+    except OSError as exc:
+        return ERROR, 0, str(exc)
+    if expected_size > 0 and actual_size < expected_size:
+        return TRUNCATED, actual_size, f"{expected_size - actual_size} bytes missing"
+    if expected_size > 0 and actual_size > expected_size:
+        return SIZE_MISMATCH, actual_size, f"{actual_size - expected_size} bytes too many"
+    if checksum is None:
+        return OK, actual_size, ""
+    algorithm, expected_digest = checksum
+    try:
+        digest = hash_file(path, actual_size, algorithm, max_bytes_per_sec)
+    except (OSError, ValueError) as exc:
+        return ERROR, actual_size, str(exc)
+    if digest != expected_digest:
+        return CHECKSUM_MISMATCH, actual_size, f"{algorithm} {digest} != {expected_digest}"
+    return OK, actual_size, algorithm
+
+
+def hash_file(path, size, algorithm, max_bytes_per_sec=0):
+    if algorithm == "crc32":
+        crc = 0
+        def update(data):
+            nonlocal crc
+            crc = zlib.crc32(data, crc)
+        def hexdigest():
+            return f"{crc:08x}"
+    else:
+        hasher = hashlib.new(algorithm)
+        update = hasher.update
+        hexdigest = hasher.hexdigest
+
+    start_time = time.monotonic()
+    num_bytes = 0
+
+    def throttle():
+        # stop after this block, a large file takes minutes
+        if _stop_event is not None and _stop_event.is_set():
+            raise CheckStopped(path)
+        # sleep when we are faster than max_bytes_per_sec
+        if max_bytes_per_sec <= 0:
+            return
+        expected_time = num_bytes / max_bytes_per_sec
+        elapsed_time = time.monotonic() - start_time
+        if expected_time > elapsed_time:
+            time.sleep(expected_time - elapsed_time)
+
+    with open(path, "rb") as f:
+        fd = f.fileno()
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if size >= mmap_min_size:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, size, block_size):
+                        update(view[offset:(offset + block_size)])
+                        num_bytes += min(block_size, size - offset)
+                        throttle()
+                finally:
+                    view.release()
+        else:
+            while True:
+                data = f.read(block_size)
+                if not data:
+                    break
+                update(data)
+                num_bytes += len(data)
+                throttle()
+        if hasattr(os, "posix_fadvise"):
+            # dont push the active downloads out of the page cache
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    return hexdigest()
+
+
+def collect_finished_files(storage_folder, packages_data, use_checksums=True):
+    """
+    Returns a list of (fid, pid, path, expected_size, checksum)
+    for all finished links in packages_data.
+    """
+    files = []
+    for package_data in packages_data:
+        folder_path = os.path.join(storage_folder, package_data["folder"])
+        checksums = parse_checksum_files(folder_path) if use_checksums else {}
+        for link in package_data["links"]:
+            if link["status"] != link_status.FINISHED:
+                continue
+            files.append((
+                link["fid"],
+                package_data["pid"],
+                os.path.join(folder_path, link["name"]),
+                link["size"],
+                checksums.get(link["name"]),
+            ))
+    return files
+
+
+class IntegrityChecker(QThread):
+    """
+    Collect the finished files of packages and check them in a process pool.
+
+    The checksum files are read here, not on the gui thread:
+    reading them for all packages of a large library takes a while.
+
+    Hashing is CPU bound, so threads would be limited by the GIL.
+    The total read rate is limited to max_bytes_per_sec,
+    so the check does not starve active downloads on the same disk.
+    """
+    # num_done, num_total
+    progress = Signal(int, int)
+    # (fid, pid, path, status, actual_size, detail)
+    # object: sizes can be larger than a 32 bit int
+    result = Signal(object)
+    # number of checked files, 0 when no finished files were found
+    done = Signal(int)
+
+    def __init__(
+            self,
+            storage_folder,
+            packages_data,
+            use_checksums=True,
+            max_workers=2,
+            max_bytes_per_sec=50 * 1024 * 1024,
+            parent=None,
+        ):
+        super().__init__(parent)
+        self.storage_folder = storage_folder
+        self.packages_data = list(packages_data)
+        self.use_checksums = use_checksums
+        self.files = None
+        self.max_workers = max_workers
+        self.max_bytes_per_sec = max_bytes_per_sec
+
+    def run(self):
+        self.files = collect_finished_files(
+            self.storage_folder, self.packages_data, self.use_checksums
+        )
+        num_total = len(self.files)
+        if num_total == 0 or self.isInterruptionRequested():
+            self.done.emit(0)
+            return
+        self.progress.emit(0, num_total)
+        worker_bytes_per_sec = self.max_bytes_per_sec // self.max_workers
+        # spawn: dont fork the gui process with all its threads
+        mp_context = multiprocessing.get_context("spawn")
+        stop_event = mp_context.Event()
+        # no "with": its __exit__ would wait for the running hashes
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(stop_event,),
+        )
+        futures = [
+            (fid, pid, path, executor.submit(check_file, path, size, checksum, worker_bytes_per_sec))
+            for fid, pid, path, size, checksum in self.files
+        ]
+        for num_done, (fid, pid, path, future) in enumerate(futures, 1):
+            while not future.done():
+                if self.isInterruptionRequested():
+                    # the workers stop hashing after the current block
+                    stop_event.set()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+                wait_futures([future], timeout=0.2)
+            try:
+                status, actual_size, detail = future.result()
+            except Exception as exc:
+                status, actual_size, detail = ERROR, 0, str(exc)
+            self.result.emit((fid, pid, path, status, actual_size, detail))
+            self.progress.emit(num_done, num_total)
+        executor.shutdown()
+        self.done.emit(num_total)
+
+
+class IntegrityCheckDialog(QDialog):
+    """
+    Verify finished files of packages.
+
+    - parent_pyload_ui: instance of PyLoadUI (main window)
+    """
+    def __init__(self, parent_pyload_ui, storage_folder, package_ids):
+        super().__init__(parent=parent_pyload_ui)
+        self.pyload_ui = parent_pyload_ui
+        self.client = parent_pyload_ui.client
+        self.storage_folder = storage_folder
+        self.package_ids = package_ids
+        self.checker = None
+        # fid -> pid
+        self.corrupted = {}
+        self.num_ok = 0
+        self.setWindowTitle("Verify Files")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 500)
+        self._init_ui()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel(f"{len(self.package_ids)} packages")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["File", "Status", "Size", "Details"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setColumnWidth(1, 120)
+        self.table.setColumnWidth(2, 100)
+        self.table.setColumnWidth(3, 250)
+        self.table.setItemDelegateForColumn(2, SizeDelegate(self.table))
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.use_checksums_input = QCheckBox("Check .sfv and .md5 files")
+        self.use_checksums_input.setChecked(True)
+        btn_layout.addWidget(self.use_checksums_input)
+        btn_layout.addStretch()
+        self.start_btn = QPushButton("Start")
+        self.start_btn.clicked.connect(self.start)
+        self.restart_btn = QPushButton("Restart Corrupted")
+        self.restart_btn.setToolTip("Download truncated and corrupted files again")
+        self.restart_btn.setEnabled(False)
+        self.restart_btn.clicked.connect(self.restart_corrupted)
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(self.start_btn)
+        btn_layout.addWidget(self.restart_btn)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+    def start(self):
+        if self.checker:
+            return
+        self.start_btn.setEnabled(False)
+        self.restart_btn.setEnabled(False)
+        self.table.setRowCount(0)
+        self.corrupted = {}
+        self.num_ok = 0
+        self.status_label.setText("Loading package links...")
+        self.pyload_ui.package_cache.fetch(self.package_ids, self.on_packages_data)
+
+    def on_packages_data(self, packages_data):
+        if not self.isVisible():
+            return
+        self.status_label.setText("Collecting finished files ...")
+        self.checker = IntegrityChecker(
+            self.storage_folder,
+            packages_data.values(),
+            self.use_checksums_input.isChecked(),
+            parent=self,
+        )
+        self.checker.result.connect(self.on_result)
+        self.checker.progress.connect(
+            lambda num_done, num_total: self.status_label.setText(
+                f"Checking files ... {num_done} of {num_total}"
+            )
+        )
+        self.checker.done.connect(self.on_done)
+        self.checker.start()
+
+    def on_result(self, result):
+        fid, pid, path, status, actual_size, detail = result
+        if status == OK:
+            # only show problems
+            self.num_ok += 1
+            return
+        if status in CORRUPTED_STATUSES:
+            self.corrupted[fid] = pid
+        table = self.table
+        row = table.rowCount()
+        table.insertRow(row)
+        item = QTableWidgetItem(os.path.relpath(path, self.storage_folder))
+        item.setData(Qt.UserRole, fid)
+        item.setToolTip(path)
+        table.setItem(row, 0, item)
+        table.setItem(row, 1, QTableWidgetItem(status))
+        item = QTableWidgetItem()
+        item.setData(Qt.DisplayRole, actual_size)
+        table.setItem(row, 2, item)
+        item = QTableWidgetItem(detail)
+        item.setToolTip(detail)
+        table.setItem(row, 3, item)
+
+    def on_done(self, num_files):
+        self.checker.wait()
+        self.checker.deleteLater()
+        self.checker = None
+        self.start_btn.setEnabled(True)
+        if num_files == 0:
+            self.status_label.setText("No finished files found")
+            return
+        self.restart_btn.setEnabled(bool(self.corrupted))
+        self.status_label.setText(
+            f"{self.num_ok} files ok. {len(self.corrupted)} corrupted files. "
+            f"{self.table.rowCount() - len(self.corrupted)} missing or unreadable files."
+        )
+
+    def done(self, result):
+        # stop the checker before the dialog is deleted
+        if self.checker:
+            stop_thread_later(
+                self.checker, (self.checker.result, self.checker.progress, self.checker.done)
+            )
+            self.checker = None
+        super().done(result)
+
+    def restart_corrupted(self):
+        link_ids = list(self.corrupted.keys())
+        pids = set(self.corrupted.values())
+        self.restart_btn.setEnabled(False)
+
+        def on_done(done_items, errors):
+            # drop the packages from the cache, so they are fetched again
+            for pid in pids:
+                self.pyload_ui.package_cache.pop(pid)
+            if errors:
+                QMessageBox.warning(self, "Error", f"Failed to restart {sum(len(c) for c, _ in errors)} links: {errors[0][1]}")
+            self.pyload_ui.refresh_bottom_view()
+
+        # restart_failed only restarts failed links (status 6, 8, 9)
+        # but these links are finished, restart_file restarts any link
+        def restart_files(callback, link_ids):
+            self.client.restart_file(callback, file_id=link_ids[0])
+
+        BatchJob(
+            self,
+            "Restarting corrupted files...",
+            restart_files,
+            link_ids,
+            "link_ids",
+            chunk_size=1,
+            on_done=on_done,
+        ).start()
@@ -0,0 +1,65 @@
+# paint numeric cells at paint time
+# items store numbers, so we dont format strings for rows which are never visible
+# and sorting compares the numbers
+
+from PySide6.QtWidgets import (
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionProgressBar,
+)
+from PySide6.QtCore import (
+    Qt,
+)
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            if unit == "B":
+                return f"{size} B"
+            return f"{size:.2f} {unit}"
+        size /= 1024
+    return f"{size:.2f} TiB"
+
+
+class SizeDelegate(QStyledItemDelegate):
+    """
+    Show a size in bytes as "12.34 MiB".
+
+    Empty cells (None or "") are not formatted.
+    """
+    def displayText(self, value, locale):
+        if not isinstance(value, (int, float)):
+            return super().displayText(value, locale)
+        return format_size(value)
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        option.displayAlignment = Qt.AlignRight | Qt.AlignVCenter
+
+
+class ProgressBarDelegate(QStyledItemDelegate):
+    """
+    Paint a progress bar for a progress in percent (0 to 100).
+    """
+    def paint(self, painter, option, index):
+        value = index.data(Qt.DisplayRole)
+        if not isinstance(value, (int, float)):
+            super().paint(painter, option, index)
+            return
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        bar_option = QStyleOptionProgressBar()
+        bar_option.rect = option.rect.adjusted(1, 1, -1, -1)
+        bar_option.state = option.state | QStyle.State_Horizontal
+        bar_option.palette = option.palette
+        bar_option.fontMetrics = option.fontMetrics
+        bar_option.minimum = 0
+        bar_option.maximum = 1000
+        bar_option.progress = int(value * 10)
+        bar_option.text = f"{value:.1f}%"
+        bar_option.textVisible = True
+        bar_option.textAlignment = Qt.AlignCenter
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ProgressBar, bar_option, painter, option.widget)
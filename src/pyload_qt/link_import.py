@@ -0,0 +1,232 @@
+# import large link lists
+# extract links off the gui thread and add them in chunks
+
+import re
+import urllib.parse
+
+from PySide6.QtWidgets import (
+    QProgressDialog,
+)
+from PySide6.QtCore import (
+    Qt,
+    QThread,
+    Signal,
+)
+from PySide6.QtNetwork import QNetworkReply
+
+from . import api
+from .batch_job import chunks
+
+NetworkError = QNetworkReply.NetworkError
+
+url_pattern = re.compile(r'https?://[^\s<>"]+|www\.[^\s<>"]+', re.I)
+
+# punctuation which is usually not part of the link
+# "see https://example.com/file." or "(https://example.com/file)"
+_trailing_chars = ".,;:!?)]}'"
+
+
+def normalize_link(link):
+    link = link.rstrip(_trailing_chars)
+    if link[:4].lower() == "www.":
+        link = "http://" + link
+    # scheme and host are case insensitive
+    # keep path, query and fragment: mega.nz links have the key in the fragment
+    try:
+        parts = urllib.parse.urlsplit(link)
+    except ValueError:
+        return None
+    if not parts.netloc:
+        return None
+    return urllib.parse.urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        parts.query,
+        parts.fragment,
+    ))
+
+
+def link_hoster(link):
+    host = urllib.parse.urlsplit(link).hostname or ""
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def split_links(links, max_links_per_package=0, by_hoster=False):
+    """
+    Split links into groups of links.
+
+    Returns a list of (name_suffix, links).
+    """
+    groups = []
+    if by_hoster:
+        hoster_links = {}
+        for link in links:
+            hoster_links.setdefault(link_hoster(link), []).append(link)
+        groups = [(hoster, group_links) for hoster, group_links in hoster_links.items()]
+    else:
+        groups = [("", links)]
+    if max_links_per_package > 0:
+        split_groups = []
+        for suffix, group_links in groups:
+            num_parts = (len(group_links) + max_links_per_package - 1) // max_links_per_package
+            if num_parts <= 1:
+                split_groups.append((suffix, group_links))
+                continue
+            for part_idx in range(num_parts):
+                start = part_idx * max_links_per_package
+                part_suffix = f"{suffix} {part_idx + 1}/{num_parts}".strip()
+                split_groups.append((part_suffix, group_links[start:(start + max_links_per_package)]))
+        groups = split_groups
+    return groups
+
+
+class LinkExtractor(QThread):
+    """
+    Extract, normalize and deduplicate links from text and files.
+
+    Runs in a worker thread, so large link dumps dont freeze the gui.
+    """
+    # num_links
+    progress = Signal(int)
+    # links, num_duplicates
+    done = Signal(list, int)
+
+    def __init__(self, text="", file_paths=(), parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.file_paths = list(file_paths)
+        self.errors = []
+
+    def iter_lines(self):
+        yield from self.text.splitlines()
+        for file_path in self.file_paths:
+            try:
+                with open(file_path, errors="replace") as f:
+                    yield from f
+            except OSError as exc:
+                self.errors.append(f"{file_path}: {exc}")
+
+    def run(self):
+        # dict keeps insertion order
+        links = dict()
+        num_duplicates = 0
+        num_lines = 0
+        for line in self.iter_lines():
+            num_lines += 1
+            for link in url_pattern.findall(line):
+                link = normalize_link(link)
+                if link is None:
+                    continue
+                if link in links:
+                    num_duplicates += 1
+                    continue
+                links[link] = None
+            if num_lines % 10000 == 0:
+                self.progress.emit(len(links))
+            if self.isInterruptionRequested():
+                return
+        self.done.emit(list(links.keys()), num_duplicates)
+
+
+class PackageImportJob:
+    """
+    Add packages with many links.
+
+    The first chunk of links is added with add_package,
+    the other chunks are added with add_files,
+    so the server never gets all links in one request.
+
+    on_done(pids, errors) is called at the end.
+    """
+    def __init__(
+            self,
+            parent,
+            client,
+            name,
+            links,
+            password="",
+            max_links_per_package=0,
+            by_hoster=False,
+            chunk_size=1000,
+            on_done=None,
+        ):
+        self.parent = parent
+        self.client = client
+        self.api = api.PyLoadApi(client)
+        self.name = name
+        self.password = password
+        self.chunk_size = chunk_size
+        self.on_done = on_done
+        self.groups = split_links(links, max_links_per_package, by_hoster)
+        self.num_links = len(links)
+        self.num_done = 0
+        self.pids = []
+        self.errors = []
+        self.canceled = False
+        self.task = None
+        self.progress = None
+        if self.num_links > chunk_size or len(self.groups) > 1:
+            self.progress = QProgressDialog("Adding links...", "Cancel", 0, self.num_links, parent)
+            self.progress.setWindowModality(Qt.WindowModal)
+            self.progress.setMinimumDuration(500)
+            self.progress.canceled.connect(self.cancel)
+
+    def start(self):
+        self.task = api.run_task(self.run())
+        return self
+
+    def cancel(self):
+        self.canceled = True
+
+    def _set_progress(self):
+        if self.progress:
+            self.progress.setValue(self.num_done)
+
+    async def run(self):
+        for suffix, links in self.groups:
+            if self.canceled:
+                break
+            name = f"{self.name} - {suffix}" if suffix else self.name
+            await self.add_package(name, links)
+        self._finish()
+
+    async def add_package(self, name, links):
+        first_links = links[:self.chunk_size]
+        other_links = links[self.chunk_size:]
+        try:
+            pid = await self.api.add_package(name=name, links=first_links)
+        except api.ApiError as error:
+            self.errors.append((name, error.error))
+            return
+        if not pid:
+            self.errors.append((name, pid))
+            return
+        self.pids.append(pid)
+        self.num_done += len(first_links)
+        self._set_progress()
+        if self.password:
+            try:
+                await self.api.set_package_data(package_id=pid, data=dict(password=self.password))
+            except api.ApiError as error:
+                self.errors.append((name, error.error))
+        # one chunk at a time, so a busy server is not flooded with requests
+        for chunk in chunks(other_links, self.chunk_size):
+            if self.canceled:
+                break
+            try:
+                await self.api.add_files(package_id=pid, links=chunk)
+            except api.ApiError as error:
+                self.errors.append((name, error.error))
+            self.num_done += len(chunk)
+            self._set_progress()
+
+    def _finish(self):
+        if self.progress:
+            self.progress.reset()
+            self.progress.deleteLater()
+            self.progress = None
+        if self.on_done:
+            self.on_done(self.pids, self.errors)
@@ -0,0 +1,106 @@
+# index of all links in the queue
+# to find duplicate links before adding them
+
+from . import link_status
+from .link_import import normalize_link
+
+
+class LinkIndex:
+    """
+    normalized url -> {(pid, fid): status}
+
+    a url can be in several packages, so each url has all its links.
+    updated per package from PackageDataCache listener calls.
+    packages which are dropped from the cache keep their links
+    until they are fetched again or removed from the queue (remove_packages).
+    crawl() fetches all packages which are not cached yet
+    in the background, with the bounded concurrency of the cache.
+    """
+    def __init__(self, package_cache):
+        self.package_cache = package_cache
+        self.links = {}
+        # pid -> list of (url, fid)
+        self.package_links = {}
+        self.is_crawling = False
+        # pids of the current crawl which were not fetched yet
+        self.crawl_pids = set()
+        package_cache.listeners.append(self.on_package_data)
+
+    def __len__(self):
+        return len(self.links)
+
+    def on_package_data(self, pid, package_data):
+        if package_data is None:
+            # evicted from the cache, keep the old links
+            return
+        self._remove_package(pid)
+        package_links = []
+        for link in package_data["links"]:
+            url = normalize_link(link["url"])
+            if url is None:
+                continue
+            fid = link["fid"]
+            self.links.setdefault(url, {})[(pid, fid)] = link["status"]
+            package_links.append((url, fid))
+        self.package_links[pid] = package_links
+
+    def remove_packages(self, pids):
+        # packages which were removed from the queue
+        for pid in pids:
+            self._remove_package(pid)
+
+    def _remove_package(self, pid):
+        for url, fid in self.package_links.pop(pid, []):
+            entries = self.links.get(url)
+            if entries is None:
+                continue
+            entries.pop((pid, fid), None)
+            if not entries:
+                del self.links[url]
+
+    def crawl(self, queue_data):
+        # index all packages
+        # after the first crawl, this only fetches new and changed packages
+        # is_crawling is reset when all packages of the crawl were fetched
+        pids = [
+            package["pid"] for package in queue_data
+            if package["pid"] not in self.package_cache
+        ]
+        self.crawl_pids = set(pids)
+        self.is_crawling = bool(pids)
+        self.package_cache.prefetch(
+            pids, callback=lambda _package_data, pid: self._on_crawled(pid)
+        )
+
+    def _on_crawled(self, pid):
+        self.crawl_pids.discard(pid)
+        if not self.crawl_pids:
+            self.is_crawling = False
+
+    def num_indexed_packages(self):
+        return len(self.package_links)
+
+    def get(self, url):
+        # returns {(pid, fid): status} or None
+        url = normalize_link(url)
+        if url is None:
+            return None
+        return self.links.get(url)
+
+    def find_duplicates(self, urls):
+        """
+        Returns (queued_urls, finished_urls)
+        """
+        queued_urls = []
+        finished_urls = []
+        links = self.links
+        for url in urls:
+            # urls from link_import are normalized already
+            entries = links.get(url)
+            if entries is None:
+                continue
+            if any(status in link_status.FINISHED_STATUSES for status in entries.values()):
+                finished_urls.append(url)
+            else:
+                queued_urls.append(url)
+        return queued_urls, finished_urls
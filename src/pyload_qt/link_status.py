@@ -0,0 +1,33 @@
+# link status codes
+# https://github.com/pyload/pyload/blob/main/src/pyload/core/datatypes/enums.py
+# class DownloadStatus(IntEnum)
+
+FINISHED = 0
+OFFLINE = 1
+ONLINE = 2
+QUEUED = 3
+SKIPPED = 4
+WAITING = 5
+TEMPOFFLINE = 6
+STARTING = 7
+FAILED = 8
+ABORTED = 9
+DECRYPTING = 10
+CUSTOM = 11
+DOWNLOADING = 12
+PROCESSING = 13
+UNKNOWN = 14
+
+# links which are restarted by the restart_failed api
+# pyload/src/pyload/core/database/file_database.py
+# UPDATE links SET status=3, error='' WHERE status IN (6, 8, 9)
+FAILED_STATUSES = frozenset((TEMPOFFLINE, FAILED, ABORTED))
+
+# links which are done and will not change without user action
+FINISHED_STATUSES = frozenset((FINISHED, SKIPPED))
+
+# links which are downloaded or prepared right now
+ACTIVE_STATUSES = frozenset((STARTING, DECRYPTING, DOWNLOADING, PROCESSING))
+
+# links which wait for a download slot
+QUEUED_STATUSES = frozenset((ONLINE, QUEUED, WAITING))
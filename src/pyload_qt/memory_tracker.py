@@ -0,0 +1,322 @@
+# find memory leaks in long running sessions
+# a timer records memory samples: rss, tracemalloc snapshots,
+# counts of qt objects per class, live network replies.
+# the dialog shows the growth between samples
+
+import gc
+import os
+import time
+import tracemalloc
+from collections import Counter, deque
+
+import shiboken6
+from PySide6.QtWidgets import (
+    QApplication,
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QComboBox,
+    QSplitter,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+)
+from PySide6.QtCore import (
+    Qt,
+    QObject,
+    QTimer,
+)
+from PySide6.QtNetwork import (
+    QNetworkReply,
+)
+
+from .item_delegates import SizeDelegate, format_size
+
+
+def get_rss():
+    # resident set size in bytes
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def count_qt_objects(roots):
+    """
+    Count Qt objects per class name.
+
+    QObjects are counted in the object trees of the roots,
+    so objects without python wrappers are also counted.
+    Other Qt objects (QTableWidgetItem, ...) are counted by their python wrappers.
+    """
+    counts = Counter()
+    for root in roots:
+        counts[root.metaObject().className()] += 1
+        for obj in root.findChildren(QObject):
+            counts[obj.metaObject().className()] += 1
+    for obj in gc.get_objects():
+        if isinstance(obj, shiboken6.Shiboken.Object) and not isinstance(obj, QObject):
+            counts[type(obj).__name__] += 1
+    return counts
+
+
+class MemorySample:
+    __slots__ = ("time", "rss", "traced", "qt_counts", "live_replies", "func_cache_size", "snapshot")
+
+    def __init__(self):
+        self.time = time.time()
+        self.rss = get_rss()
+        self.traced = None
+        self.qt_counts = None
+        self.live_replies = 0
+        self.func_cache_size = 0
+        # tracemalloc.Snapshot, only for some samples
+        self.snapshot = None
+
+
+class MemoryTracker:
+    """
+    Record a MemorySample every interval_ms.
+
+    tracemalloc snapshots are large,
+    so we keep only the snapshots of the first and the last two samples.
+
+    - pyload_ui: instance of PyLoadUI (main window)
+    """
+    def __init__(self, pyload_ui, interval_ms=60_000, max_samples=24 * 60, traceback_limit=10):
+        self.pyload_ui = pyload_ui
+        self.traceback_limit = traceback_limit
+        self.samples = deque(maxlen=max_samples)
+        self.first_sample = None
+        self.listeners = []
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.take_sample)
+
+    def is_running(self):
+        return self.timer.isActive()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            # more frames show the caller of handle_reply, but cost more memory
+            tracemalloc.start(self.traceback_limit)
+        self.timer.start()
+        self.take_sample()
+        return self
+
+    def stop(self):
+        self.timer.stop()
+        tracemalloc.stop()
+
+    def take_sample(self):
+        client = self.pyload_ui.client
+        manager = client.manager
+        sample = MemorySample()
+        roots = QApplication.topLevelWidgets() + [QApplication.instance()]
+        if manager is not None:
+            roots.append(manager)
+            # replies are children of the network manager until they are deleted
+            sample.live_replies = len(manager.findChildren(QNetworkReply))
+        sample.qt_counts = count_qt_objects(roots)
+        sample.func_cache_size = len(client.func_cache)
+        if tracemalloc.is_tracing():
+            sample.traced = tracemalloc.get_traced_memory()[0]
+            sample.snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ))
+        if self.first_sample is None:
+            self.first_sample = sample
+        # drop old snapshots, keep the first and the previous
+        if len(self.samples) >= 2 and self.samples[-2] is not self.first_sample:
+            self.samples[-2].snapshot = None
+        self.samples.append(sample)
+        for listener in self.listeners:
+            listener(sample)
+        return sample
+
+    def baseline(self, since_first):
+        # sample to compare the last sample with
+        if since_first or len(self.samples) < 2:
+            return self.first_sample
+        return self.samples[-2]
+
+    def qt_count_deltas(self, since_first=True):
+        """
+        Returns a list of (class_name, baseline count, current count), largest growth first.
+        """
+        if not self.samples:
+            return []
+        baseline = self.baseline(since_first)
+        current = self.samples[-1]
+        names = set(baseline.qt_counts) | set(current.qt_counts)
+        rows = [
+            (name, baseline.qt_counts.get(name, 0), current.qt_counts.get(name, 0))
+            for name in names
+        ]
+        rows.sort(key=lambda row: (row[1] - row[2], row[0]))
+        return rows
+
+    def traced_deltas(self, since_first=True, group_by="lineno", limit=50):
+        """
+        Returns a list of tracemalloc.StatisticDiff, largest growth first.
+        """
+        if not self.samples:
+            return []
+        baseline = self.baseline(since_first)
+        current = self.samples[-1]
+        if baseline.snapshot is None or current.snapshot is None:
+            return []
+        return current.snapshot.compare_to(baseline.snapshot, group_by)[:limit]
+
+    def summary(self):
+        if not self.samples:
+            return "no memory samples"
+        first = self.first_sample
+        current = self.samples[-1]
+        hours = (current.time - first.time) / 3600
+        lines = [f"{len(self.samples)} samples in {hours:.1f} hours"]
+        if current.rss is not None and first.rss is not None:
+            lines.append(f"rss: {format_size(first.rss)} -> {format_size(current.rss)}")
+        if current.traced is not None and first.traced is not None:
+            lines.append(f"traced: {format_size(first.traced)} -> {format_size(current.traced)}")
+        lines.append(f"live replies: {first.live_replies} -> {current.live_replies}")
+        lines.append(f"func_cache: {first.func_cache_size} -> {current.func_cache_size}")
+        return "\n".join(lines)
+
+
+class NumberItem(QTableWidgetItem):
+    # sort by number
+    def __init__(self, value):
+        super().__init__()
+        self.setData(Qt.DisplayRole, value)
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+
+class MemoryTrackerDialog(QDialog):
+    """
+    Growth of memory, Qt objects and python allocations between samples.
+
+    - parent_pyload_ui: instance of PyLoadUI (main window)
+    """
+    def __init__(self, parent_pyload_ui):
+        super().__init__(parent=parent_pyload_ui)
+        self.pyload_ui = parent_pyload_ui
+        self.tracker = self.pyload_ui.memory_tracker
+        self.setWindowTitle("Memory Tracking")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(1000, 700)
+        self._init_ui()
+        self.tracker.listeners.append(self.on_sample)
+        self.finished.connect(lambda _result: self.tracker.listeners.remove(self.on_sample))
+        self.populate()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        baseline_layout = QHBoxLayout()
+        baseline_layout.addWidget(QLabel("Growth:"))
+        self.baseline_combo = QComboBox()
+        self.baseline_combo.addItems(["since first sample", "since previous sample"])
+        self.baseline_combo.currentIndexChanged.connect(self.populate)
+        baseline_layout.addWidget(self.baseline_combo)
+        baseline_layout.addStretch()
+        layout.addLayout(baseline_layout)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        # timeline of samples
+        self.samples_table = QTableWidget(0, 5)
+        self.samples_table.setHorizontalHeaderLabels(
+            ["Time", "RSS", "Traced", "Live Replies", "Qt Objects"]
+        )
+        self.samples_table.setItemDelegateForColumn(1, SizeDelegate(self.samples_table))
+        self.samples_table.setItemDelegateForColumn(2, SizeDelegate(self.samples_table))
+        splitter.addWidget(self.samples_table)
+
+        self.qt_table = QTableWidget(0, 4)
+        self.qt_table.setHorizontalHeaderLabels(["Qt Class", "Before", "Now", "Growth"])
+        self.qt_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        splitter.addWidget(self.qt_table)
+
+        self.traced_table = QTableWidget(0, 4)
+        self.traced_table.setHorizontalHeaderLabels(["Allocated at", "Size", "Size Growth", "Count Growth"])
+        self.traced_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.traced_table.setItemDelegateForColumn(1, SizeDelegate(self.traced_table))
+        self.traced_table.setItemDelegateForColumn(2, SizeDelegate(self.traced_table))
+        splitter.addWidget(self.traced_table)
+
+        for table in (self.samples_table, self.qt_table, self.traced_table):
+            table.setSelectionBehavior(QTableWidget.SelectRows)
+            table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            table.verticalHeader().setVisible(False)
+        self.qt_table.setSortingEnabled(True)
+        self.traced_table.setSortingEnabled(True)
+        layout.addWidget(splitter)
+
+        btn_layout = QHBoxLayout()
+        self.start_btn = QPushButton("Start Tracking")
+        self.start_btn.setToolTip("Start tracemalloc and record a sample every minute")
+        self.sample_btn = QPushButton("Take Sample Now")
+        self.close_btn = QPushButton("Close")
+        self.start_btn.clicked.connect(self.start_tracking)
+        self.sample_btn.clicked.connect(self.tracker.take_sample)
+        self.close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(self.start_btn)
+        btn_layout.addWidget(self.sample_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+    def start_tracking(self):
+        self.tracker.start()
+
+    def on_sample(self, _sample):
+        self.populate()
+
+    def populate(self):
+        tracker = self.tracker
+        self.start_btn.setEnabled(not tracker.is_running())
+        self.sample_btn.setEnabled(tracker.is_running())
+        self.status_label.setText(tracker.summary().replace("\n", ", "))
+        since_first = self.baseline_combo.currentIndex() == 0
+
+        samples = list(tracker.samples)
+        self.samples_table.setRowCount(len(samples))
+        for row, sample in enumerate(reversed(samples)):
+            time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sample.time))
+            self.samples_table.setItem(row, 0, QTableWidgetItem(time_str))
+            self.samples_table.setItem(row, 1, NumberItem(sample.rss))
+            self.samples_table.setItem(row, 2, NumberItem(sample.traced))
+            self.samples_table.setItem(row, 3, NumberItem(sample.live_replies))
+            self.samples_table.setItem(row, 4, NumberItem(sum(sample.qt_counts.values())))
+
+        rows = tracker.qt_count_deltas(since_first)
+        self.qt_table.setSortingEnabled(False)
+        self.qt_table.setRowCount(len(rows))
+        for row, (name, before, now) in enumerate(rows):
+            self.qt_table.setItem(row, 0, QTableWidgetItem(name))
+            self.qt_table.setItem(row, 1, NumberItem(before))
+            self.qt_table.setItem(row, 2, NumberItem(now))
+            self.qt_table.setItem(row, 3, NumberItem(now - before))
+        self.qt_table.setSortingEnabled(True)
+
+        diffs = tracker.traced_deltas(since_first)
+        self.traced_table.setSortingEnabled(False)
+        self.traced_table.setRowCount(len(diffs))
+        for row, diff in enumerate(diffs):
+            frame = diff.traceback[0]
+            location = f"{frame.filename}:{frame.lineno}"
+            self.traced_table.setItem(row, 0, QTableWidgetItem(location))
+            self.traced_table.setItem(row, 1, NumberItem(diff.size))
+            self.traced_table.setItem(row, 2, NumberItem(diff.size_diff))
+            self.traced_table.setItem(row, 3, NumberItem(diff.count_diff))
+        self.traced_table.setSortingEnabled(True)
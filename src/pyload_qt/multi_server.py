@@ -0,0 +1,155 @@
+# ids and results of several pyload servers in one window
+#
+# package ids and file ids of different servers overlap,
+# so ids in the gui are namespaced: the server index is stored in the high bits.
+# ids of the first server are not changed,
+# and namespaced ids are still ints, so records, arrays and sorting work as before.
+
+from PySide6.QtNetwork import QNetworkReply
+
+NetworkError = QNetworkReply.NetworkError
+
+# pyload ids are sqlite rowids, far below 2**40
+SERVER_SHIFT = 40
+LOCAL_ID_MASK = (1 << SERVER_SHIFT) - 1
+
+# result fields which contain ids
+ID_FIELDS = frozenset(("pid", "fid", "package_id", "packageID"))
+ID_LIST_FIELDS = frozenset(("fids", "pids"))
+
+# kwargs of api calls which contain ids or lists of ids
+ID_KWARGS = frozenset(("package_id", "file_id", "link_id"))
+ID_LIST_KWARGS = frozenset(("package_ids", "file_ids", "link_ids"))
+
+# api calls with an id as first positional argument
+POSITIONAL_ID_CALLS = frozenset(("get_package_data", "get_file_data"))
+
+# api calls without ids which are sent to all servers
+# other calls without ids are sent to the first server
+FAN_OUT_CALLS = frozenset((
+    "get_queue_and_collector",
+    "status",
+    "links",
+    "pause_server",
+    "unpause_server",
+    "stop_all_downloads",
+    "restart_failed",
+    "delete_finished",
+))
+
+# fan out calls which are polled:
+# a slow or failing server does not block the others,
+# its last result is used until it answers again
+POLLED_CALLS = frozenset(("get_queue_and_collector", "status", "links"))
+
+
+def global_id(server_index, local_id):
+    return (server_index << SERVER_SHIFT) | local_id
+
+
+def split_id(id):
+    # returns (server index, id on the server)
+    return id >> SERVER_SHIFT, id & LOCAL_ID_MASK
+
+
+def server_index(id):
+    return id >> SERVER_SHIFT
+
+
+def namespace_ids(data, server_index):
+    """
+    Replace the ids in a json result of a server with namespaced ids.
+
+    Dicts and lists are changed in place.
+    """
+    if server_index == 0:
+        return data
+    offset = server_index << SERVER_SHIFT
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, list):
+            stack.extend(item for item in obj if isinstance(item, (dict, list)))
+            continue
+        if not isinstance(obj, dict):
+            continue
+        for key, value in obj.items():
+            if key in ID_FIELDS and isinstance(value, int):
+                obj[key] = offset | value
+            elif key in ID_LIST_FIELDS and isinstance(value, list):
+                obj[key] = [offset | id for id in value]
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    return data
+
+
+def split_ids_by_server(name, args, kwargs):
+    """
+    Split the ids in the arguments of an api call by server.
+
+    Returns a dict of server index -> (args, kwargs) with ids of that server,
+    or None when the call has no ids.
+    """
+    parts = {}
+
+    def get_part(index):
+        part = parts.get(index)
+        if part is None:
+            part = parts[index] = [args, dict(kwargs)]
+        return part
+
+    if name in POSITIONAL_ID_CALLS and args and isinstance(args[0], int):
+        index, local_id = split_id(args[0])
+        get_part(index)[0] = (local_id,) + tuple(args[1:])
+    for key, value in kwargs.items():
+        if key in ID_KWARGS and isinstance(value, int):
+            index, local_id = split_id(value)
+            get_part(index)[1][key] = local_id
+        elif key in ID_LIST_KWARGS and isinstance(value, (list, tuple)):
+            ids_by_server = {}
+            for id in value:
+                index, local_id = split_id(id)
+                ids_by_server.setdefault(index, []).append(local_id)
+            for index, local_ids in ids_by_server.items():
+                get_part(index)[1][key] = local_ids
+    if not parts:
+        return None
+    # a list kwarg of one server is not sent to the other servers
+    for index, part in parts.items():
+        for key in ID_LIST_KWARGS & part[1].keys():
+            if part[1][key] is kwargs[key]:
+                part[1][key] = []
+    return {index: (tuple(part[0]), part[1]) for index, part in parts.items()}
+
+
+def merge_results(results):
+    """
+    Merge the json results of one api call to several servers.
+
+    Lists are concatenated, numbers in dicts are added,
+    for other values the first result wins.
+    """
+    results = [result for result in results if result is not None]
+    if not results:
+        return None
+    first = results[0]
+    if isinstance(first, list):
+        merged = []
+        for result in results:
+            merged.extend(result)
+        return merged
+    if isinstance(first, dict):
+        merged = {}
+        for result in results:
+            for key, value in result.items():
+                old_value = merged.get(key)
+                if old_value is None:
+                    merged[key] = value
+                elif isinstance(value, list) and isinstance(old_value, list):
+                    merged[key] = old_value + value
+                elif isinstance(value, bool) or isinstance(old_value, bool):
+                    merged[key] = old_value or value
+                elif isinstance(value, (int, float)) and isinstance(old_value, (int, float)):
+                    merged[key] = old_value + value
+        return merged
+    return first
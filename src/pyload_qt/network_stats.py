@@ -0,0 +1,161 @@
+# bytes on the wire and decoded bytes per api endpoint
+# to see what compression saves, and where requests wait
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+)
+from PySide6.QtCore import (
+    Qt,
+)
+
+from .item_delegates import SizeDelegate, format_size
+
+
+class EndpointStats:
+    __slots__ = ("requests", "errors", "wire_bytes", "decoded_bytes", "total_time", "queue_time")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        # response body as sent by the server, maybe compressed
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        # seconds from sending the request to the decoded response
+        self.total_time = 0
+        # seconds waiting for a free connection slot
+        self.queue_time = 0
+
+
+class TransferStats:
+    """
+    api name -> EndpointStats
+
+    Transports call record() for every response.
+    """
+    def __init__(self):
+        self.endpoints = {}
+
+    def reset(self):
+        self.endpoints = {}
+
+    def _get(self, name):
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        return stats
+
+    def record(self, name, wire_bytes, decoded_bytes, duration, error=False):
+        stats = self._get(name)
+        stats.requests += 1
+        if error:
+            stats.errors += 1
+        stats.wire_bytes += wire_bytes
+        stats.decoded_bytes += decoded_bytes
+        stats.total_time += duration
+
+    def record_queue_time(self, name, seconds):
+        self._get(name).queue_time += seconds
+
+    def summary(self):
+        wire_bytes = sum(stats.wire_bytes for stats in self.endpoints.values())
+        decoded_bytes = sum(stats.decoded_bytes for stats in self.endpoints.values())
+        requests = sum(stats.requests for stats in self.endpoints.values())
+        ratio = f", {(100 * wire_bytes / decoded_bytes):.0f}% on the wire" if decoded_bytes else ""
+        return (
+            f"{requests} requests, {format_size(wire_bytes)} on the wire, "
+            f"{format_size(decoded_bytes)} decoded{ratio}"
+        )
+
+
+class NumberItem(QTableWidgetItem):
+    # sort by number
+    def __init__(self, value):
+        super().__init__()
+        self.setData(Qt.DisplayRole, value)
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+
+class NetworkStatsDialog(QDialog):
+    """
+    Table of TransferStats per api endpoint.
+
+    - parent_pyload_ui: instance of PyLoadUI (main window)
+    """
+    def __init__(self, parent_pyload_ui):
+        super().__init__(parent=parent_pyload_ui)
+        self.pyload_ui = parent_pyload_ui
+        self.stats = getattr(self.pyload_ui.client.transport, "stats", None)
+        self.setWindowTitle("Network Statistics")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 400)
+        self._init_ui()
+        self.populate_table()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, 8)
+        self.table.setHorizontalHeaderLabels([
+            "Endpoint", "Requests", "Errors", "Wire", "Decoded", "Wire %", "Mean ms", "Mean Wait ms",
+        ])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setItemDelegateForColumn(3, SizeDelegate(self.table))
+        self.table.setItemDelegateForColumn(4, SizeDelegate(self.table))
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("Refresh")
+        self.reset_btn = QPushButton("Reset")
+        self.close_btn = QPushButton("Close")
+        self.refresh_btn.clicked.connect(self.populate_table)
+        self.reset_btn.clicked.connect(self.reset)
+        self.close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(self.refresh_btn)
+        btn_layout.addWidget(self.reset_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+    def reset(self):
+        if self.stats:
+            self.stats.reset()
+        self.populate_table()
+
+    def populate_table(self):
+        if self.stats is None:
+            # for example ReplayTransport
+            self.status_label.setText("The transport has no statistics")
+            self.table.setRowCount(0)
+            return
+        endpoints = list(self.stats.endpoints.items())
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(endpoints))
+        for row, (name, stats) in enumerate(endpoints):
+            requests = stats.requests or 1
+            wire_percent = round(100 * stats.wire_bytes / stats.decoded_bytes) if stats.decoded_bytes else None
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, NumberItem(stats.requests))
+            self.table.setItem(row, 2, NumberItem(stats.errors))
+            self.table.setItem(row, 3, NumberItem(stats.wire_bytes))
+            self.table.setItem(row, 4, NumberItem(stats.decoded_bytes))
+            self.table.setItem(row, 5, NumberItem(wire_percent))
+            self.table.setItem(row, 6, NumberItem(round(stats.total_time * 1000 / requests, 1)))
+            self.table.setItem(row, 7, NumberItem(round(stats.queue_time * 1000 / requests, 1)))
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(3, Qt.DescendingOrder)
+        self.status_label.setText(self.stats.summary())
@@ -0,0 +1,284 @@
+# cache of get_package_data results
+# so bulk actions over many packages dont have to fetch every package again
+
+import sys
+import time
+from collections import deque
+
+from . import link_status
+from .record_store import (
+    Change,
+    PackageRecord,
+    package_from_dict,
+    merge_links,
+    records_footprint,
+)
+
+
+summary_fields = ("linkstotal", "linksdone", "sizetotal")
+
+# a link can fail without changing the queue summary,
+# so lookups of failed links refetch package data older than this (seconds)
+FAILED_LINKS_MAX_AGE = 60
+
+
+def queue_summary(package):
+    # these values change when links are added, removed or finished
+    return (package["linkstotal"], package["linksdone"], package["sizetotal"])
+
+
+def package_data_summary(package_data):
+    links = package_data["links"]
+    return (
+        len(links),
+        # linksdone of the server also counts skipped links
+        sum(1 for link in links if link["status"] in link_status.FINISHED_STATUSES),
+        sum(link["size"] for link in links),
+    )
+
+
+class PackageDataCache:
+    """
+    pid -> package data from get_package_data
+
+    fetch() and prefetch() request missing packages from the server
+    with at most max_parallel requests in flight.
+    fetch() requests are sent before prefetch() requests,
+    so a background crawl does not block interactive actions.
+
+    New package data is merged into the cached link records,
+    and link_listeners are called with (pid, Change of fids).
+    The link counts and sizes of the package in the record store
+    are updated from the links, so the packages table
+    and the links view show the same data.
+    """
+    def __init__(self, client, max_parallel=4, store=None):
+        self.client = client
+        self.store = store
+        self.max_parallel = max_parallel
+        self.data = {}
+        self.fetch_time = {}
+        # pid -> list of callbacks waiting for this package
+        self.waiting = {}
+        self.fetch_queue = deque()
+        self.urgent_queue = deque()
+        self.in_flight = set()
+        self.num_in_flight = 0
+        # listeners are called with (pid, package_data)
+        # package_data is None when the package was removed from the cache
+        self.listeners = []
+        # link_listeners are called with (pid, Change)
+        self.link_listeners = []
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, pid):
+        return pid in self.data
+
+    def get(self, pid, default=None):
+        return self.data.get(pid, default)
+
+    def items(self):
+        return self.data.items()
+
+    def put(self, package_data):
+        # returns the cached PackageRecord
+        if isinstance(package_data, dict) and "pid" in package_data:
+            package_data = package_from_dict(package_data)
+        elif not isinstance(package_data, PackageRecord):
+            return None
+        pid = package_data["pid"]
+        old_package_data = self.data.get(pid)
+        if old_package_data is not None and old_package_data is not package_data:
+            # keep the old records, so views can keep references to them
+            package_data.links, change = merge_links(old_package_data.links, package_data.links)
+            old_package_data.update_from_dict(package_data)
+            old_package_data.links = package_data.links
+            package_data = old_package_data
+        else:
+            change = Change(added=[link.fid for link in package_data.links])
+        self.data[pid] = package_data
+        self.fetch_time[pid] = time.monotonic()
+        self._notify(pid, package_data)
+        self._notify_links(pid, package_data, change)
+        return package_data
+
+    def pop(self, pid, default=None):
+        self.fetch_time.pop(pid, None)
+        package_data = self.data.pop(pid, default)
+        if package_data is not default:
+            self._notify(pid, None)
+        return package_data
+
+    def links_changed(self, pid, change=None):
+        # call this after changing the links of a cached package in place
+        # change=None: unknown changes, views are rebuilt
+        package_data = self.data.get(pid)
+        if package_data is not None:
+            self._notify(pid, package_data)
+            self._notify_links(pid, package_data, change or Change(reordered=True))
+
+    def update_links(self, links):
+        """
+        Update fields of cached links, for example from the active downloads.
+
+        links is a list of dicts with fid, package_id and the changed fields.
+        """
+        links_by_pid = {}
+        for link in links:
+            pid = link.get("package_id")
+            if pid in self.data:
+                links_by_pid.setdefault(pid, []).append(link)
+        for pid, pid_links in links_by_pid.items():
+            package_data = self.data[pid]
+            records = {record.fid: record for record in package_data.links}
+            changed = {}
+            for link in pid_links:
+                record = records.get(link["fid"])
+                if record is None:
+                    continue
+                fields = set()
+                for key in record.__slots__:
+                    if key in link and record[key] != link[key]:
+                        record[key] = link[key]
+                        fields.add(key)
+                if fields:
+                    changed[record.fid] = fields
+            if changed:
+                self.links_changed(pid, Change(changed=changed))
+
+    def _notify(self, pid, package_data):
+        for listener in self.listeners:
+            listener(pid, package_data)
+
+    def _notify_links(self, pid, package_data, change):
+        if not change:
+            # same links as before, dont overwrite newer counts of the queue
+            return
+        if self.store is not None:
+            # package_data_summary counts finished links like the server
+            self.store.update_package(pid, dict(zip(summary_fields, package_data_summary(package_data))))
+        for listener in self.link_listeners:
+            listener(pid, change)
+
+    def memory_footprint(self):
+        return records_footprint(self.data.values()) + sys.getsizeof(self.data)
+
+    def is_fresh(self, pid, max_age=None):
+        if pid not in self.data:
+            return False
+        if max_age is None:
+            return True
+        return (time.monotonic() - self.fetch_time[pid]) < max_age
+
+    def update_queue(self, queue_data):
+        # drop cached packages which were changed or removed on the server
+        # so the next fetch() gets fresh data
+        queue_pids = set()
+        for package in queue_data:
+            pid = package["pid"]
+            queue_pids.add(pid)
+            package_data = self.data.get(pid)
+            if package_data is None:
+                continue
+            if package_data_summary(package_data) != queue_summary(package):
+                self.pop(pid)
+        for pid in list(self.data.keys()):
+            if pid not in queue_pids:
+                self.pop(pid)
+
+    def fetch(self, pids, callback=None, on_progress=None, max_age=None):
+        """
+        Get package data for all pids, fetching missing packages.
+
+        callback(result) is called with a dict pid -> package_data.
+        packages which failed to load are missing in result.
+        on_progress(num_done, num_total) is called after each package.
+        """
+        pids = list(pids)
+        missing = [pid for pid in pids if not self.is_fresh(pid, max_age)]
+        num_total = len(missing)
+        state = dict(num_done=0)
+
+        def done():
+            if callback:
+                callback({pid: self.data[pid] for pid in pids if pid in self.data})
+
+        if not missing:
+            done()
+            return
+
+        def on_package(package_data):
+            state["num_done"] += 1
+            if on_progress:
+                on_progress(state["num_done"], num_total)
+            if state["num_done"] == num_total:
+                done()
+
+        for pid in missing:
+            self._request(pid, on_package, urgent=True)
+
+    def prefetch(self, pids, max_age=None, callback=None):
+        # fetch missing packages in the background
+        # callback(package_data, pid) is called after each package
+        for pid in pids:
+            if not self.is_fresh(pid, max_age):
+                self._request(
+                    pid, callback and (lambda package_data, pid=pid: callback(package_data, pid))
+                )
+
+    def num_pending(self):
+        return len(self.waiting)
+
+    def _request(self, pid, callback, urgent=False):
+        if pid in self.waiting:
+            # already queued or in flight
+            if callback:
+                self.waiting[pid].append(callback)
+            if urgent:
+                self.urgent_queue.append(pid)
+                self._fill()
+            return
+        self.waiting[pid] = [callback] if callback else []
+        if urgent:
+            self.urgent_queue.append(pid)
+        else:
+            self.fetch_queue.append(pid)
+        self._fill()
+
+    def _next_pid(self):
+        # returns (pid, urgent)
+        while self.urgent_queue:
+            pid = self.urgent_queue.popleft()
+            if pid in self.waiting and pid not in self.in_flight:
+                return pid, True
+        while self.fetch_queue:
+            pid = self.fetch_queue.popleft()
+            if pid in self.waiting and pid not in self.in_flight:
+                return pid, False
+        return None, False
+
+    def _fill(self):
+        while self.num_in_flight < self.max_parallel:
+            pid, urgent = self._next_pid()
+            if pid is None:
+                break
+            self.in_flight.add(pid)
+            self.num_in_flight += 1
+            # prefetches wait for interactive requests of the gui
+            client = self.client if urgent else self.client.background
+            client.get_package_data(
+                lambda package_data, pid=pid: self._on_package_data(pid, package_data),
+                pid,
+            )
+
+    def _on_package_data(self, pid, package_data):
+        self.num_in_flight -= 1
+        self.in_flight.discard(pid)
+        if isinstance(package_data, dict):
+            package_data = self.put(package_data)
+        callbacks = self.waiting.pop(pid, [])
+        for callback in callbacks:
+            callback(package_data)
+        self._fill()
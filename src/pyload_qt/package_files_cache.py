@@ -0,0 +1,199 @@
+# cache of get_package_folder_files results
+# per package and subdirectory
+
+import os
+import posixpath
+import time
+
+from PySide6.QtCore import (
+    QThread,
+    Signal,
+)
+from PySide6.QtNetwork import QNetworkReply
+
+NetworkError = QNetworkReply.NetworkError
+
+
+def is_dir_entry(entry):
+    return entry["type"][0] == "d"
+
+
+def parent_subdir(subdir):
+    return posixpath.dirname(subdir.rstrip("/"))
+
+
+def scandir_entries(path):
+    # same format as get_package_folder_files
+    entries = []
+    with os.scandir(path) as it:
+        for dir_entry in it:
+            try:
+                stat = dir_entry.stat(follow_symlinks=False)
+                is_dir = dir_entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            entries.append(dict(
+                name=dir_entry.name,
+                type=("d" if is_dir else "-"),
+                size=(0 if is_dir else stat.st_size),
+                mtime=int(stat.st_mtime),
+            ))
+    entries.sort(key=lambda entry: entry["name"])
+    return entries
+
+
+class LocalDirLister(QThread):
+    """
+    List a local directory with os.scandir in a worker thread.
+    """
+    # entries or None
+    done = Signal(object)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def run(self):
+        try:
+            entries = scandir_entries(self.path)
+        except OSError as exc:
+            print(f"LocalDirLister: {exc}")
+            entries = None
+        self.done.emit(entries)
+
+
+class PackageFilesCache:
+    """
+    (pid, subdir) -> list of file entries
+
+    a cached listing of a subdirectory is valid
+    as long as the mtime of the subdirectory in the parent listing
+    is the same as when the subdirectory was listed.
+    note: the mtime of a directory does not change
+    when a file in that directory grows,
+    so the current directory is still fetched on every refresh.
+    the package folder itself has no parent listing,
+    so listings older than max_age seconds are outdated.
+    """
+    def __init__(self, client, max_prefetch=20, max_age=300):
+        self.client = client
+        self.max_prefetch = max_prefetch
+        self.max_age = max_age
+        # (pid, subdir) -> (entries, dir_mtime, fetch_time)
+        self.listings = {}
+        # (pid, subdir) -> list of callbacks
+        self.waiting = {}
+        # get_local_folder(pid) -> absolute path of the package folder or None
+        # when the pyload server runs on localhost, we list folders with os.scandir
+        self.get_local_folder = None
+        self.local_listers = set()
+
+    def clear(self, pid=None):
+        if pid is None:
+            self.listings.clear()
+            return
+        self.remove_packages([pid])
+
+    def remove_packages(self, pids):
+        pids = set(pids)
+        for key in [key for key in self.listings if key[0] in pids]:
+            del self.listings[key]
+
+    def prune(self):
+        # drop outdated listings of all packages
+        min_time = time.monotonic() - self.max_age
+        for key in [key for key, listing in self.listings.items() if listing[2] < min_time]:
+            del self.listings[key]
+
+    def subdir_mtime(self, pid, subdir):
+        # get the mtime of subdir from the parent listing
+        if subdir == "":
+            return None
+        parent = self.listings.get((pid, parent_subdir(subdir)))
+        if parent is None:
+            return None
+        name = posixpath.basename(subdir.rstrip("/"))
+        for entry in parent[0]:
+            if entry["name"] == name and is_dir_entry(entry):
+                return entry["mtime"]
+        return None
+
+    def get(self, pid, subdir):
+        """
+        Returns the cached entries, or None when the cache is outdated.
+        """
+        listing = self.listings.get((pid, subdir))
+        if listing is None:
+            return None
+        entries, dir_mtime, fetch_time = listing
+        if time.monotonic() - fetch_time > self.max_age:
+            return None
+        if subdir != "" and dir_mtime != self.subdir_mtime(pid, subdir):
+            return None
+        return entries
+
+    def local_path(self, pid, subdir):
+        if not self.get_local_folder:
+            return None
+        folder = self.get_local_folder(pid)
+        if not folder:
+            return None
+        return os.path.join(folder, subdir)
+
+    def put(self, pid, subdir, entries):
+        # returns True when the listing has changed
+        key = (pid, subdir)
+        if entries is None:
+            return self.listings.pop(key, None) is not None
+        old_listing = self.listings.get(key)
+        self.listings[key] = (entries, self.subdir_mtime(pid, subdir), time.monotonic())
+        return (old_listing is None or old_listing[0] != entries)
+
+    def fetch(self, pid, subdir, callback=None):
+        """
+        callback(entries, changed) is called with the new listing.
+        changed is False when the listing is the same as the cached listing.
+        entries is None on errors, for example when the folder does not exist.
+        """
+        key = (pid, subdir)
+        if key in self.waiting:
+            if callback:
+                self.waiting[key].append(callback)
+            return
+        self.waiting[key] = [callback] if callback else []
+
+        def on_files(entries):
+            if isinstance(entries, NetworkError):
+                entries = None
+            changed = self.put(pid, subdir, entries) or entries is None
+            for callback in self.waiting.pop(key, []):
+                callback(entries, changed)
+
+        local_path = self.local_path(pid, subdir)
+        if local_path:
+            lister = LocalDirLister(local_path)
+            self.local_listers.add(lister)
+            def on_local_files(entries):
+                lister.wait()
+                self.local_listers.discard(lister)
+                lister.deleteLater()
+                on_files(entries)
+            lister.done.connect(on_local_files)
+            lister.start()
+            return
+
+        self.client.get_package_folder_files(on_files, package_id=pid, subdir=subdir)
+
+    def prefetch_children(self, pid, subdir, entries):
+        # list child directories, so navigating into them is instant
+        num_prefetched = 0
+        for entry in entries:
+            if not is_dir_entry(entry):
+                continue
+            child_subdir = posixpath.join(subdir, entry["name"])
+            if self.get(pid, child_subdir) is not None:
+                continue
+            self.fetch(pid, child_subdir)
+            num_prefetched += 1
+            if num_prefetched >= self.max_prefetch:
+                break
@@ -0,0 +1,193 @@
+# user defined categories and tags of packages
+# pyload has no categories or tags, so they are stored locally
+# in ~/.config/pyload-qt/package_tags.json
+#
+# a package has at most one category, and any number of tags.
+# the index maps each name to a set of pids,
+# so filters and bulk actions use set operations
+# and dont look at the packages without the tag
+
+import json
+import os
+
+from . import multi_server
+from .user_dirs import config_dir
+
+CATEGORY = "category"
+TAG = "tag"
+
+
+class LabelIndex:
+    """
+    name -> set of pids, and pid -> names
+
+    the pid sets are updated in place, so filters can keep references.
+    with single=True, a pid has at most one name (categories).
+    """
+    def __init__(self, single=False):
+        self.single = single
+        self.pids = {}
+        # pid -> set of names
+        self.package_names = {}
+
+    def __len__(self):
+        return len(self.pids)
+
+    def __contains__(self, name):
+        return name in self.pids
+
+    def names(self):
+        return sorted(self.pids, key=str.lower)
+
+    def add_name(self, name):
+        return self.pids.setdefault(name, set())
+
+    def remove_name(self, name):
+        # returns the pids which had this name
+        pids = self.pids.pop(name, set())
+        for pid in pids:
+            names = self.package_names[pid]
+            names.discard(name)
+            if not names:
+                del self.package_names[pid]
+        return pids
+
+    def get_pids(self, name):
+        return self.pids.get(name, set())
+
+    def get_names(self, pid):
+        return self.package_names.get(pid, set())
+
+    def num_labeled(self):
+        return len(self.package_names)
+
+    def add(self, pids, name):
+        # returns the changed pids
+        name_pids = self.add_name(name)
+        changed = set()
+        for pid in pids:
+            if pid in name_pids:
+                continue
+            if self.single:
+                self.remove([pid])
+            name_pids.add(pid)
+            self.package_names.setdefault(pid, set()).add(name)
+            changed.add(pid)
+        return changed
+
+    def remove(self, pids, name=None):
+        # remove name, or all names, from pids
+        # returns the changed pids
+        changed = set()
+        for pid in pids:
+            names = self.package_names.get(pid)
+            if not names:
+                continue
+            for old_name in ([name] if name is not None else list(names)):
+                if old_name in names:
+                    names.discard(old_name)
+                    self.pids[old_name].discard(pid)
+                    changed.add(pid)
+            if not names:
+                del self.package_names[pid]
+        return changed
+
+
+class PackageTagStore:
+    """
+    Categories and tags of packages, with ids of the current servers.
+
+    Names are stored per server name and local pid,
+    so the namespaced ids of MultiServerClient can change between sessions.
+    Data of servers which are not connected is kept.
+
+    listeners are called with (kind, set of changed pids),
+    kind is CATEGORY or TAG.
+    """
+    def __init__(self, server_names=("",), path=None):
+        self.server_names = list(server_names)
+        self.path = path or os.path.join(config_dir(), "package_tags.json")
+        self.categories = LabelIndex(single=True)
+        self.tags = LabelIndex()
+        # server name -> json data, for servers which are not connected
+        self.other_servers = {}
+        self.listeners = []
+        self.load()
+
+    def index(self, kind):
+        return self.categories if kind == CATEGORY else self.tags
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            print(f"PackageTagStore: failed to load {self.path}: {error}")
+            return
+        servers = data.get("servers", {})
+        for server_name, server_data in servers.items():
+            if server_name not in self.server_names:
+                self.other_servers[server_name] = server_data
+        for server_index, server_name in enumerate(self.server_names):
+            server_data = servers.get(server_name, {})
+            for kind in (CATEGORY, TAG):
+                index = self.index(kind)
+                for name, local_pids in server_data.get(kind, {}).items():
+                    index.add(
+                        (multi_server.global_id(server_index, pid) for pid in local_pids), name
+                    )
+
+    def save(self):
+        servers = dict(self.other_servers)
+        for server_index, server_name in enumerate(self.server_names):
+            server_data = servers[server_name] = {}
+            for kind in (CATEGORY, TAG):
+                index = self.index(kind)
+                server_data[kind] = {
+                    # names without packages are kept
+                    name: sorted(
+                        multi_server.split_id(pid)[1]
+                        for pid in pids
+                        if multi_server.server_index(pid) == server_index
+                    )
+                    for name, pids in index.pids.items()
+                }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"servers": servers}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _changed(self, kind, pids):
+        self.save()
+        for listener in self.listeners:
+            listener(kind, pids)
+
+    def add_name(self, kind, name):
+        if name in self.index(kind):
+            return
+        self.index(kind).add_name(name)
+        self._changed(kind, set())
+
+    def remove_name(self, kind, name):
+        pids = self.index(kind).remove_name(name)
+        self._changed(kind, pids)
+
+    def add(self, kind, pids, name):
+        # set the category, or add a tag
+        changed = self.index(kind).add(pids, name)
+        self._changed(kind, changed)
+
+    def remove(self, kind, pids, name=None):
+        # remove the category, or a tag, or all tags
+        changed = self.index(kind).remove(pids, name)
+        if changed:
+            self._changed(kind, changed)
+
+    def remove_packages(self, pids):
+        # packages which were removed from the queue
+        for kind in (CATEGORY, TAG):
+            changed = self.index(kind).remove(pids)
+            if changed:
+                self._changed(kind, changed)
@@ -0,0 +1,261 @@
+# packages as tree nodes with their links as child nodes
+# links are fetched when a package node is expanded
+
+from collections import OrderedDict
+
+from PySide6.QtCore import (
+    Qt,
+    QAbstractItemModel,
+    QModelIndex,
+)
+
+from . import link_status
+
+
+class PackageTreeModel(QAbstractItemModel):
+    """
+    Top level rows are packages from get_queue_and_collector,
+    child rows are links from get_package_data.
+
+    Links are loaded with canFetchMore/fetchMore,
+    so link data is only requested for expanded packages.
+    Links of collapsed packages are dropped from the model
+    when they exceed max_collapsed_links.
+    """
+
+    column_labels = [
+        "Package",
+        "Status",
+        "Progress",
+        "Size",
+        "Plugin",
+        "Error",
+    ]
+
+    def __init__(self, package_cache, max_collapsed_links=20000, parent=None):
+        super().__init__(parent)
+        self.package_cache = package_cache
+        self.max_collapsed_links = max_collapsed_links
+        self.packages = []
+        # pid -> row
+        self.package_rows = {}
+        # pid -> list of links
+        self.package_links = {}
+        self.fetching = set()
+        # pid -> number of links, oldest collapsed package first
+        self.collapsed = OrderedDict()
+        self.num_collapsed_links = 0
+        package_cache.listeners.append(self.on_package_data)
+
+    def set_queue_data(self, queue_data):
+        pids = [package["pid"] for package in queue_data]
+        if pids == [package["pid"] for package in self.packages]:
+            # same packages: only update the package rows
+            self.packages = list(queue_data)
+            if self.packages:
+                self.dataChanged.emit(
+                    self.index(0, 0),
+                    self.index(len(self.packages) - 1, len(self.column_labels) - 1),
+                )
+            return
+        self.beginResetModel()
+        self.packages = list(queue_data)
+        self.package_rows = {pid: row for row, pid in enumerate(pids)}
+        for pid in list(self.package_links.keys()):
+            if pid not in self.package_rows:
+                self._forget_links(pid)
+        self.endResetModel()
+
+    def _forget_links(self, pid):
+        links = self.package_links.pop(pid, None)
+        if pid in self.collapsed:
+            self.num_collapsed_links -= self.collapsed.pop(pid)
+        return links
+
+    def package_index(self, pid):
+        row = self.package_rows.get(pid)
+        if row is None:
+            return QModelIndex()
+        return self.index(row, 0)
+
+    def pid_of_index(self, index):
+        if not index.isValid():
+            return None
+        if index.internalId() == 0:
+            return self.packages[index.row()]["pid"]
+        return index.internalId()
+
+    def is_package_index(self, index):
+        return index.isValid() and index.internalId() == 0
+
+    # QAbstractItemModel interface
+    # link indexes store the pid of their package as internalId
+    # package indexes have internalId 0
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        pid = self.packages[parent.row()]["pid"]
+        return self.createIndex(row, column, pid)
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        row = self.package_rows.get(index.internalId())
+        if row is None:
+            return QModelIndex()
+        return self.createIndex(row, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.packages)
+        if parent.internalId() != 0 or parent.column() != 0:
+            return 0
+        pid = self.packages[parent.row()]["pid"]
+        return len(self.package_links.get(pid, ()))
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.column_labels)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.packages) > 0
+        if parent.internalId() != 0:
+            return False
+        return self.packages[parent.row()]["linkstotal"] > 0
+
+    def canFetchMore(self, parent):
+        if not self.is_package_index(parent):
+            return False
+        pid = self.packages[parent.row()]["pid"]
+        return pid not in self.package_links and pid not in self.fetching
+
+    def fetchMore(self, parent):
+        if not self.is_package_index(parent):
+            return
+        pid = self.packages[parent.row()]["pid"]
+        self.fetching.add(pid)
+        def on_fetched(result):
+            # cached packages are returned without calling on_package_data
+            if pid in self.fetching and pid not in self.package_links and pid in result:
+                self.on_package_data(pid, result[pid])
+            self.fetching.discard(pid)
+        self.package_cache.fetch([pid], on_fetched)
+
+    def on_package_data(self, pid, package_data):
+        # called by the package cache
+        if package_data is None:
+            # removed from cache: keep the links we have
+            return
+        if pid not in self.fetching and pid not in self.package_links:
+            # package was not expanded
+            return
+        row = self.package_rows.get(pid)
+        if row is None:
+            return
+        parent = self.index(row, 0)
+        old_links = self.package_links.get(pid, [])
+        new_links = package_data["links"]
+        if len(old_links) == len(new_links):
+            self.package_links[pid] = new_links
+            if new_links:
+                self.dataChanged.emit(
+                    self.index(0, 0, parent),
+                    self.index(len(new_links) - 1, len(self.column_labels) - 1, parent),
+                )
+            return
+        if old_links:
+            self.beginRemoveRows(parent, 0, len(old_links) - 1)
+            self.package_links[pid] = []
+            self.endRemoveRows()
+        if new_links:
+            self.beginInsertRows(parent, 0, len(new_links) - 1)
+            self.package_links[pid] = new_links
+            self.endInsertRows()
+        else:
+            self.package_links[pid] = new_links
+        if pid in self.collapsed:
+            self.num_collapsed_links += len(new_links) - self.collapsed[pid]
+            self.collapsed[pid] = len(new_links)
+
+    def on_expanded(self, index):
+        pid = self.pid_of_index(index)
+        if pid in self.collapsed:
+            self.num_collapsed_links -= self.collapsed.pop(pid)
+
+    def on_collapsed(self, index):
+        pid = self.pid_of_index(index)
+        links = self.package_links.get(pid)
+        if not links:
+            return
+        if pid in self.collapsed:
+            self.num_collapsed_links -= self.collapsed.pop(pid)
+        self.collapsed[pid] = len(links)
+        self.num_collapsed_links += len(links)
+        self.evict()
+
+    def evict(self):
+        # drop links of the least recently collapsed packages
+        while self.num_collapsed_links > self.max_collapsed_links and self.collapsed:
+            pid, num_links = self.collapsed.popitem(last=False)
+            self.num_collapsed_links -= num_links
+            parent = self.package_index(pid)
+            if num_links and parent.isValid():
+                self.beginRemoveRows(parent, 0, num_links - 1)
+                self.package_links.pop(pid, None)
+                self.endRemoveRows()
+            else:
+                self.package_links.pop(pid, None)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.column_labels[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if index.internalId() == 0:
+            package = self.packages[index.row()]
+            if role == Qt.UserRole:
+                return package["pid"]
+            if role != Qt.DisplayRole:
+                return None
+            if col == 0:
+                return package["name"]
+            if col == 1:
+                return "Active" if package["queue"] else "Paused"
+            # progress and size are formatted by the item delegates of the view
+            if col == 2:
+                if package["linkstotal"] == 0:
+                    return 0.0
+                return package["linksdone"] / package["linkstotal"] * 100
+            if col == 3:
+                return package["sizetotal"]
+            return None
+        links = self.package_links.get(index.internalId())
+        if links is None or index.row() >= len(links):
+            return None
+        link = links[index.row()]
+        if role == Qt.UserRole:
+            return link["fid"]
+        if role == Qt.ToolTipRole and col == 5:
+            return link["error"]
+        if role != Qt.DisplayRole:
+            return None
+        if col == 0:
+            return link["name"]
+        if col == 1:
+            return link["statusmsg"]
+        if col == 2:
+            return 100.0 if link["status"] == link_status.FINISHED else None
+        if col == 3:
+            return link["size"]
+        if col == 4:
+            return link["plugin"]
+        if col == 5:
+            return link["error"]
+        return None
@@ -0,0 +1,280 @@
+# measure where the gui thread spends its time
+# slots of PyLoadUI and callbacks of PyLoadClient are wrapped with timers,
+# recording and cProfile can be switched on and off from the Tools menu
+
+import os
+import re
+import time
+import inspect
+import pstats
+import cProfile
+import functools
+import io
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+)
+from PySide6.QtCore import (
+    Qt,
+)
+
+from .user_dirs import cache_dir
+
+_connect_regex = re.compile(r"\.connect\(\s*self\.(\w+)\s*\)")
+
+
+def connected_slot_names(cls):
+    """
+    Names of the methods of cls which are connected to signals,
+    found as "connect(self.name)" in the source of cls.
+
+    Other methods are not wrapped: helpers like set_package_row
+    are called in loops, the wrapper would distort their timings.
+    """
+    try:
+        source = inspect.getsource(cls)
+    except (OSError, TypeError):
+        return set()
+    return set(_connect_regex.findall(source))
+
+
+def max_positional_args(func):
+    # None when func takes *args
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    if any(param.kind == param.VAR_POSITIONAL for param in params):
+        return None
+    return sum(
+        1 for param in params
+        if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD)
+    )
+
+
+class SlotStats:
+    __slots__ = ("calls", "total_time", "own_time", "max_time")
+
+    def __init__(self):
+        self.calls = 0
+        # time including nested slots
+        self.total_time = 0
+        # time without nested slots
+        self.own_time = 0
+        self.max_time = 0
+
+
+class SlotProfiler:
+    """
+    Aggregate call counts and times per slot.
+
+    Slots are wrapped once by instrument(),
+    recording can be switched on and off with set_enabled().
+    Nested slots are subtracted from own_time,
+    so the own times of all slots add up to the time spent in slots.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        # name -> SlotStats
+        self.stats = {}
+        # time of nested slots, one entry per running slot
+        self.child_time_stack = []
+        self.started = time.monotonic()
+        # recording time before the last set_enabled(False)
+        self.recorded_time = 0
+        self.cprofile = None
+
+    def reset(self):
+        self.stats = {}
+        self.started = time.monotonic()
+        self.recorded_time = 0
+
+    def set_enabled(self, enabled):
+        if enabled == self.enabled:
+            return
+        now = time.monotonic()
+        if enabled:
+            self.started = now
+        else:
+            self.recorded_time += now - self.started
+        self.enabled = enabled
+
+    def elapsed(self):
+        # seconds of recording
+        if not self.enabled:
+            return self.recorded_time
+        return self.recorded_time + time.monotonic() - self.started
+
+    def call(self, name, func, *args, **kwargs):
+        if not self.enabled:
+            return func(*args, **kwargs)
+        child_time_stack = self.child_time_stack
+        child_time_stack.append(0)
+        t1 = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - t1
+            child_time = child_time_stack.pop()
+            if child_time_stack:
+                child_time_stack[-1] += duration
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = SlotStats()
+            stats.calls += 1
+            stats.total_time += duration
+            stats.own_time += duration - child_time
+            if duration > stats.max_time:
+                stats.max_time = duration
+
+    def wrap(self, name, func):
+        # Qt drops signal arguments which a slot does not accept,
+        # but passes all of them to a wrapper with *args
+        num_args = max_positional_args(func)
+        @functools.wraps(func)
+        def profiled_slot(*args, **kwargs):
+            if num_args is not None:
+                args = args[:num_args]
+            return self.call(name, func, *args, **kwargs)
+        return profiled_slot
+
+    def instrument(self, obj, names=None):
+        """
+        Wrap the slots of obj, see connected_slot_names.
+
+        This must be called before the methods are connected to signals,
+        because connect() stores the bound method.
+        """
+        cls = type(obj)
+        if names is None:
+            names = connected_slot_names(cls)
+        for name in names:
+            value = getattr(cls, name, None)
+            if not callable(value) or isinstance(value, type):
+                continue
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def start_cprofile(self):
+        if self.cprofile:
+            return
+        self.cprofile = cProfile.Profile()
+        # only the calling thread is profiled, so call this on the gui thread
+        self.cprofile.enable()
+
+    def stop_cprofile(self, num_lines=30):
+        """
+        Stop cProfile and write the stats to a file in the cache dir.
+
+        Returns (path, text) where text has the top functions by cumulative time.
+        """
+        if not self.cprofile:
+            return None, ""
+        self.cprofile.disable()
+        profile_dir = os.path.join(cache_dir(), "profiles")
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, time.strftime("pyload-qt-%Y%m%d-%H%M%S.prof"))
+        self.cprofile.dump_stats(path)
+        stream = io.StringIO()
+        stats = pstats.Stats(self.cprofile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(num_lines)
+        self.cprofile = None
+        return path, stream.getvalue()
+
+    def summary(self, num_slots=20):
+        elapsed = self.elapsed()
+        items = sorted(self.stats.items(), key=lambda item: -item[1].own_time)
+        own_time = sum(stats.own_time for _name, stats in items)
+        lines = [f"{own_time:.1f} seconds in slots during {elapsed:.0f} seconds"]
+        for name, stats in items[:num_slots]:
+            lines.append(
+                f"  {(stats.own_time * 1000):.0f} ms own, {(stats.total_time * 1000):.0f} ms total, "
+                f"{stats.calls} calls, {(stats.max_time * 1000):.0f} ms max: {name}"
+            )
+        return "\n".join(lines)
+
+
+class NumberItem(QTableWidgetItem):
+    # sort by number, show with fixed precision
+    def __init__(self, value, fmt="{:.1f}"):
+        super().__init__(fmt.format(value))
+        self.value = value
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        return self.value < other.value
+
+
+class SlotTimingsDialog(QDialog):
+    """
+    Table of slot timings from SlotProfiler.
+
+    - parent_pyload_ui: instance of PyLoadUI (main window)
+    """
+    def __init__(self, parent_pyload_ui):
+        super().__init__(parent=parent_pyload_ui)
+        self.pyload_ui = parent_pyload_ui
+        self.profiler = self.pyload_ui.profiler
+        self.setWindowTitle("Slot Timings")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 500)
+        self._init_ui()
+        self.populate_table()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(
+            ["Slot", "Calls", "Own ms", "Total ms", "Mean ms", "Max ms"]
+        )
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("Refresh")
+        self.reset_btn = QPushButton("Reset")
+        self.reset_btn.setToolTip("Clear all timings")
+        self.close_btn = QPushButton("Close")
+        self.refresh_btn.clicked.connect(self.populate_table)
+        self.reset_btn.clicked.connect(self.reset)
+        self.close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(self.refresh_btn)
+        btn_layout.addWidget(self.reset_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+    def reset(self):
+        self.profiler.reset()
+        self.populate_table()
+
+    def populate_table(self):
+        stats_items = list(self.profiler.stats.items())
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(stats_items))
+        for row, (name, stats) in enumerate(stats_items):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, NumberItem(stats.calls, "{}"))
+            self.table.setItem(row, 2, NumberItem(stats.own_time * 1000))
+            self.table.setItem(row, 3, NumberItem(stats.total_time * 1000))
+            self.table.setItem(row, 4, NumberItem(stats.total_time * 1000 / stats.calls))
+            self.table.setItem(row, 5, NumberItem(stats.max_time * 1000))
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(2, Qt.DescendingOrder)
+        state = "recording" if self.profiler.enabled else "paused"
+        self.status_label.setText(f"{len(stats_items)} slots, {state}")
@@ -8,6 +8,10 @@ import re
 import subprocess
 import urllib.parse
 import datetime
+import posixpath
+import argparse
+import time
+from collections import Counter
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -33,10 +37,18 @@ from PySide6.QtWidgets import (
     QButtonGroup,
     QStackedWidget,
     QSizePolicy,
+    QProgressDialog,
+    QSpinBox,
+    QCheckBox,
+    QFileDialog,
+    QTreeView,
+    QFrame,
+    QInputDialog,
 )
-from PySide6.QtCore import Qt, QUrl
+from PySide6.QtCore import Qt
 from PySide6.QtCore import QTimer
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PySide6.QtCore import QFileSystemWatcher
+from PySide6.QtNetwork import QNetworkReply
 from PySide6.QtGui import QIcon, QScreen
 from PySide6.QtGui import QAction, QKeySequence
 from PySide6.QtGui import QFont
@@ -48,21 +60,148 @@ NetworkError = QNetworkReply.NetworkError
 
 from . import transferlistfilterswidget
 from . import app_settings
-
+from . import error_groups
+from . import link_import
+from . import package_files_cache
+from . import link_status
+from . import storage_scanner
+from . import integrity_check
+from . import watchdog
+from . import profiler
+from . import memory_tracker
+from . import api_recording
+from . import api
+from . import transports
+from . import network_stats
+from . import server_profiles
+from . import multi_server
+from . import hoster_index
+from . import package_tags
+from .batch_job import BatchJob
+from .item_delegates import SizeDelegate, ProgressBarDelegate
+from . import package_cache
+from .package_cache import PackageDataCache
+from .record_store import RecordStore, Change
+from .link_index import LinkIndex
+from .package_tree_model import PackageTreeModel
+from .row_filter import RowFilter
+
+
+
+def package_progress(package):
+    # fraction of finished links
+    if package["sizetotal"] > 0:
+        return package["linksdone"] / package["linkstotal"]
+    return 0
 
 
 class PyLoadClient:
-    def __init__(self):
-        self.manager = QNetworkAccessManager()
-        # FIXME by default, the pyload server runs with ipv6
-        # but with webui.develop=True in ~/.pyload/settings/pyload.cfg it runs with ipv4
-        self.base_url = "http://localhost:8000" # ipv4: login fails with NetworkError.ConnectionRefusedError
-        self.base_url = "http://127.0.0.1:8000" # ipv4: login fails with NetworkError.ConnectionRefusedError
-        self.base_url = "http://[::1]:8000" # ipv6
-        self.is_localhost = True
+    """
+    Call the pyload api with client.name(callback, *args, **kwargs).
+
+    The request is sent by the transport,
+    the callback is called with the result,
+    or with a QNetworkReply.NetworkError.
+    See api.PyLoadApi for the awaitable interface.
+    """
+    def __init__(self, transport=None, profile=None):
+        # see transports.py and api_recording.py
+        self.transport = transport or transports.default_transport()
+        # see server_profiles.py
+        self.profile = profile or server_profiles.default_profile()
+        # the url which answers first is set on login
+        self.base_url = self.profile.urls[0]
+        self.is_localhost = self.profile.is_localhost
+        # api key or basic auth
+        self.auth_headers = self.profile.auth_headers()
         self.session_cookie = None
         self.csrf_token = None
         self.func_cache = {}
+        # SlotProfiler, see --profile
+        self.profiler = None
+        # client.background.name(callback, ...) sends requests with a lower priority
+        self.polling = PriorityClient(self, api.PRIORITY_POLLING)
+        self.background = PriorityClient(self, api.PRIORITY_BACKGROUND)
+
+    @property
+    def manager(self):
+        # QNetworkAccessManager of QtTransport, or None
+        return getattr(self.transport, "manager", None)
+
+    @property
+    def clients(self):
+        # clients of the servers, see MultiServerClient
+        return (self,)
+
+    def server_name(self, id):
+        return self.profile.name
+
+    def run_callback(self, name, callback, result):
+        if self.profiler:
+            self.profiler.call(f"client.{name} callback", callback, result)
+        else:
+            callback(result)
+
+    def handle_result(self, name, callback, error, body):
+        if error == QNetworkReply.NoError:
+            data = None
+            if name == "_get_csrf_token":
+                # if body.startswith("<!DOCTYPE html>"):
+                regex = r'<meta name="csrf-token" content="([^"]+)"'
+                match = re.search(regex, body)
+                if match:
+                    data = match.group(1)
+                    self.csrf_token = data
+            elif name == "login":
+                # data = not ("<title>Login - pyLoad" in body)
+                data = ("<title>pyLoad - Dashboard</title>" in body)
+            else:
+                data = json.loads(body)
+            if callback: self.run_callback(name, callback, data)
+        else:
+            # TODO also print response body with the server exception
+            error_message = f": {body}" if body else ""
+            print(f"{name} reply.error: {error}{error_message}")
+            # consumers should check the result with
+            # isinstance(result, QNetworkReply.NetworkError)
+            if callback: self.run_callback(name, callback, error)
+
+    def build_request(self, name, args, kwargs, priority=api.PRIORITY_INTERACTIVE):
+        endpoint = api.get_endpoint(name)
+        url = f"{self.base_url}/{endpoint.path}"
+        if args:
+            url += "/" + ",".join(map(str, args))
+        # send csrf_token with all requests
+        if self.csrf_token and not "csrf_token" in kwargs:
+            kwargs["csrf_token"] = self.csrf_token
+        body = None
+        if kwargs and endpoint.method == "GET":
+            kwargs_json = dict()
+            for key, val in kwargs.items():
+                kwargs_json[key] = json.dumps(val, separators=(",", ":"))
+            url += "?" + urllib.parse.urlencode(kwargs_json)
+        elif kwargs:
+            # send lists as json like in GET requests
+            # str(list) would produce single quotes
+            post_kwargs = dict()
+            for key, val in kwargs.items():
+                if not isinstance(val, str):
+                    val = json.dumps(val, separators=(",", ":"))
+                post_kwargs[key] = val
+            body = urllib.parse.urlencode(post_kwargs).encode()
+        # print(f"client.{name}: url = {url!r}")
+        headers = dict(self.auth_headers)
+        if self.session_cookie:
+            headers[b"Cookie"] = self.session_cookie.encode()
+        return api.ApiRequest(
+            name, endpoint.method, url, args, kwargs, body, headers, priority, endpoint.timeout
+        )
+
+    def call(self, name, callback, args, kwargs, priority=api.PRIORITY_INTERACTIVE):
+        request = self.build_request(name, args, kwargs, priority)
+        self.transport.send(
+            request, lambda error, body: self.handle_result(name, callback, error, body)
+        )
 
     # https://stackoverflow.com/questions/13194180/dynamic-method-generation-in-python
     def __getattr__(self, name):
@@ -72,102 +211,204 @@ class PyLoadClient:
         except KeyError:
             pass
         # print(f"creating function {name}")
-        # def func(self, *args, **kwargs, callback): # ?
-        # def func(self, *args, callback=None, **kwargs): # ?
-        # def func(*args, callback=None, **kwargs): # ?
-        # def func(self, callback, *args, **kwargs):
         def func(callback, *args, **kwargs):
-            if name in ("status", "links"):
-                api_dir = "json"
-            elif name in ("login", "logout"):
-                # https://github.com/pyload/pyload/commit/adf33b94e8f4f366e0538c0f9cba95be842c071f
-                # deprecate /api/login and /api/logout endpoints
-                api_dir = ""
+            self.call(name, callback, args, kwargs)
+        func.__name__ = name
+        self.func_cache[name] = func
+        return func
+
+
+class PriorityClient:
+    """
+    Same as PyLoadClient, but requests are sent with another priority.
+    """
+    def __init__(self, client, priority):
+        self.client = client
+        self.priority = priority
+        self.func_cache = {}
+
+    def __getattr__(self, name):
+        try:
+            return self.func_cache[name]
+        except KeyError:
+            pass
+        def func(callback, *args, **kwargs):
+            self.client.call(name, callback, args, kwargs, self.priority)
+        func.__name__ = name
+        self.func_cache[name] = func
+        return func
+
+
+class MultiServerClient:
+    """
+    Same interface as PyLoadClient, for several pyload servers.
+
+    Each server has its own PyLoadClient with its own transport,
+    so every server has its own connection pool and circuit breaker.
+    Ids in arguments and results are namespaced per server (see multi_server.py):
+    calls with ids are sent to the servers of the ids,
+    calls without ids are sent to all servers or to the first server.
+    The callback is called once, with the merged results.
+
+    Polled calls (queue, status, links) are not sent again to a server
+    which has not answered the previous poll,
+    and wait at most merge_wait seconds for slow servers.
+    Slow and failing servers contribute their last result.
+    """
+    def __init__(self, clients, merge_wait=2.0):
+        self.clients = clients
+        self.merge_wait = merge_wait
+        # (name, server index) -> last namespaced result of a polled call
+        self.last_results = {}
+        # (name, server index) of polled calls without answer
+        self.in_flight = set()
+        self.func_cache = {}
+        self.polling = PriorityClient(self, api.PRIORITY_POLLING)
+        self.background = PriorityClient(self, api.PRIORITY_BACKGROUND)
+
+    @property
+    def transport(self):
+        # transport of the first server, for statistics
+        return self.clients[0].transport
+
+    @property
+    def manager(self):
+        return self.clients[0].manager
+
+    @property
+    def profile(self):
+        return self.clients[0].profile
+
+    @property
+    def is_localhost(self):
+        # the local folders of namespaced packages are not known
+        return False
+
+    @property
+    def profiler(self):
+        return self.clients[0].profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        for client in self.clients:
+            client.profiler = profiler
+
+    def server_name(self, id):
+        index = multi_server.server_index(id)
+        if index < len(self.clients):
+            return self.clients[index].profile.name
+        return None
+
+    def call(self, name, callback, args, kwargs, priority=api.PRIORITY_INTERACTIVE):
+        parts = multi_server.split_ids_by_server(name, args, kwargs)
+        if parts is None:
+            if name in multi_server.POLLED_CALLS:
+                self.poll(name, callback, priority)
+                return
+            if name in multi_server.FAN_OUT_CALLS:
+                parts = {index: (args, kwargs) for index in range(len(self.clients))}
             else:
-                api_dir = "api"
-            post_methods = (
-                "login",
-                "push_to_queue",
-                "pull_from_queue",
-                "restart_failed",
-                "delete_packages",
-            )
-            if name in post_methods:
-                # method = "post"
-                is_get = False
+                parts = {0: (args, kwargs)}
+        results = {}
+        errors = []
+
+        def on_part(index, result):
+            if isinstance(result, NetworkError):
+                errors.append(result)
             else:
-                # method = "get"
-                is_get = True
-            url = f"{self.base_url}/{os.path.join(api_dir, name)}"
-            is_get_csrf_token = False
-            is_login = False
-            if name == "_get_csrf_token":
-                is_get_csrf_token = True
-                is_get = True
-                url = f"{self.base_url}/login"
-            elif name == "login":
-                is_login = True
-            if args:
-                url += "/" + ",".join(map(str, args))
-            # send csrf_token with all requests
-            if self.csrf_token and not "csrf_token" in kwargs:
-                kwargs["csrf_token"] = self.csrf_token
-            if kwargs and is_get:
-                kwargs_json = dict()
-                for key, val in kwargs.items():
-                    kwargs_json[key] = json.dumps(val, separators=(",", ":"))
-                url += "?" + urllib.parse.urlencode(kwargs_json)
-            elif kwargs and not is_get:
-                post_data = urllib.parse.urlencode(kwargs).encode()
-            # print(f"client.{name}: url = {url!r}")
-            request = QNetworkRequest(QUrl(url))
-            if self.session_cookie:
-                request.setRawHeader(b"Cookie", self.session_cookie.encode())
-            if is_get:
-                reply = self.manager.get(request)
+                results[index] = multi_server.namespace_ids(result, index)
+            if len(results) + len(errors) < len(parts):
+                return
+            if callback is None:
+                return
+            if errors:
+                # the callers refresh the queue to show the partial result
+                callback(errors[0])
+                return
+            callback(multi_server.merge_results(results[index] for index in sorted(results)))
+
+        for index, (part_args, part_kwargs) in parts.items():
+            if index >= len(self.clients):
+                print(f"{name}: no server for ids of server {index}")
+                on_part(index, NetworkError.ContentNotFoundError)
+                continue
+            self.clients[index].call(
+                name, lambda result, index=index: on_part(index, result),
+                part_args, dict(part_kwargs), priority,
+            )
+
+    def poll(self, name, callback, priority):
+        pending = set()
+        errors = []
+        delivered = False
+        waiting = False
+
+        def deliver():
+            nonlocal delivered
+            if delivered:
+                return
+            delivered = True
+            results = [
+                self.last_results[(name, index)]
+                for index in range(len(self.clients))
+                if (name, index) in self.last_results
+            ]
+            if not results:
+                callback(errors[0] if errors else NetworkError.TimeoutError)
+                return
+            callback(multi_server.merge_results(results))
+
+        def on_part(index, result):
+            nonlocal waiting
+            self.in_flight.discard((name, index))
+            pending.discard(index)
+            if isinstance(result, NetworkError):
+                errors.append(result)
             else:
-                request.setHeader(
-                    QNetworkRequest.ContentTypeHeader, "application/x-www-form-urlencoded"
-                )
-                reply = self.manager.post(request, post_data)
-            def handle_reply():
-                if reply.error() == QNetworkReply.NoError:
-                    data_str = reply.readAll().data().decode()
-                    data = None
-                    if is_get_csrf_token:
-                        # if data_str.startswith("<!DOCTYPE html>"):
-                        regex = r'<meta name="csrf-token" content="([^"]+)"'
-                        match = re.search(regex, data_str)
-                        if match:
-                            data = match.group(1)
-                            self.csrf_token = data
-                    elif is_login:
-                        # data = not ("<title>Login - pyLoad" in data_str)
-                        data = ("<title>pyLoad - Dashboard</title>" in data_str)
-                    else:
-                        data = json.loads(data_str)
-                    if callback: callback(data)
-                else:
-                    # TODO also print response body with the server exception
-                    error_message = reply.readAll().data().decode()
-                    if error_message:
-                        error_message = f": {error_message}"
-                    print(f"{name} reply.error: {reply.error()}{error_message}")
-                    # consumers should check the result with
-                    # isinstance(result, QNetworkReply.NetworkError)
-                    if callback: callback(reply.error())
-                reply.deleteLater()
-            reply.finished.connect(handle_reply)
+                self.last_results[(name, index)] = multi_server.namespace_ids(result, index)
+            if not pending:
+                deliver()
+            elif not waiting:
+                # first answer: wait a bit for the other servers
+                waiting = True
+                QTimer.singleShot(int(self.merge_wait * 1000), deliver)
+
+        for index, client in enumerate(self.clients):
+            key = (name, index)
+            if key in self.in_flight:
+                continue
+            self.in_flight.add(key)
+            pending.add(index)
+        for index in list(pending):
+            self.clients[index].call(
+                name, lambda result, index=index: on_part(index, result), (), {}, priority
+            )
+        if not pending:
+            # all servers are busy with the previous poll
+            QTimer.singleShot(0, deliver)
+
+    def __getattr__(self, name):
+        try:
+            return self.func_cache[name]
+        except KeyError:
+            pass
+        def func(callback, *args, **kwargs):
+            self.call(name, callback, args, kwargs)
         func.__name__ = name
         self.func_cache[name] = func
         return func
 
 
 class AddPackageDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, link_index=None, num_packages=0):
         super().__init__(parent)
         self.setWindowTitle("Add Package")
         self.setModal(True)
+        self.link_index = link_index
+        self.num_packages = num_packages
+        self.file_paths = []
+        self.links = []
+        self.link_extractor = None
         self.init_ui()
 
     def init_ui(self):
@@ -185,6 +426,27 @@ class AddPackageDialog(QDialog):
         self.links_input = QPlainTextEdit()
         layout.addWidget(self.links_input)
 
+        # Link files
+        files_layout = QHBoxLayout()
+        self.files_label = QLabel("")
+        files_layout.addWidget(self.files_label, 1)
+        self.add_files_button = QPushButton("Add Link Files...")
+        self.add_files_button.clicked.connect(self.select_link_files)
+        files_layout.addWidget(self.add_files_button)
+        layout.addLayout(files_layout)
+
+        # Split options
+        split_layout = QHBoxLayout()
+        split_layout.addWidget(QLabel("Max links per package:"))
+        self.max_links_input = QSpinBox()
+        self.max_links_input.setRange(0, 1000000)
+        self.max_links_input.setSpecialValueText("no limit")
+        split_layout.addWidget(self.max_links_input)
+        self.split_by_hoster_input = QCheckBox("Split by hoster")
+        split_layout.addWidget(self.split_by_hoster_input)
+        split_layout.addStretch()
+        layout.addLayout(split_layout)
+
         # Package password
         password_layout = QHBoxLayout()
         password_layout.addWidget(QLabel("Password:"))
@@ -194,18 +456,90 @@ class AddPackageDialog(QDialog):
 
         # Buttons
         button_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        button_layout.addWidget(self.status_label, 1)
         self.add_button = QPushButton("Add Package")
-        self.add_button.clicked.connect(self.accept)
+        self.add_button.clicked.connect(self.extract_links)
         button_layout.addWidget(self.add_button)
         layout.addLayout(button_layout)
 
+    def select_link_files(self):
+        file_paths, _filter = QFileDialog.getOpenFileNames(self, "Select link files")
+        if not file_paths:
+            return
+        self.file_paths += file_paths
+        self.files_label.setText("Files: " + ", ".join(map(os.path.basename, self.file_paths)))
+
+    def extract_links(self):
+        # extract links in a worker thread
+        # so pasting 100k links does not freeze the dialog
+        self.add_button.setEnabled(False)
+        self.status_label.setText("Extracting links...")
+        self.link_extractor = link_import.LinkExtractor(
+            self.links_input.toPlainText(),
+            self.file_paths,
+            parent=self,
+        )
+        self.link_extractor.progress.connect(
+            lambda num_links: self.status_label.setText(f"Extracting links... {num_links}")
+        )
+        self.link_extractor.done.connect(self.on_links_extracted)
+        self.link_extractor.start()
+
+    def on_links_extracted(self, links, num_duplicates):
+        self.link_extractor.wait()
+        for error in self.link_extractor.errors:
+            print(f"AddPackageDialog: {error}")
+        self.link_extractor = None
+        self.links = links
+        print(f"AddPackageDialog: found {len(links)} links, ignored {num_duplicates} duplicates")
+        if self.link_index and not self.skip_queued_links():
+            self.add_button.setEnabled(True)
+            self.status_label.setText("")
+            return
+        self.accept()
+
+    def skip_queued_links(self):
+        # check links against all links in the queue
+        queued_links, finished_links = self.link_index.find_duplicates(self.links)
+        if not queued_links and not finished_links:
+            return True
+        text = (
+            f"{len(queued_links)} of {len(self.links)} links are already queued.\n"
+            f"{len(finished_links)} of {len(self.links)} links are already finished.\n"
+        )
+        num_indexed = self.link_index.num_indexed_packages()
+        if num_indexed < self.num_packages:
+            text += f"\nOnly {num_indexed} of {self.num_packages} packages were checked.\n"
+        text += "\nSkip these links?"
+        reply = QMessageBox.question(
+            self,
+            "Duplicate Links",
+            text,
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+            QMessageBox.Yes
+        )
+        if reply == QMessageBox.Cancel:
+            return False
+        if reply == QMessageBox.Yes:
+            skip_links = set(queued_links)
+            skip_links.update(finished_links)
+            self.links = [link for link in self.links if link not in skip_links]
+        return True
+
+    def reject(self):
+        if self.link_extractor:
+            self.link_extractor.requestInterruption()
+            self.link_extractor.wait()
+        super().reject()
+
     def get_package_data(self):
         name = self.package_name_input.text().strip()
-        links_text = self.links_input.toPlainText().strip()
-        url_pattern = re.compile(r'https?://[^\s<>"]+|www\.[^\s<>"]+')
-        links = url_pattern.findall(links_text)
         password = self.package_password_input.text().strip()
-        return name, links, password
+        return name, self.links, password
+
+    def get_split_options(self):
+        return self.max_links_input.value(), self.split_by_hoster_input.isChecked()
 
 
 # https://stackoverflow.com/a/2304495/10440128
@@ -277,11 +611,83 @@ class RotateLabel(QLabel):
 
 
 class PyLoadUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, client=None, profile=False):
         super().__init__()
-        self.client = PyLoadClient()
+        self.client = client or PyLoadClient()
+        # awaitable interface of the client, for multi-step flows
+        self.api = api.PyLoadApi(self.client)
+        # SlotProfiler, recording is started by --profile or Tools > Profiling
+        # slots are wrapped before they are connected to signals
+        self.profiler = profiler.SlotProfiler(enabled=profile)
+        self.profiler.instrument(self)
+        self.client.profiler = self.profiler
         self.current_package = None
+        self.config = None
+        # EventLoopWatchdog, see --watchdog
+        self.watchdog = None
+        # samples are recorded after start(), see --track-memory
+        self.memory_tracker = memory_tracker.MemoryTracker(self)
+        self.queue_data_cache = None
+        # queue data as PackageRecord objects
+        # views are updated from the change events of the store
+        self.record_store = RecordStore()
+        self.record_store.listeners.append(self.on_queue_changed)
+        # pid -> last package data from get_package_data
+        self.package_cache = PackageDataCache(self.client, store=self.record_store)
+        self.package_cache.listeners.append(self.on_package_data_changed)
+        self.package_cache.link_listeners.append(self.on_links_changed)
+        # pid -> position item of the package row
+        self.package_row_items = {}
+        # server index -> number of packages, for the sidebar
+        self.server_package_counts = Counter()
+        # pid of the package in the Links view
+        self.package_links_pid = None
+        self.error_groups = error_groups.ErrorGroupIndex()
+        self.package_cache.listeners.append(self.error_groups.on_package_data)
+        # links per hoster, for the sidebar
+        self.hoster_index = hoster_index.HosterIndex()
+        self.package_cache.listeners.append(self.hoster_index.on_package_data)
+        self.hoster_index.listeners.append(self.on_hosters_changed)
+        # plugin of the hoster filter, or ""
+        self.hoster_filter = ""
+        # fid -> link of the Downloads view
+        self.download_links = {}
+        self.link_index = LinkIndex(self.package_cache)
+        # local categories and tags, for the sidebar and the context menu
+        self.package_tags = package_tags.PackageTagStore(
+            [client.profile.name for client in self.client.clients]
+        )
+        self.package_tags.listeners.append(self.on_package_tags_changed)
+        self.package_files_cache = package_files_cache.PackageFilesCache(self.client)
+        self.package_files_cache.get_local_folder = self.get_local_package_folder
+        # watch the local package folder for changes (inotify on linux)
+        # instead of polling the Files view
+        self.package_files_watcher = QFileSystemWatcher(self)
+        self.package_files_watcher_key = None
+        # False when only the directory is watched, see watch_package_files
+        self.package_files_watcher_has_files = False
+        # throttle, not debounce: a growing download changes its file
+        # all the time, so a restarted timer would never fire
+        self.package_files_watcher_throttle = QTimer(self)
+        self.package_files_watcher_throttle.setInterval(500)
+        self.package_files_watcher_throttle.setSingleShot(True)
+        self.package_files_watcher_throttle.timeout.connect(self.update_package_files_view)
+        self.package_files_watcher.directoryChanged.connect(self.on_package_files_watcher_event)
+        self.package_files_watcher.fileChanged.connect(self.on_package_files_watcher_event)
+        # (pid, subdir) of the Files view
+        self.package_files_view_key = None
+        self.package_files_view_entries = {}
+        # pauses polling while the server is failing
+        # with several servers, each server has its own circuit breaker
+        # and the other servers are still polled
+        self.circuit_breaker = None
+        if len(self.client.clients) == 1:
+            self.circuit_breaker = transports.find_transport(
+                self.client.transport, transports.CircuitBreakerTransport
+            )
         self.init_ui()
+        if self.circuit_breaker:
+            self.circuit_breaker.listeners.append(self.on_circuit_breaker_changed)
         self.login()
         self.refresh_interval = 5 # refresh every 5 seconds
         self.init_refresh_timer()
@@ -312,6 +718,14 @@ class PyLoadUI(QMainWindow):
         self.main_widget = self.create_main_widget()
         self.packages_table.set_status_filter = lambda id: print("main_widget.set_status_filter", id)
         self.packages_table.set_status_filter = self.packages_table_set_status_filter
+        self.packages_table.set_server_filter = self.packages_table_set_server_filter
+        self.packages_table.set_hoster_filter = self.set_hoster_filter
+        self.packages_table.index_hosters = self.index_hosters
+        self.packages_table.set_category_filter = self.set_category_filter
+        self.packages_table.set_tag_filter = self.set_tag_filter
+        self.packages_table.start_visible_packages = self.start_visible_packages
+        self.packages_table.pause_visible_packages = self.pause_visible_packages
+        self.packages_table.remove_visible_packages = self.remove_visible_packages
         # we need self.packages_table for self.sidebar_widget
         self.sidebar_widget = self.create_sidebar_widget()
 
@@ -324,44 +738,92 @@ class PyLoadUI(QMainWindow):
         # splitter.setStretchFactor(1, 1)
 
     def packages_table_set_status_filter(self, status_id):
-        table = self.packages_table
         max_status_id = 5
         if not (0 <= status_id <= max_status_id):
             raise ValueError(f"bad status_id {status_id}")
-        # FIXME this conflicts with on_package_filter_change
-        if status_id == 0: # all
-            for row_idx in range(table.rowCount()):
-                table.setRowHidden(row_idx, False)
+        self.set_package_filter("status", self.package_status_filters.get(status_id))
+
+    # status filters of the sidebar, 0 is all
+    package_status_filters = {
+        # active aka "pyload queue"
+        1: lambda package: bool(package["queue"]),
+        # paused aka "pyload collector"
+        2: lambda package: not package["queue"],
+        # complete
+        3: lambda package: package_progress(package) >= 1,
+        # partial
+        4: lambda package: package_progress(package) not in (0, 1),
+        # empty
+        5: lambda package: package_progress(package) <= 0,
+    }
+
+    def packages_table_set_server_filter(self, server_index):
+        predicate = None
+        if server_index >= 0:
+            predicate = lambda package: multi_server.server_index(package["pid"]) == server_index
+        self.set_package_filter("server", predicate)
+
+    def set_package_filter(self, name, predicate):
+        # predicate(package record), None removes the filter
+        self.packages_filter.set(name, predicate)
+
+    def set_hoster_filter(self, plugin):
+        # filter the packages and the Downloads view
+        self.hoster_filter = plugin
+        if not plugin:
+            self.packages_filter.set_keys("hoster", None)
+            self.downloads_filter.set("hoster", None)
+            return
+        # the index updates this set in place
+        self.packages_filter.set_keys("hoster", self.hoster_index.package_ids(plugin))
+        self.downloads_filter.set("hoster", lambda link: link["plugin"] == plugin)
+
+    def on_hosters_changed(self, pid, plugins):
+        # called by the hoster index
+        if self.hoster_filter in plugins:
+            self.packages_filter.apply([pid])
+
+    def index_hosters(self):
+        # the hoster index needs the package data of all packages
+        if self.queue_data_cache:
+            self.link_index.crawl(self.queue_data_cache)
         else:
-            for row_idx in range(table.rowCount()):
-                package_queue_col_idx = 2 # Status: Queue or Collector
-                package_progress_col_idx = 3 # Progress
-                hidden = False
-                if status_id in (1, 2):
-                    package_queue_item = table.item(row_idx, package_queue_col_idx)
-                    if package_queue_item is None:
-                        continue
-                    package_queue = package_queue_item.data(Qt.UserRole)
-                    if status_id == 1: # active aka "pyload queue"
-                        hidden = not(package_queue)
-                    elif status_id == 2: # paused aka "pyload collector"
-                        hidden = package_queue
-                if status_id in (3, 4, 5):
-                    package_progress_item = table.item(row_idx, package_progress_col_idx)
-                    if package_progress_item is None:
-                        continue
-                    package_progress = package_progress_item.data(Qt.UserRole)
-                    if status_id == 3: # complete
-                        hidden = (package_progress < 1)
-                    elif status_id == 4: # partial
-                        hidden = (package_progress in (0, 1))
-                    elif status_id == 5: # empty
-                        hidden = (package_progress > 0)
-                table.setRowHidden(row_idx, hidden)
+            # crawl after the first refresh
+            self.link_index.is_crawling = True
+
+    def set_category_filter(self, name):
+        self.set_label_filter(package_tags.CATEGORY, name)
+
+    def set_tag_filter(self, name):
+        self.set_label_filter(package_tags.TAG, name)
+
+    def set_label_filter(self, kind, name):
+        # name None: all packages, "": packages without category or tags
+        index = self.package_tags.index(kind)
+        if name is None:
+            self.packages_filter.set(kind, None)
+            self.packages_filter.set_keys(kind, None)
+        elif name == "":
+            self.packages_filter.set_keys(kind, None)
+            labeled = index.package_names
+            self.packages_filter.set(kind, lambda package: package["pid"] not in labeled)
+        else:
+            self.packages_filter.set(kind, None)
+            # the index updates this set in place
+            self.packages_filter.set_keys(kind, index.get_pids(name))
+
+    def on_package_tags_changed(self, kind, pids):
+        # called by the tag store
+        if kind in self.packages_filter:
+            self.packages_filter.apply(pids)
 
     def create_sidebar_widget(self):
         # https://github.com/qbittorrent/qBittorrent/blob/master/src/gui/transferlistfilterswidget.cpp
-        return transferlistfilterswidget.TransferListFiltersWidget(self, self.packages_table)
+        server_names = [client.profile.name for client in self.client.clients]
+        return transferlistfilterswidget.TransferListFiltersWidget(
+            self, self.packages_table, serverNames=server_names, hosterIndex=self.hoster_index,
+            tagStore=self.package_tags,
+        )
 
     def create_main_widget(self):
         # Main widget and layout
@@ -374,9 +836,19 @@ class PyLoadUI(QMainWindow):
         self.create_toolbar()
 
         self.packages_table = self.create_packages_table()
+        self.packages_tree = self.create_packages_tree()
+
+        # table or tree
+        self.packages_stack = QStackedWidget()
+        self.packages_stack.addWidget(self.packages_table)
+        self.packages_stack.addWidget(self.packages_tree)
 
         self.package_links_table = None
 
+        # shown while the server is not responding
+        self.server_banner = self.create_server_banner()
+        main_layout.addWidget(self.server_banner)
+
         # Splitter for tables
         splitter = QSplitter(Qt.Vertical)
 
@@ -396,7 +868,7 @@ class PyLoadUI(QMainWindow):
         self.create_bottom_view_button_group(main_layout)
         self.bottom_view = self.create_bottom_view()
 
-        splitter.addWidget(self.packages_table)
+        splitter.addWidget(self.packages_stack)
         splitter.addWidget(self.bottom_view)
         splitter.setSizes([300, 200])
 
@@ -420,6 +892,61 @@ class PyLoadUI(QMainWindow):
         quit_action.triggered.connect(self.close)
         quit_action.setShortcut(QKeySequence.Quit) # shortcut: Ctrl+Q
 
+        view_menu = self.menu.addMenu("&View") # shortcut: Alt+V
+
+        self.tree_view_action = view_menu.addAction("Package Tree")
+        self.tree_view_action.setCheckable(True)
+        self.tree_view_action.setToolTip("Show links as child nodes of packages")
+        self.tree_view_action.toggled.connect(self.set_tree_mode)
+
+        self.tools_menu = tools_menu = self.menu.addMenu("&Tools") # shortcut: Alt+T
+
+        error_groups_action = tools_menu.addAction("Failed Link Errors")
+        error_groups_action.triggered.connect(self.show_error_groups)
+
+        storage_usage_action = tools_menu.addAction("Storage Usage")
+        storage_usage_action.setToolTip("Find orphaned and large folders in the storage folder")
+        storage_usage_action.triggered.connect(self.show_storage_usage)
+
+        verify_files_action = tools_menu.addAction("Verify Finished Files")
+        verify_files_action.setToolTip("Check sizes and checksums of all finished files")
+        verify_files_action.triggered.connect(lambda: self.show_integrity_check(all_packages=True))
+
+        store_memory_action = tools_menu.addAction("Data Store Memory")
+        store_memory_action.triggered.connect(self.show_store_memory)
+
+        memory_tracking_action = tools_menu.addAction("Memory Tracking")
+        memory_tracking_action.setToolTip("Show the growth of memory and Qt objects over time")
+        memory_tracking_action.triggered.connect(self.show_memory_tracking)
+
+        network_stats_action = tools_menu.addAction("Network Statistics")
+        network_stats_action.setToolTip("Show bytes on the wire and decoded bytes per api endpoint")
+        network_stats_action.triggered.connect(self.show_network_stats)
+
+        self.create_profiling_menu(tools_menu)
+
+    def create_profiling_menu(self, tools_menu):
+        profiling_menu = tools_menu.addMenu("Profiling")
+
+        record_action = profiling_menu.addAction("Record Slot Timings")
+        record_action.setCheckable(True)
+        record_action.setChecked(self.profiler.enabled)
+        record_action.toggled.connect(self.set_profiler_enabled)
+
+        slot_timings_action = profiling_menu.addAction("Slot Timings")
+        slot_timings_action.triggered.connect(self.show_slot_timings)
+
+        cprofile_action = profiling_menu.addAction("Run cProfile")
+        cprofile_action.setCheckable(True)
+        cprofile_action.setToolTip("Profile all function calls until unchecked, then write a .prof file")
+        cprofile_action.toggled.connect(self.set_cprofile_enabled)
+
+        QApplication.instance().aboutToQuit.connect(self.print_profiler_summary)
+
+    def print_profiler_summary(self):
+        if self.profiler.stats:
+            print(f"SlotProfiler summary:\n{self.profiler.summary()}")
+
     def create_toolbar(self):
         self.toolbar = self.addToolBar("Tools")
 
@@ -510,17 +1037,16 @@ class PyLoadUI(QMainWindow):
     def on_package_filter_change(self):
         filter_text = self.package_filter_input.text().strip()
         print("on_package_filter_change", repr(filter_text))
-        table = self.packages_table
         if not filter_text:
-            # show all rows
-            for row_idx in range(table.rowCount()):
-                table.setRowHidden(row_idx, False)
+            self.set_package_filter("name", None)
+            return
         # https://stackoverflow.com/a/6785516/10440128
-        regex = re.compile(filter_text, re.I)
-        for row_idx in range(table.rowCount()):
-            col_idx = 1
-            package_name = table.item(row_idx, col_idx).text()
-            table.setRowHidden(row_idx, not(bool(regex.search(package_name))))
+        try:
+            regex = re.compile(filter_text, re.I)
+        except re.error as error:
+            print("on_package_filter_change: bad regex:", error)
+            return
+        self.set_package_filter("name", lambda package: regex.search(package["name"]))
 
     def create_packages_table(self):
         table = QTableWidget()
@@ -530,6 +1056,7 @@ class PyLoadUI(QMainWindow):
             "Status",
             "Progress",
             "Size",
+            "Server",
         ]
         table.setColumnCount(len(column_labels))
         table.setHorizontalHeaderLabels(column_labels)
@@ -541,6 +1068,10 @@ class PyLoadUI(QMainWindow):
         table.setColumnWidth(2, 150) # Status: "Active" | "Paused"
         table.setColumnWidth(3, 70) # Progress "12.3%"
         table.setColumnWidth(4, 90) # Size "1000.00 MiB"
+        # only with more than one pyload server
+        table.setColumnHidden(5, len(self.client.clients) == 1)
+        table.setItemDelegateForColumn(3, ProgressBarDelegate(table))
+        table.setItemDelegateForColumn(4, SizeDelegate(table))
         table.setSelectionBehavior(QTableWidget.SelectRows)
         # table.setSelectionMode(QTableWidget.SingleSelection)
         table.itemSelectionChanged.connect(self.on_package_selected)
@@ -554,8 +1085,66 @@ class PyLoadUI(QMainWindow):
         # TODO select multiple packages -> rightclick -> remove / ...
         table.setContextMenuPolicy(Qt.CustomContextMenu)
         table.customContextMenuRequested.connect(self.show_packages_context_menu)
+        # status, name, server, ... filters
+        self.packages_filter = RowFilter(table, self.record_store.get, self.get_package_row)
         return table
 
+    def get_package_row(self, pid):
+        item = self.package_row_items.get(pid)
+        return None if item is None else item.row()
+
+    def create_packages_tree(self):
+        tree = QTreeView()
+        self.packages_tree_model = model = PackageTreeModel(self.package_cache, parent=tree)
+        tree.setModel(model)
+        tree.setUniformRowHeights(True)
+        tree.setSelectionBehavior(QAbstractItemView.SelectRows)
+        tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        tree.setColumnWidth(0, 640) # Package
+        tree.setColumnWidth(1, 150) # Status
+        tree.setColumnWidth(2, 70) # Progress
+        tree.setColumnWidth(3, 90) # Size
+        tree.setItemDelegateForColumn(2, ProgressBarDelegate(tree))
+        tree.setItemDelegateForColumn(3, SizeDelegate(tree))
+        tree.expanded.connect(model.on_expanded)
+        tree.collapsed.connect(model.on_collapsed)
+        tree.selectionModel().selectionChanged.connect(self.on_package_selected)
+        tree.setContextMenuPolicy(Qt.CustomContextMenu)
+        tree.customContextMenuRequested.connect(self.show_packages_context_menu)
+        return tree
+
+    def is_tree_mode(self):
+        return self.packages_stack.currentWidget() is self.packages_tree
+
+    def set_tree_mode(self, enabled):
+        widget = self.packages_tree if enabled else self.packages_table
+        self.packages_stack.setCurrentWidget(widget)
+        if enabled and self.queue_data_cache:
+            self.update_packages_tree(self.queue_data_cache)
+
+    def update_packages_tree(self, queue_data):
+        tree = self.packages_tree
+        model = self.packages_tree_model
+        # a model reset collapses all nodes
+        expanded_pids = [
+            pid for pid in model.package_links
+            if tree.isExpanded(model.package_index(pid))
+        ]
+        model.set_queue_data(queue_data)
+        for pid in expanded_pids:
+            index = model.package_index(pid)
+            if index.isValid():
+                tree.expand(index)
+
+    def get_selected_tree_package_ids(self):
+        # selected package nodes, ignore link nodes
+        model = self.packages_tree_model
+        indexes = self.packages_tree.selectionModel().selectedRows(0)
+        indexes = [index for index in indexes if model.is_package_index(index)]
+        indexes.sort(key=lambda index: index.row())
+        return [model.pid_of_index(index) for index in indexes]
+
     def create_bottom_view(self):
         self.bottom_view_stack = stack = QStackedWidget()
         for view_name in self.bottom_view_names:
@@ -633,6 +1222,8 @@ class PyLoadUI(QMainWindow):
         # table.setColumnWidth(5, 100) # Plugin "RapidgatorNet"
         # table.setColumnWidth(6, 100) # Status "downloading"
         table.setColumnWidth(7, 160) # Info "00:01:23 @ 12.34 MiB/s"
+        table.setItemDelegateForColumn(3, ProgressBarDelegate(table))
+        table.setItemDelegateForColumn(4, SizeDelegate(table))
         table.setSelectionBehavior(QTableWidget.SelectRows)
         table.setSelectionMode(QTableWidget.ExtendedSelection)
         table.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -643,77 +1234,114 @@ class PyLoadUI(QMainWindow):
         table.sortItems(0, Qt.AscendingOrder)
         table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         # TODO add context menu
+        # hoster filter of the sidebar
+        self.downloads_filter = RowFilter(table, lambda fid: self.download_links.get(fid))
         return table
 
-    def refresh_package_downloads_view(self):
-        self.client.links(self.on_package_downloads_data)
+    def refresh_package_downloads_view(self, client=None):
+        (client or self.client).links(self.on_package_downloads_data)
 
     def on_package_downloads_data(self, links):
         # TODO what is links["ids"]? these are different from link["fid"]
         # print("links", links)
+        if isinstance(links, NetworkError):
+            return
+        links = links["links"]
+        self.download_links = {link["fid"]: link for link in links}
+        # update the cached links, so the Links view and the packages table
+        # show the same status as the Downloads view
+        self.package_cache.update_links(links)
         table = self.package_downloads_view
+        model = table.model()
+        link_rows = {
+            model.index(row, 0).data(Qt.UserRole): row
+            for row in range(table.rowCount())
+        }
+        if len(link_rows) == len(links) and all(link["fid"] in link_rows for link in links):
+            # same downloads: only update the cells which change while downloading
+            sorting_enabled = table.isSortingEnabled()
+            table.setSortingEnabled(False)
+            for link in links:
+                self.set_package_download_row(link_rows[link["fid"]], link, None, self.download_progress_columns)
+            table.setSortingEnabled(sorting_enabled)
+            return
         table.clearContents()
-        table.setRowCount(len(links["links"]))
-        for row, link in enumerate(links["links"]):
-            col = 0
+        table.setRowCount(len(links))
+        for row, link in enumerate(links):
+            self.set_package_download_row(row, link, row + 1)
+        if self.downloads_filter:
+            self.downloads_filter.apply()
+
+    # Progress, Size, Status, Info
+    download_progress_columns = (3, 4, 6, 7)
+
+    def set_package_download_row(self, row, link, position, columns=None):
+        # columns: only update these columns of an existing row
+        table = self.package_downloads_view
+        col = 0
 
-            # Position
-            item = SortKeyTableWidgetItem(str(row + 1), (row + 1))
+        # Position
+        if columns is None:
+            item = SortKeyTableWidgetItem(str(position), position)
             item.setData(Qt.UserRole, link["fid"])  # Store file ID
             # TODO also store package_id?
             table.setItem(row, col, item)
-            col += 1
+        col += 1
 
-            # Package name
+        # Package name
+        if columns is None or col in columns:
             item = QTableWidgetItem(link["package_name"])
             item.setToolTip(link["package_name"])
             table.setItem(row, col, item)
-            col += 1
+        col += 1
 
-            # Link name
+        # Link name
+        if columns is None or col in columns:
             item = QTableWidgetItem(link["name"])
             item.setToolTip(link["name"])
             table.setItem(row, col, item)
-            col += 1
+        col += 1
 
-            # Progress
+        # Progress
+        if columns is None or col in columns:
             if link["size"] > 0:
                 progress = ((link["size"] - link["bleft"]) / link["size"]) * 100
-                progress_text = f"{progress:.1f}%"
             else:
                 progress = 0
-                progress_text = "0.0%"
-            item = SortKeyTableWidgetItem(progress_text, progress)
+            item = QTableWidgetItem()
+            item.setData(Qt.DisplayRole, progress)
             table.setItem(row, col, item)
-            col += 1
-
-            # Size
-            size = link["size"]
-            # FIXME pyload: zero size is "0.00 Bit"
-            # size_text = link["format_size"]
-            size_text = link["format_size"] if link["size"] > 0 else "0"
-            item = SortKeyTableWidgetItem(size_text, size)
+        col += 1
+
+        # Size
+        # not link["format_size"]: pyload formats zero size as "0.00 Bit"
+        if columns is None or col in columns:
+            item = QTableWidgetItem()
+            item.setData(Qt.DisplayRole, link["size"])
             table.setItem(row, col, item)
-            col += 1
+        col += 1
 
-            # Plugin
+        # Plugin
+        if columns is None or col in columns:
             item = QTableWidgetItem(link["plugin"])
             item.setToolTip(link["plugin"])
             table.setItem(row, col, item)
-            col += 1
+        col += 1
 
-            # Status
-            # todo? map from link["status"] to custom order
+        # Status
+        # todo? map from link["status"] to custom order
+        if columns is None or col in columns:
             item = SortKeyTableWidgetItem(link["statusmsg"], link["status"])
             item.setToolTip(link["statusmsg"])
             table.setItem(row, col, item)
-            col += 1
+        col += 1
 
-            # Info
+        # Info
+        if columns is None or col in columns:
             item = QTableWidgetItem(link["info"])
             item.setToolTip(link["info"])
             table.setItem(row, col, item)
-            col += 1
+        col += 1
 
     def create_package_files_view(self):
         table = QTableWidget(parent=self)
@@ -727,6 +1355,7 @@ class PyLoadUI(QMainWindow):
         table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         # TODO increase width of the "Modified" column. make room for YYYY-mm-dd HH:mm:ss
         table.setColumnWidth(2, 135)
+        table.setItemDelegateForColumn(1, SizeDelegate(table))
         table.setSelectionBehavior(QTableWidget.SelectRows)
         # table.setSelectionMode(QTableWidget.SingleSelection)
         # table.itemSelectionChanged.connect(self.on_package_selected)
@@ -738,9 +1367,25 @@ class PyLoadUI(QMainWindow):
         # TODO filter by search expression (regex?)
         return table
 
-    def on_package_files_view_file_doubleclicked(self):
-        print("todo handle file doubleclicked")
+    def on_package_files_view_file_doubleclicked(self, item):
         table = self.package_files_view
+        name, is_dir = table.item(item.row(), 0).data(Qt.UserRole)
+        if not is_dir:
+            # TODO open file
+            return
+        if name == "..":
+            subdir = package_files_cache.parent_subdir(self.package_files_subdir)
+        else:
+            subdir = posixpath.join(self.package_files_subdir, name)
+        self.set_package_files_subdir(subdir)
+
+    def set_package_files_subdir(self, subdir):
+        self.package_files_subdir = subdir
+        pid = self.selected_package_pid
+        # show the cached listing now, revalidate in update_package_files_view
+        entries = self.package_files_cache.get(pid, subdir)
+        self.render_package_files(pid, subdir, entries or [])
+        self.update_package_files_view()
 
     def update_package_files_view(self):
         if not self.current_package:
@@ -748,85 +1393,189 @@ class PyLoadUI(QMainWindow):
             return
         pid = self.selected_package_pid
         subdir = self.package_files_subdir
-        self.client.get_package_folder_files(self.on_package_files_data, package_id=pid, subdir=subdir)
+        def on_package_files_data(entries, changed):
+            if pid != self.selected_package_pid or subdir != self.package_files_subdir:
+                # user has navigated away
+                return
+            if entries is None:
+                # this can happen when the folder does not exist
+                # QNetworkReply.NetworkError.InternalServerError
+                self.render_package_files(pid, subdir, [])
+                return
+            if changed or self.package_files_view_key != (pid, subdir):
+                self.render_package_files(pid, subdir, entries)
+            self.watch_package_files(pid, subdir, entries)
+            self.package_files_cache.prefetch_children(pid, subdir, entries)
+        self.package_files_cache.fetch(pid, subdir, on_package_files_data)
+
+    def watch_package_files(self, pid, subdir, entries):
+        watcher = self.package_files_watcher
+        local_path = self.package_files_cache.local_path(pid, subdir)
+        if self.package_files_watcher_key != (pid, subdir):
+            paths = watcher.directories() + watcher.files()
+            if paths:
+                watcher.removePaths(paths)
+            self.package_files_watcher_key = None
+            self.package_files_watcher_has_files = False
+        if not local_path:
+            return
+        self.package_files_watcher_key = (pid, subdir)
+        # directory changes are only added, removed and renamed files.
+        # also watch files to see growing downloads,
+        # but not thousands of files in extraction folders
+        max_watched_files = 256
+        paths = [local_path]
+        self.package_files_watcher_has_files = len(entries) <= max_watched_files
+        if self.package_files_watcher_has_files:
+            paths += [
+                os.path.join(local_path, entry["name"])
+                for entry in entries
+                if not package_files_cache.is_dir_entry(entry)
+            ]
+        watched = set(watcher.directories() + watcher.files())
+        new_paths = [path for path in paths if path not in watched]
+        if new_paths:
+            watcher.addPaths(new_paths)
+        old_paths = list(watched.difference(paths))
+        if old_paths:
+            watcher.removePaths(old_paths)
+
+    def on_package_files_watcher_event(self, _path):
+        # update at most every 500 ms while files change
+        if not self.package_files_watcher_throttle.isActive():
+            self.package_files_watcher_throttle.start()
+
+    def is_package_files_view_watched(self):
+        return (
+            self.package_files_watcher_key is not None and
+            self.package_files_watcher_key == (self.selected_package_pid, self.package_files_subdir) and
+            # a directory watch does not see growing files, so keep polling
+            self.package_files_watcher_has_files
+        )
+
+    def get_storage_folder(self):
+        if not self.client.is_localhost or not self.config:
+            return None
+        try:
+            return self.get_config_value("general", "storage_folder")
+        except KeyError:
+            return None
 
-    def on_package_files_data(self, file_details_list):
-        # print(f"file_details_list {json.dumps(file_details_list, indent=2)}")
+    def get_local_package_folder(self, pid):
+        storage_folder = self.get_storage_folder()
+        if not storage_folder:
+            return None
+        package_data = self.package_cache.get(pid)
+        if package_data is None:
+            return None
+        folder_path = os.path.join(storage_folder, package_data["folder"])
+        if not os.path.isdir(folder_path):
+            return None
+        return folder_path
+
+    def render_package_files(self, pid, subdir, entries):
+        # only update rows which have changed
         table = self.package_files_view
-        if file_details_list is None or isinstance(file_details_list, QNetworkReply.NetworkError):
-            # this can happen when the folder does not exist
-            # QNetworkReply.NetworkError.InternalServerError
-            table.clearContents()
-            table.setRowCount(0)
-            return
-        # table.setRowCount(0)
-        # FIXME sometimes size and modified values are not rendered
-        # but they are rendered later on table resize (repaint)
         _debug_package_files_view = False
         if _debug_package_files_view:
-            print("on_package_files_data")
-        table.clearContents()
-        table.setRowCount(len(file_details_list))
-        # TODO add "../" special file in subdirs
-        # if self.package_files_subdir != ""
-        for row, file_details in enumerate(file_details_list):
-            col = 0
-
-            is_dir = (file_details["type"][0] == "d")
-
-            # File name
-            name = file_details["name"]
-            if is_dir:
-                name += "/"
-            item = QTableWidgetItem(name)
-            table.setItem(row, col, item)
-            col += 1
-
-            # Size
-            if is_dir:
-                size = 0
-                size_text = ""
-            else:
-                size = file_details["size"]
-                size_mb = size / (1024 * 1024)
-                size_text = f"{size_mb:.2f} MB"
-            # item = SortKeyTableWidgetItem(size_text, size)
-            item = QTableWidgetItem(size_text)
-            table.setItem(row, col, item)
-            col += 1
-
-            # Modified
-            mtime = file_details["mtime"]
+            print("render_package_files", pid, repr(subdir), len(entries))
+        new_entries = {entry["name"]: entry for entry in entries}
+        if subdir != "":
+            new_entries[".."] = dict(name="..", type="d", size=0, mtime=None)
+        sorting_enabled = table.isSortingEnabled()
+        table.setSortingEnabled(False)
+        if self.package_files_view_key != (pid, subdir):
+            # other directory
+            table.clearContents()
+            table.setRowCount(0)
+            self.package_files_view_key = (pid, subdir)
+            self.package_files_view_entries = {}
+        old_entries = self.package_files_view_entries
+        for row in reversed(range(table.rowCount())):
+            name, _is_dir = table.item(row, 0).data(Qt.UserRole)
+            entry = new_entries.get(name)
+            if entry is None:
+                table.removeRow(row)
+            elif entry != old_entries.get(name):
+                self.set_package_files_row(row, entry)
+        for name, entry in new_entries.items():
+            if name in old_entries:
+                continue
+            row = table.rowCount()
+            table.insertRow(row)
+            self.set_package_files_row(row, entry)
+        self.package_files_view_entries = new_entries
+        table.setSortingEnabled(sorting_enabled)
+
+    def set_package_files_row(self, row, file_details):
+        table = self.package_files_view
+        col = 0
+
+        is_dir = package_files_cache.is_dir_entry(file_details)
+
+        # File name
+        name = file_details["name"]
+        if is_dir:
+            name += "/"
+        item = QTableWidgetItem(name)
+        item.setData(Qt.UserRole, (file_details["name"], is_dir))
+        table.setItem(row, col, item)
+        col += 1
+
+        # Size
+        item = QTableWidgetItem()
+        if not is_dir:
+            item.setData(Qt.DisplayRole, file_details["size"])
+        table.setItem(row, col, item)
+        col += 1
+
+        # Modified
+        mtime = file_details["mtime"]
+        mtime_text = ""
+        if mtime is not None:
             mtime_text = datetime.datetime.fromtimestamp(mtime).strftime("%F %T")
-            item = QTableWidgetItem(mtime_text)
-            table.setItem(row, col, item)
-            col += 1
+        item = QTableWidgetItem(mtime_text)
+        table.setItem(row, col, item)
+        col += 1
 
-            if _debug_package_files_view:
-                print(" ", file_details["type"][0], mtime_text, (size_text or "0.00 MB"), name)
-
-    def update_package_package_view(self):
-        selected_items = self.packages_table.selectedItems()
-        if not selected_items:
+    def update_package_package_view(self, client=None):
+        pid = self.get_first_selected_package_id()
+        if not pid:
             self.package_package_view.setText("")
             return
         def on_package_data_received(package_data):
-            self.current_package = package_data
-            # if not self.current_package:
-            #     self.package_package_view.setText("")
-            #     return
-            p = self.current_package
-            text = "\n".join([
-                f"package id: {p['pid']}",
-                f"folder: {p['folder']}",
-                f"password: {p['password']}",
-                f"links: {len(p['links'])}",
-            ])
-            # self.package_package_view.setText(json.dumps(self.current_package, indent=2))
-            self.package_package_view.setText(text)
-        pid = self.packages_table.item(selected_items[0].row(), 0).data(Qt.UserRole)
-        assert pid # TODO can this be None?
-        self.client.get_package_data(on_package_data_received, pid)
+            # the package cache calls on_package_data_changed
+            self.current_package = self.package_cache.put(package_data)
+        (client or self.client).get_package_data(on_package_data_received, pid)
+
+    def render_package_package_view(self, p):
+        text = "\n".join([
+            f"package id: {p['pid']}",
+            f"folder: {p['folder']}",
+            f"password: {p['password']}",
+            f"links: {len(p['links'])}",
+        ])
+        # self.package_package_view.setText(json.dumps(self.current_package, indent=2))
+        self.package_package_view.setText(text)
+
+    def on_package_data_changed(self, pid, package_data):
+        # called by the package cache
+        if package_data is None or pid != self.selected_package_pid:
+            return
+        if self.get_bottom_view_idx() == self.BottomViewIdx.Package:
+            self.render_package_package_view(package_data)
+
+    def on_links_changed(self, pid, change):
+        # called by the package cache
+        if pid != self.package_links_pid:
+            return
+        package_data = self.package_cache.get(pid)
+        if package_data is None:
+            return
+        if change.is_structural():
+            self.render_package_links(package_data)
+        elif change.changed:
+            self.update_package_link_rows(package_data, change.changed)
 
     def create_bottom_view_button_group(self, main_layout):
         self.bottom_view_button_group = group = QButtonGroup(self)
@@ -899,19 +1648,113 @@ class PyLoadUI(QMainWindow):
     #     print("on_stop_all_downloads")
 
     def remove_finished(self):
-        print("TODO remove_finished")
+        # collect finished packages and finished links from cached data
+        # dont fetch all packages from the server
+        queue_data = self.queue_data_cache
+        if not queue_data:
+            QMessageBox.information(self, "Error", "No packages loaded")
+            return
+        pids = []
+        fids = []
+        num_stale = 0
+        for package in queue_data:
+            if package["linkstotal"] == 0:
+                continue
+            if package["linksdone"] == package["linkstotal"]:
+                pids.append(package["pid"])
+                continue
+            if package["linksdone"] == 0:
+                continue
+            # partially finished package: remove only the finished links
+            package_data = self.package_cache.get(package["pid"])
+            if package_data is None:
+                continue
+            links = package_data["links"]
+            # linksdone of the server also counts skipped links
+            finished_fids = [
+                link["fid"] for link in links
+                if link["status"] in link_status.FINISHED_STATUSES
+            ]
+            if len(links) != package["linkstotal"] or len(finished_fids) != package["linksdone"]:
+                # cached package data is older than queue data
+                num_stale += 1
+                continue
+            fids.extend(finished_fids)
+        if not pids and not fids:
+            QMessageBox.information(self, "Remove Finished", "No finished packages or links found")
+            return
+        text = f"Remove {len(pids)} finished packages and {len(fids)} finished links?"
+        if num_stale:
+            text += f"\n\nSkipping {num_stale} packages with outdated link data."
+        reply = QMessageBox.question(
+            self,
+            "Confirm Removal",
+            text,
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        def on_packages_chunk_removed(chunk, result):
+            self.remove_packages_from_table(chunk)
+
+        def on_files_chunk_removed(chunk, result):
+            self.remove_links_from_cache(chunk)
+
+        def on_done(done_items, errors):
+            if errors:
+                QMessageBox.warning(self, "Error", f"Failed to remove {sum(len(c) for c, _ in errors)} items: {errors[0][1]}")
+
+        def remove_files(done_items, errors):
+            on_done(done_items, errors)
+            if not fids: return
+            BatchJob(
+                self,
+                "Removing finished links...",
+                self.client.delete_files,
+                fids,
+                "file_ids",
+                on_chunk_done=on_files_chunk_removed,
+                on_done=on_done,
+            ).start()
+
+        if not pids:
+            remove_files([], [])
+            return
+        BatchJob(
+            self,
+            "Removing finished packages...",
+            self.client.delete_packages,
+            pids,
+            "package_ids",
+            on_chunk_done=on_packages_chunk_removed,
+            on_done=remove_files,
+        ).start()
+
+    def remove_packages_from_table(self, pids):
+        # update the local model without reloading the full queue
+        # the store calls on_queue_changed
+        self.record_store.remove_packages(pids)
+        for pid in pids:
+            self.package_cache.pop(pid, None)
+
+    def remove_links_from_cache(self, fids):
+        # update cached package data after removing links
+        # the package cache updates the link counts of the package rows
+        fids = set(fids)
+        for pid, package_data in list(self.package_cache.items()):
+            removed = [link["fid"] for link in package_data["links"] if link["fid"] in fids]
+            if not removed: continue
+            package_data["links"] = [link for link in package_data["links"] if link["fid"] not in fids]
+            self.package_cache.links_changed(pid, Change(removed=removed))
 
     def restart_failed(self):
         cb = lambda *a: print("restart_failed: done")
         self.client.restart_failed(cb)
 
     def move_packages_to_top(self):
-        table = self.packages_table
-        pids = []
-        for item in table.selectedItems():
-            if item.column() != 0: continue
-            pid = item.data(Qt.UserRole)
-            pids.append(pid)
+        pids = self.get_selected_package_ids()
         if not pids:
             QMessageBox.information(self, "Error", "No packages selected")
             return
@@ -926,12 +1769,7 @@ class PyLoadUI(QMainWindow):
         self.client.order_packages(on_move_packages_to_top, package_ids=pids, position=0)
 
     def remove_unfinished_links(self):
-        table = self.packages_table
-        pids = []
-        for item in table.selectedItems():
-            if item.column() != 0: continue
-            pid = item.data(Qt.UserRole)
-            pids.append(pid)
+        pids = self.get_selected_package_ids()
         if not pids:
             QMessageBox.information(self, "Error", "No packages selected")
             return
@@ -958,9 +1796,103 @@ class PyLoadUI(QMainWindow):
         dialog.setModal(True)
         dialog.exec()
 
+    def show_error_groups(self):
+        dialog = error_groups.ErrorGroupsDialog(self)
+        dialog.show()
+
+    def show_storage_usage(self):
+        storage_folder = self.get_storage_folder()
+        if not storage_folder or not os.path.isdir(storage_folder):
+            # we can only scan the storage folder when pyload runs on localhost
+            QMessageBox.warning(self, "Storage Usage", "The storage folder is not available on this machine")
+            return
+        dialog = storage_scanner.StorageReportDialog(self, storage_folder)
+        dialog.show()
+
+    def start_watchdog(self, threshold_ms):
+        self.watchdog = watchdog.EventLoopWatchdog(threshold_ms).start()
+        action = self.tools_menu.addAction("Event Loop Stalls")
+        action.triggered.connect(self.show_watchdog_summary)
+        QApplication.instance().aboutToQuit.connect(
+            lambda: print(f"EventLoopWatchdog summary:\n{self.watchdog.summary()}")
+        )
+
+    def show_watchdog_summary(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Event Loop Stalls")
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.resize(900, 600)
+        layout = QVBoxLayout(dialog)
+        text_edit = QTextEdit()
+        text_edit.setReadOnly(True)
+        text_edit.setLineWrapMode(QTextEdit.NoWrap)
+        text_edit.setPlainText(self.watchdog.summary())
+        layout.addWidget(text_edit)
+        dialog.show()
+
+    def set_profiler_enabled(self, enabled):
+        self.profiler.set_enabled(enabled)
+
+    def show_slot_timings(self):
+        dialog = profiler.SlotTimingsDialog(self)
+        dialog.show()
+
+    def set_cprofile_enabled(self, enabled):
+        if enabled:
+            self.profiler.start_cprofile()
+            return
+        path, text = self.profiler.stop_cprofile()
+        print(f"cProfile stats written to {path}\n{text}")
+        QMessageBox.information(self, "cProfile", f"cProfile stats written to {path}")
+
+    def start_memory_tracking(self, interval_minutes):
+        self.memory_tracker.timer.setInterval(int(interval_minutes * 60_000))
+        self.memory_tracker.start()
+        QApplication.instance().aboutToQuit.connect(
+            lambda: print(f"MemoryTracker summary:\n{self.memory_tracker.summary()}")
+        )
+
+    def show_memory_tracking(self):
+        dialog = memory_tracker.MemoryTrackerDialog(self)
+        dialog.show()
+
+    def show_network_stats(self):
+        dialog = network_stats.NetworkStatsDialog(self)
+        dialog.show()
+
+    def show_store_memory(self):
+        def format_mib(size):
+            return f"{(size / (1024 * 1024)):.2f} MiB"
+        num_links = sum(len(package_data["links"]) for _pid, package_data in self.package_cache.items())
+        text = "\n".join([
+            f"queue: {len(self.record_store)} packages, {format_mib(self.record_store.memory_footprint())}",
+            f"package data: {len(self.package_cache)} packages, {num_links} links, {format_mib(self.package_cache.memory_footprint())}",
+        ])
+        print(f"show_store_memory:\n{text}")
+        QMessageBox.information(self, "Data Store Memory", text)
+
+    def show_integrity_check(self, all_packages=False):
+        storage_folder = self.get_storage_folder()
+        if not storage_folder or not os.path.isdir(storage_folder):
+            QMessageBox.warning(self, "Verify Files", "The storage folder is not available on this machine")
+            return
+        if all_packages:
+            package_ids = [
+                package["pid"]
+                for package in (self.queue_data_cache or [])
+                if package["linksdone"] > 0
+            ]
+        else:
+            package_ids = self.get_selected_package_ids()
+        if not package_ids:
+            return
+        dialog = integrity_check.IntegrityCheckDialog(self, storage_folder, package_ids)
+        dialog.show()
+        dialog.start()
+
     def show_packages_context_menu(self, position):
-        selected_rows = set(index.row() for index in self.packages_table.selectedIndexes())
-        if not selected_rows:
+        view = self.packages_stack.currentWidget()
+        if not view.selectionModel().hasSelection():
             return
 
         menu = QMenu()
@@ -968,11 +1900,16 @@ class PyLoadUI(QMainWindow):
         start_action = menu.addAction("Start Packages") # collector -> queue
         pause_action = menu.addAction("Pause Packages") # queue -> collector
         remove_action = menu.addAction("Remove Packages")
+        restart_failed_action = menu.addAction("Restart Failed Links")
+        verify_files_action = menu.addAction("Verify Files")
+        verify_files_action.setEnabled(self.client.is_localhost)
+        menu.addSeparator()
+        self.add_package_tags_menus(menu)
         # move_top_action = menu.addAction("Move Packages to Top")
         # move_bottom_action = menu.addAction("Move Packages to Bottom")
         # TODO more
 
-        action = menu.exec(self.packages_table.viewport().mapToGlobal(position))
+        action = menu.exec(view.viewport().mapToGlobal(position))
 
         if action == start_action:
             self.start_selected_packages()
@@ -980,20 +1917,121 @@ class PyLoadUI(QMainWindow):
             self.pause_selected_packages()
         elif action == remove_action:
             self.remove_selected_packages()
+        elif action == restart_failed_action:
+            self.restart_failed_links_in_selected_packages()
+        elif action == verify_files_action:
+            self.show_integrity_check()
         # TODO more
 
+    def add_package_tags_menus(self, menu):
+        # set the category or toggle tags of the selected packages
+        category_menu = menu.addMenu("Category")
+        category_menu.addAction("None", lambda: self.package_tags.remove(
+            package_tags.CATEGORY, self.get_selected_package_ids()
+        ))
+        for name in self.package_tags.categories.names():
+            category_menu.addAction(name, lambda name=name: self.package_tags.add(
+                package_tags.CATEGORY, self.get_selected_package_ids(), name
+            ))
+        category_menu.addSeparator()
+        category_menu.addAction("New...", lambda: self.add_label_to_selected_packages(
+            package_tags.CATEGORY
+        ))
+
+        tags_menu = menu.addMenu("Tags")
+        tags = self.package_tags.tags
+        package_ids = self.get_selected_package_ids()
+        for name in tags.names():
+            tag_pids = tags.get_pids(name)
+            action = tags_menu.addAction(name)
+            action.setCheckable(True)
+            # checked when all selected packages have the tag
+            action.setChecked(bool(package_ids) and all(pid in tag_pids for pid in package_ids))
+            action.toggled.connect(lambda checked, name=name: self.set_tag_of_selected_packages(
+                name, checked
+            ))
+        tags_menu.addSeparator()
+        tags_menu.addAction("New...", lambda: self.add_label_to_selected_packages(
+            package_tags.TAG
+        ))
+
+    def set_tag_of_selected_packages(self, name, checked):
+        package_ids = self.get_selected_package_ids()
+        if checked:
+            self.package_tags.add(package_tags.TAG, package_ids, name)
+        else:
+            self.package_tags.remove(package_tags.TAG, package_ids, name)
+
+    def add_label_to_selected_packages(self, kind):
+        label = "Category" if kind == package_tags.CATEGORY else "Tag"
+        name, ok = QInputDialog.getText(self, f"New {label}", f"{label}:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        self.package_tags.add(kind, self.get_selected_package_ids(), name)
+
+    def get_selected_rows(self, table):
+        # selectedItems() and selectedIndexes() return one object per cell
+        # so selecting 15000 packages would create 75000 python objects.
+        # the selection model stores the selection as ranges of rows
+        # (we use SelectRows) so we only have to expand the ranges.
+        # returns visible rows in display order
+        selection = table.selectionModel().selection()
+        if len(selection) == 1:
+            # fast path: one contiguous range, for example "select all"
+            selection_range = selection[0]
+            rows = range(selection_range.top(), selection_range.bottom() + 1)
+        else:
+            # ranges can overlap after ctrl+click
+            rows = set()
+            for selection_range in selection:
+                rows.update(range(selection_range.top(), selection_range.bottom() + 1))
+            rows = sorted(rows)
+        # selectedItems() also skips hidden rows
+        return [row for row in rows if not table.isRowHidden(row)]
+
+    def get_selected_row_ids(self, table, col=0, role=Qt.UserRole):
+        # map selected rows to the id column
+        # note: this also works with QTableView
+        model = table.model()
+        index = model.index
+        return [index(row, col).data(role) for row in self.get_selected_rows(table)]
+
     def get_selected_package_ids(self):
-        package_ids = []
-        table = self.packages_table
-        for item in table.selectedItems():
-            # package_id is stored in cell 0
-            if item.column() != 0: continue
-            package_id = item.data(Qt.UserRole)
-            package_ids.append(package_id)
-        return package_ids
+        if self.is_tree_mode():
+            return self.get_selected_tree_package_ids()
+        # package_id is stored in cell 0
+        return self.get_selected_row_ids(self.packages_table)
+
+    def get_visible_package_ids(self):
+        # packages of the current filters, also rows which are not rendered
+        return self.packages_filter.matching_keys(self.record_store.packages)
+
+    def start_visible_packages(self):
+        self.start_packages(self.get_visible_package_ids())
+
+    def pause_visible_packages(self):
+        self.pause_packages(self.get_visible_package_ids())
+
+    def remove_visible_packages(self):
+        package_ids = self.get_visible_package_ids()
+        if not package_ids:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Confirm Removal",
+            f"Remove {len(package_ids)} packages?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        self.remove_packages(package_ids)
 
     def start_selected_packages(self):
-        package_ids = self.get_selected_package_ids()
+        self.start_packages(self.get_selected_package_ids())
+
+    def start_packages(self, package_ids):
         if not package_ids:
             return
         # Moves package from Collector to Queue.
@@ -1004,7 +2042,9 @@ class PyLoadUI(QMainWindow):
         self.reload_packages_table()
 
     def pause_selected_packages(self):
-        package_ids = self.get_selected_package_ids()
+        self.pause_packages(self.get_selected_package_ids())
+
+    def pause_packages(self, package_ids):
         if not package_ids:
             return
         # Moves package from Queue to Collector.
@@ -1015,18 +2055,88 @@ class PyLoadUI(QMainWindow):
         self.reload_packages_table()
 
     def remove_selected_packages(self):
-        package_ids = self.get_selected_package_ids()
+        self.remove_packages(self.get_selected_package_ids())
+
+    def remove_packages(self, package_ids):
         if not package_ids:
             return
         self.client.delete_packages(self.on_packages_removed, package_ids=package_ids)
 
+    def restart_failed_links_in_selected_packages(self):
+        package_ids = self.get_selected_package_ids()
+        if not package_ids:
+            return
+        progress = None
+        num_missing = sum(1 for pid in package_ids if pid not in self.package_cache)
+        if num_missing > 10:
+            progress = QProgressDialog("Loading package links...", "Cancel", 0, num_missing, self)
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(500)
+
+        def on_progress(num_done, num_total):
+            if progress: progress.setValue(num_done)
+
+        def on_packages_data(packages_data):
+            if progress:
+                canceled = progress.wasCanceled()
+                progress.reset()
+                progress.deleteLater()
+                if canceled: return
+            link_ids = [
+                link["fid"]
+                for pid in package_ids
+                for link in packages_data.get(pid, dict(links=[]))["links"]
+                if link["status"] in link_status.FAILED_STATUSES
+            ]
+            if not link_ids:
+                QMessageBox.information(self, "Restart Failed Links", "No failed links found")
+                return
+            BatchJob(
+                self,
+                "Restarting failed links...",
+                self.client.restart_failed,
+                link_ids,
+                "link_ids",
+                on_chunk_done=lambda chunk, result: self.set_links_restarted(chunk, package_ids),
+                on_done=on_done,
+            ).start()
+
+        def on_done(done_items, errors):
+            print(f"restart_failed_links_in_selected_packages: restarted {len(done_items)} links")
+            if errors:
+                QMessageBox.warning(self, "Error", f"Failed to restart {sum(len(c) for c, _ in errors)} links: {errors[0][1]}")
+            self.refresh_bottom_view()
+
+        self.package_cache.fetch(
+            package_ids, on_packages_data, on_progress,
+            max_age=package_cache.FAILED_LINKS_MAX_AGE,
+        )
+
+    def set_links_restarted(self, fids, pids=None):
+        # update cached link status after restart_failed
+        # restart_failed sets status=3 (queued) and error=""
+        fids = set(fids)
+        if pids is None:
+            pids = [pid for pid, _ in self.package_cache.items()]
+        for pid in pids:
+            package_data = self.package_cache.get(pid)
+            if package_data is None: continue
+            changed = {}
+            for link in package_data["links"]:
+                if link["fid"] in fids and link["status"] in link_status.FAILED_STATUSES:
+                    link["status"] = link_status.QUEUED
+                    link["statusmsg"] = "queued"
+                    link["error"] = ""
+                    changed[link["fid"]] = {"status", "statusmsg", "error"}
+            if changed:
+                self.package_cache.links_changed(pid, Change(changed=changed))
+
     def on_packages_removed(self, response):
         print(f"on_packages_removed: {response}")
         self.reload_packages_table()
 
     def show_package_links_context_menu(self, position):
-        selected_rows = set(index.row() for index in self.package_links_table.selectedIndexes())
-        if not selected_rows:
+        if not self.get_selected_rows(self.package_links_table):
             return
 
         menu = QMenu()
@@ -1043,12 +2153,8 @@ class PyLoadUI(QMainWindow):
             self.restart_selected_links()
 
     def copy_selected_links(self):
-        table = self.package_links_table
-        links = []
-        for item in table.selectedItems():
-            if item.column() != 1: continue
-            link = item.data(Qt.UserRole) # get file URL
-            links.append(link)
+        # file URL is stored in cell 1
+        links = self.get_selected_row_ids(self.package_links_table, col=1)
         self.set_clipboard("".join(map(lambda s: s + "\n", links)))
 
     def set_clipboard(self, text):
@@ -1059,17 +2165,10 @@ class PyLoadUI(QMainWindow):
 
     def get_selected_package_link_ids(self):
         # note: pyload calls this "file_ids"
-        table = self.package_links_table
-        link_ids = []
-        for item in table.selectedItems():
-            # link_id is stored in cell 0
-            if item.column() != 0: continue
-            link_id = item.data(Qt.UserRole)
-            link_ids.append(link_id)
-        return link_ids
+        # link_id is stored in cell 0
+        return self.get_selected_row_ids(self.package_links_table)
 
     def remove_selected_links(self):
-        # FIXME update package progress after removing files (links)
         fids = self.get_selected_package_link_ids()
         if not fids:
             return
@@ -1125,9 +2224,15 @@ class PyLoadUI(QMainWindow):
         print(f"on_links_restarted: {response}")
 
     def show_add_package_dialog(self):
-        dialog = AddPackageDialog(self)
+        num_packages = 0
+        if self.queue_data_cache:
+            num_packages = len(self.queue_data_cache)
+            # index all links in the background while the dialog is open
+            self.link_index.crawl(self.queue_data_cache)
+        dialog = AddPackageDialog(self, self.link_index, num_packages)
         if dialog.exec() == QDialog.Accepted:
             name, links, password = dialog.get_package_data()
+            max_links_per_package, by_hoster = dialog.get_split_options()
             if not name:
                 QMessageBox.warning(self, "Error", "Package name cannot be empty")
                 return
@@ -1135,21 +2240,21 @@ class PyLoadUI(QMainWindow):
                 QMessageBox.warning(self, "Error", "No valid links found")
                 return
 
-            if password:
-                def on_package_added(pid):
-                    print(f"on_package_added {pid} -> calling set_package_data")
-                    package_data = dict(password=password)
-                    def on_set_package_data(res):
-                        # TODO check res for errors
-                        self.on_package_added(pid)
-                    self.client.set_package_data(
-                        on_set_package_data,
-                        package_id=pid,
-                        data=package_data
-                    )
-                pid = self.client.add_package(on_package_added, name=name, links=links)
-            else:
-                self.client.add_package(self.on_package_added, name=name, links=links)
+            def on_packages_added(pids, errors):
+                if errors:
+                    QMessageBox.warning(self, "Error", f"Failed to add {len(errors)} packages: {errors[0][1]}")
+                self.on_package_added(bool(pids))
+
+            link_import.PackageImportJob(
+                self,
+                self.client,
+                name,
+                links,
+                password,
+                max_links_per_package,
+                by_hoster,
+                on_done=on_packages_added,
+            ).start()
 
     # https://github.com/pyload/pyload/pull/4643
     # Basic auth in openapi spec
@@ -1168,25 +2273,65 @@ class PyLoadUI(QMainWindow):
     # set_session(user_info)
 
     def login(self):
-        def on_csrf_token(csrf_token):
-            if csrf_token is None:
-                print("error: login failed: got no csrf_token")
-                QMessageBox.critical(self, "Login Failed", "Could not login to pyLoad: got no csrf_token")
+        api.run_task(self.login_task())
+
+    async def login_task(self):
+        start_time = time.monotonic()
+        # servers are logged in at the same time
+        clients = self.client.clients
+        results = await api.gather(
+            *(self.login_server(client) for client in clients), return_exceptions=True
+        )
+        failed = [
+            f"{client.profile.name}: {result.error if isinstance(result, api.ApiError) else result}"
+            for client, result in zip(clients, results)
+            if result is not True
+        ]
+        if failed:
+            QMessageBox.critical(self, "Login Failed", "Could not login to pyLoad:\n" + "\n".join(failed))
+            if len(failed) == len(clients):
                 return
-            self.client.login(
-                self.on_login_result,
-                username="pyload",
-                password="pyload",
-                # csrf_token=csrf_token,
-            )
-        self.client._get_csrf_token(on_csrf_token)
+        login_time = time.monotonic() - start_time
+        # config and queue dont depend on each other
+        # with header auth, they are the first authenticated requests
+        config, queue_data = await api.gather(
+            self.api.get_config(),
+            self.api.get_queue_and_collector(),
+            return_exceptions=True,
+        )
+        if isinstance(config, api.ApiError) and config.error in (
+                NetworkError.AuthenticationRequiredError, NetworkError.ContentAccessDenied):
+            QMessageBox.critical(self, "Login Failed", f"Could not login to pyLoad: {config.error}")
+            return
+        print(
+            f"login: {len(clients) - len(failed)} of {len(clients)} servers in {login_time * 1000:.0f} ms, "
+            f"config and queue after {(time.monotonic() - start_time) * 1000:.0f} ms"
+        )
+        self.on_config(config.error if isinstance(config, api.ApiError) else config)
+        self.on_queue_and_collector_received(
+            queue_data.error if isinstance(queue_data, api.ApiError) else queue_data
+        )
 
-    def on_login_result(self, success):
-        if success:
-            self.get_config()
-            self.refresh_queue()
-        else:
-            QMessageBox.critical(self, "Login Failed", "Could not login to pyLoad")
+    async def login_server(self, client):
+        # returns True, or a message or ApiError for the login failed box
+        profile = client.profile
+        server_api = api.PyLoadApi(client)
+        start_time = time.monotonic()
+        # ipv6 and ipv4 addresses of the server are tried in parallel
+        client.base_url = await server_profiles.discover_base_url(client.transport, profile)
+        if profile.auth == "session":
+            csrf_token = await server_api.get_csrf_token()
+            if csrf_token is None:
+                print(f"error: login to {profile.name} failed: got no csrf_token")
+                return "got no csrf_token"
+            success = await server_api.login(username=profile.username, password=profile.password)
+            if not success:
+                return "wrong username or password"
+        print(
+            f"login: {profile.name} at {client.base_url} with {profile.auth} auth "
+            f"in {(time.monotonic() - start_time) * 1000:.0f} ms"
+        )
+        return True
 
     def get_config(self):
         self.client.get_config(self.on_config)
@@ -1213,25 +2358,67 @@ class PyLoadUI(QMainWindow):
         timer.start(self.refresh_interval * 1000)
 
     def refresh_timer_tick(self):
-        self.refresh_bottom_view()
+        if self.circuit_breaker and self.circuit_breaker.is_open():
+            # give the server some time to recover
+            return
+        # polls wait for user actions, and are held by the circuit breaker
+        self.refresh_bottom_view(self.client.polling)
+
+    def create_server_banner(self):
+        banner = QFrame()
+        banner.setFrameShape(QFrame.StyledPanel)
+        banner.setStyleSheet("QFrame { background-color: #fff3cd; color: #664d03; }")
+        layout = QHBoxLayout(banner)
+        layout.setContentsMargins(8, 4, 8, 4)
+        self.server_banner_label = QLabel("")
+        layout.addWidget(self.server_banner_label, 1)
+        retry_button = QPushButton("Retry Now")
+        retry_button.clicked.connect(self.retry_server_now)
+        layout.addWidget(retry_button)
+        banner.hide()
+        return banner
+
+    def on_circuit_breaker_changed(self, breaker):
+        if breaker.state == breaker.CLOSED:
+            self.server_banner.hide()
+            return
+        if breaker.state == breaker.OPEN:
+            retry_time = datetime.datetime.fromtimestamp(breaker.retry_time).strftime("%H:%M:%S")
+            text = (
+                f"pyLoad is not responding ({breaker.last_error.name}). "
+                f"Polling is paused until {retry_time}."
+            )
+        else:
+            text = "pyLoad is not responding. Trying again..."
+        self.server_banner_label.setText(text)
+        self.server_banner.show()
+
+    def retry_server_now(self):
+        self.circuit_breaker.half_open()
+        self.refresh_queue()
 
-    def refresh_bottom_view(self):
+    def refresh_bottom_view(self, client=None):
+        # client: self.client.polling for the refresh timer
+        client = client or self.client
         pid = self.selected_package_pid
         bottom_view_idx = self.get_bottom_view_idx()
         if bottom_view_idx == self.BottomViewIdx.Package:
-            self.update_package_package_view()
+            self.update_package_package_view(client)
         elif bottom_view_idx == self.BottomViewIdx.Links:
             if pid:
-                self.client.get_package_data(self.on_package_data_received, pid)
+                client.get_package_data(self.on_package_data_received, pid)
         elif bottom_view_idx == self.BottomViewIdx.Downloads:
-            self.refresh_package_downloads_view()
+            self.refresh_package_downloads_view(client)
         elif bottom_view_idx == self.BottomViewIdx.Files:
-            if pid:
+            if pid and self.is_package_files_view_watched():
+                # the file watcher updates the view
+                pass
+            elif pid:
                 # TODO refactor
                 def on_package_data_received(res):
-                    self.current_package = res
+                    self.current_package = self.package_cache.put(res)
                     self.update_package_files_view()
-                self.client.get_package_data(on_package_data_received, pid)
+                client.get_package_data(on_package_data_received, pid)
             else:
                 # no package selected
                 self.update_package_files_view()
@@ -1267,76 +2454,210 @@ class PyLoadUI(QMainWindow):
                 if pkg["pid"] == self.debug_pid:
                     print(f"on_queue_received pkg {self.debug_pid} = {json.dumps(pkg, indent=2)}")
                     break
-        self.queue_data_cache = queue_data
-        if queue_data is None:
+        if queue_data is None or isinstance(queue_data, NetworkError):
+            self.queue_data_cache = None
+            if self.circuit_breaker and self.circuit_breaker.state != self.circuit_breaker.CLOSED:
+                # the banner shows the error
+                return
             QMessageBox.warning(self, "Error", "Could not fetch queue")
             return
-
+        # keep compact records instead of the json dicts
+        # the store calls on_queue_changed
+        self.queue_data_cache = queue_data = self.record_store.set_queue(queue_data)
+        cached_pids = set(self.package_cache.data)
+        self.package_cache.update_queue(queue_data)
+        # refetch changed packages in the background so the hoster counts
+        # do not stay frozen. removed packages are dropped in on_queue_changed
+        evicted_pids = cached_pids.difference(self.package_cache.data)
+        self.package_cache.prefetch(
+            pid for pid in evicted_pids if pid in self.hoster_index.package_counts
+        )
+        if self.link_index.is_crawling:
+            # index new and changed packages
+            self.link_index.crawl(queue_data)
+
+    def on_queue_changed(self, change):
+        # called by the record store
+        queue_data = self.queue_data_cache = self.record_store.queue
+        if len(self.client.clients) > 1 and (change.added or change.removed):
+            counts = self.server_package_counts
+            for pid in change.added:
+                counts[multi_server.server_index(pid)] += 1
+            for pid in change.removed:
+                counts[multi_server.server_index(pid)] -= 1
+            self.sidebar_widget.updateServerCounts(counts)
+        if change.removed:
+            self.link_index.remove_packages(change.removed)
+            self.hoster_index.remove_packages(change.removed)
+            self.package_files_cache.remove_packages(change.removed)
+            self.package_tags.remove_packages(change.removed)
+        if change.added or change.removed:
+            self.sidebar_widget.updateTagCounts(len(self.record_store))
+        if change.added or change.reordered:
+            self.render_packages_table(queue_data)
+        else:
+            if change.removed:
+                self.remove_package_rows(change.removed)
+            if change.changed:
+                self.update_package_rows(change.changed)
+        if self.is_tree_mode():
+            self.update_packages_tree(queue_data)
+
+    def render_packages_table(self, queue_data):
         table = self.packages_table
         table.clearContents()
+        self.package_row_items = {}
         self.packages_table.setRowCount(len(queue_data))
         for row, package in enumerate(queue_data):
-            col = 0
+            self.set_package_row(row, package, row + 1)
+        if self.packages_filter:
+            self.packages_filter.apply()
 
-            # Position
-            position_item = SortKeyTableWidgetItem(str(row + 1), (row + 1))
+    def update_package_rows(self, changed):
+        # changed: pid -> set of changed fields
+        table = self.packages_table
+        if len(changed) > 100:
+            # item.row() is a linear search, so find all rows in one pass
+            model = table.model()
+            package_rows = {
+                model.index(row, 0).data(Qt.UserRole): row
+                for row in range(table.rowCount())
+            }
+        else:
+            package_rows = {
+                pid: self.package_row_items[pid].row()
+                for pid in changed
+                if pid in self.package_row_items
+            }
+        sorting_enabled = table.isSortingEnabled()
+        table.setSortingEnabled(False)
+        for pid, fields in changed.items():
+            row = package_rows.get(pid)
+            package = self.record_store.get(pid)
+            if row is None or package is None: continue
+            columns = set()
+            for field in fields:
+                columns.update(self.package_field_columns.get(field, ()))
+            if columns:
+                self.set_package_row(row, package, None, columns)
+        table.setSortingEnabled(sorting_enabled)
+        if self.packages_filter:
+            # rows are found by package_row_items, see above
+            self.packages_filter.apply(changed if len(changed) <= 100 else None)
+
+    def remove_package_rows(self, pids):
+        table = self.packages_table
+        model = table.model()
+        rows = sorted(
+            self.package_row_items.pop(pid).row()
+            for pid in pids
+            if pid in self.package_row_items
+        )
+        # remove contiguous blocks of rows, from bottom to top
+        end = len(rows)
+        while end > 0:
+            start = end - 1
+            while start > 0 and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            model.removeRows(rows[start], end - start)
+            end = start
+
+    # package fields -> columns of the packages table
+    package_field_columns = dict(
+        name=(1,),
+        queue=(2,),
+        linksdone=(3,),
+        linkstotal=(3,),
+        sizetotal=(3, 4),
+    )
+
+    def set_package_row(self, row, package, position, columns=None):
+        # columns: only update these columns of an existing row
+        col = 0
+
+        # Position
+        if columns is None:
+            position_item = SortKeyTableWidgetItem(str(position), position)
             # package_id is stored in cell 0
             position_item.setData(Qt.UserRole, package["pid"])  # Store package ID
             self.packages_table.setItem(row, col, position_item)
-            col += 1
+            self.package_row_items[package["pid"]] = position_item
+        col += 1
 
-            # Name
+        # Name
+        if columns is None or col in columns:
             name_item = QTableWidgetItem(package["name"])
             self.packages_table.setItem(row, col, name_item)
-            col += 1
+        col += 1
 
-            # Status: Queue or Collector
+        # Status: Queue or Collector
+        if columns is None or col in columns:
             status_str = "Active" if package["queue"] else "Paused"
             item = QTableWidgetItem(status_str)
             item.setData(Qt.UserRole, package["queue"])
             self.packages_table.setItem(row, col, item)
-            col += 1
-
-            # Progress
-            if package["sizetotal"] > 0:
-                progress = (package["linksdone"] / package["linkstotal"])
-                progress_text = f"{(progress * 100):.1f}%"
-            else:
-                progress = 0
-                progress_text = "0.0%"
-            # self.packages_table.setItem(row, 1, QTableWidgetItem(progress_text))
-            progress_item = SortKeyTableWidgetItem(progress_text, progress)
+        col += 1
+
+        # Progress
+        # numbers are formatted by ProgressBarDelegate and SizeDelegate
+        if columns is None or col in columns:
+            progress = package_progress(package)
+            progress_item = QTableWidgetItem()
+            progress_item.setData(Qt.DisplayRole, progress * 100)
             progress_item.setData(Qt.UserRole, progress)
             self.packages_table.setItem(row, col, progress_item)
-            col += 1
-
-            # Size
-            size = package["sizetotal"]
-            size_mb = package["sizetotal"] / (1024 * 1024)
-            size_text = f"{size_mb:.2f} MB"
-            # self.packages_table.setItem(row, 2, QTableWidgetItem(size_text))
-            size_item = SortKeyTableWidgetItem(size_text, size)
+        col += 1
+
+        # Size
+        if columns is None or col in columns:
+            size_item = QTableWidgetItem()
+            size_item.setData(Qt.DisplayRole, package["sizetotal"])
             self.packages_table.setItem(row, col, size_item)
-            col += 1
+        col += 1
+
+        # Server
+        if columns is None:
+            server_item = QTableWidgetItem(self.client.server_name(package["pid"]))
+            self.packages_table.setItem(row, col, server_item)
+        col += 1
+
+    def get_first_selected_package_id(self):
+        if self.is_tree_mode():
+            # selecting a link node selects its package
+            index = self.packages_tree.selectionModel().currentIndex()
+            return self.packages_tree_model.pid_of_index(index)
+        # Get package ID from the first column of the current row
+        # this is O(1), no need to expand the selection
+        table = self.packages_table
+        index = table.selectionModel().currentIndex()
+        if not index.isValid() or not table.selectionModel().isRowSelected(index.row()):
+            rows = self.get_selected_rows(table)
+            if not rows:
+                return None
+            row = rows[0]
+        else:
+            row = index.row()
+        return table.model().index(row, 0).data(Qt.UserRole)
 
     def on_package_selected(self):
-        selected_items = self.packages_table.selectedItems()
-        if not selected_items:
+        pid = self.get_first_selected_package_id()
+        if not pid:
             return
-
-        # Get package ID from the first column of selected row
-        pid = self.packages_table.item(selected_items[0].row(), 0).data(Qt.UserRole)
-        assert pid # TODO can this be None?
+        if pid != self.selected_package_pid:
+            self.package_files_subdir = ""
+            # keep the listings of other packages, see PackageFilesCache.get
+            self.package_files_cache.prune()
         self.selected_package_pid = pid
         self.refresh_bottom_view()
 
     def on_package_doubleclicked(self):
-        selected_items = self.packages_table.selectedItems()
-        if not selected_items:
+        pid = self.get_first_selected_package_id()
+        if not pid:
             return
         if not self.client.is_localhost: return
 
-        storage_folder = self.get_config_value("core", "general", "storage_folder")
+        storage_folder = self.get_storage_folder()
+        if not storage_folder: return
 
         def on_package_data_received(package_data):
             # print(f"on_package_doubleclicked package_data {package_data}")
@@ -1350,20 +2671,19 @@ class PyLoadUI(QMainWindow):
             ]
             subprocess.Popen(args)
 
-        pid = self.packages_table.item(selected_items[0].row(), 0).data(Qt.UserRole)
-        assert pid # TODO can this be None?
         self.client.get_package_data(on_package_data_received, pid)
 
     def on_package_data_received(self, package_data):
         table = self.package_links_table
-        if package_data is None:
+        if package_data is None or isinstance(package_data, NetworkError):
+            self.package_links_pid = None
             table.clearContents()
             self.package_links_table.setRowCount(0)
             return
         if self._debug_package_data:
             for pkg in self.queue_data_cache:
                 if pkg["pid"] == package_data["pid"]:
-                    print(f"on_package_data_received: queue_data[] = {json.dumps(pkg, indent=2)}")
+                    print(f"on_package_data_received: queue_data[] = {json.dumps(pkg.to_dict(), indent=2)}")
                     break
             print(f"on_package_data_received: package_data = {json.dumps(package_data, indent=2)}")
             if package_data is None:
@@ -1371,7 +2691,8 @@ class PyLoadUI(QMainWindow):
                 self.package_links_table.setRowCount(0)
                 return
 
-        self.current_package = package_data
+        # the package cache calls on_links_changed for the current links
+        self.current_package = package_data = self.package_cache.put(package_data)
 
         if self._debug_remove_links:
             print("links after remove")
@@ -1379,6 +2700,13 @@ class PyLoadUI(QMainWindow):
                 print(" ", i + 1, link["fid"], link["statusmsg"], link["url"])
             self._debug_remove_links = False
 
+        if package_data["pid"] != self.package_links_pid:
+            self.render_package_links(package_data)
+
+    def render_package_links(self, package_data):
+        table = self.package_links_table
+        self.package_links_pid = package_data["pid"]
+
         # this seems to be necessary to fix table updates
         # without this, the result table can contain duplicate values
         # TODO why?
@@ -1391,35 +2719,77 @@ class PyLoadUI(QMainWindow):
         # FIXME this can produce broken tables with duplicate position values
 
         for row, link in enumerate(links):
-            col = 0
+            self.set_package_link_row(row, link, row + 1)
+
+    # link fields -> columns of the links table
+    link_field_columns = dict(
+        name=(1,),
+        url=(1,),
+        plugin=(2,),
+        status=(3,),
+        statusmsg=(3,),
+        error=(4,),
+    )
+
+    def update_package_link_rows(self, package_data, changed):
+        # changed: fid -> set of changed fields
+        table = self.package_links_table
+        model = table.model()
+        link_rows = {
+            model.index(row, 0).data(Qt.UserRole): row
+            for row in range(table.rowCount())
+        }
+        links = {link["fid"]: link for link in package_data["links"] if link["fid"] in changed}
+        sorting_enabled = table.isSortingEnabled()
+        table.setSortingEnabled(False)
+        for fid, fields in changed.items():
+            row = link_rows.get(fid)
+            link = links.get(fid)
+            if row is None or link is None: continue
+            columns = set()
+            for field in fields:
+                columns.update(self.link_field_columns.get(field, ()))
+            if columns:
+                self.set_package_link_row(row, link, None, columns)
+        table.setSortingEnabled(sorting_enabled)
+
+    def set_package_link_row(self, row, link, position, columns=None):
+        # columns: only update these columns of an existing row
+        table = self.package_links_table
+        col = 0
 
-            # Position
-            position_item = SortKeyTableWidgetItem(str(row + 1), (row + 1))
+        # Position
+        if columns is None:
+            position_item = SortKeyTableWidgetItem(str(position), position)
             position_item.setData(Qt.UserRole, link["fid"])  # Store file ID
-            self.package_links_table.setItem(row, col, position_item)
-            col += 1
+            table.setItem(row, col, position_item)
+        col += 1
 
-            # Filename
+        # Filename
+        if columns is None or col in columns:
             item = QTableWidgetItem(link["name"])
             item.setData(Qt.UserRole, link["url"])  # Store file URL
-            self.package_links_table.setItem(row, col, item)
-            col += 1
+            table.setItem(row, col, item)
+        col += 1
 
-            # Plugin
-            self.package_links_table.setItem(row, col, QTableWidgetItem(link["plugin"]))
-            col += 1
+        # Plugin
+        if columns is None or col in columns:
+            table.setItem(row, col, QTableWidgetItem(link["plugin"]))
+        col += 1
 
-            # Status
-            # todo? map from link["status"] to custom order
+        # Status
+        # todo? map from link["status"] to custom order
+        if columns is None or col in columns:
             status_item = SortKeyTableWidgetItem(link["statusmsg"], link["status"])
-            self.package_links_table.setItem(row, col, status_item)
-            col += 1
+            table.setItem(row, col, status_item)
+        col += 1
 
-            # Error
+        # Error
+        if columns is None or col in columns:
             item = QTableWidgetItem(link["error"])
             item.setToolTip(link["error"])
-            self.package_links_table.setItem(row, col, item)
-            col += 1
+            table.setItem(row, col, item)
+        col += 1
 
     def add_package(self):
         name = self.package_name_input.text().strip()
@@ -1450,9 +2820,102 @@ class PyLoadUI(QMainWindow):
             QMessageBox.warning(self, "Error", "Failed to add package")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="pyload_qt")
+    parser.add_argument(
+        "--watchdog",
+        type=int,
+        nargs="?",
+        const=250,
+        metavar="MS",
+        help="log the python stack when the gui is blocked for more than MS milliseconds (default: 250)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="start measuring the time of gui slots and api callbacks, see Tools > Profiling",
+    )
+    parser.add_argument(
+        "--track-memory",
+        type=float,
+        nargs="?",
+        const=1,
+        metavar="MINUTES",
+        help="record memory usage every MINUTES minutes (default: 1), see Tools > Memory Tracking",
+    )
+    parser.add_argument(
+        "--server",
+        action="append",
+        metavar="NAME",
+        help=(
+            f"connect to the server profile NAME in {server_profiles.profiles_path()} (default: the default profile). "
+            "repeat to show the packages of several servers in one window"
+        ),
+    )
+    parser.add_argument(
+        "--transport",
+        choices=sorted(transports.TRANSPORTS),
+        default="qt",
+        help="http client for api requests: qt (QNetworkAccessManager) or threads (urllib in a thread pool)",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=4,
+        metavar="N",
+        help="send at most N requests to the server at the same time (default: 4)",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="record all api requests and responses to FILE (gzip compressed jsonl), "
+        "with credentials and package passwords redacted",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="replay api responses from a file written by --record, without a pyload server",
+    )
+    parser.add_argument(
+        "--replay-time-scale",
+        type=float,
+        default=1.0,
+        metavar="SCALE",
+        help="scale the recorded response times: 1 is the original timing, 0 is no delay (default: 1)",
+    )
+    # other args are passed to qt, for example -style
+    args, qt_args = parser.parse_known_args()
     # handle Ctrl+C from terminal
     signal.signal(signal.SIGINT, signal.SIG_DFL)
-    app = QApplication(sys.argv)
-    window = PyLoadUI()
+    app = QApplication(sys.argv[:1] + qt_args)
+    try:
+        profiles = [server_profiles.get_profile(name) for name in args.server or [None]]
+    except KeyError as error:
+        parser.error(error.args[0])
+    except (ValueError, TypeError) as error:
+        # json.JSONDecodeError is a ValueError
+        parser.error(f"{server_profiles.profiles_path()}: {error}")
+    if len(profiles) > 1 and (args.record or args.replay):
+        parser.error("--record and --replay work with one server only")
+    if args.replay:
+        replay = api_recording.ApiReplay(args.replay, args.replay_time_scale)
+        transport = api_recording.ReplayTransport(replay)
+        client = PyLoadClient(transport, profiles[0])
+    else:
+        clients = []
+        for profile in profiles:
+            # one connection pool per server
+            transport = transports.TRANSPORTS[args.transport]()
+            transport = transports.default_transport(transport, args.max_connections)
+            if args.record:
+                recorder = api_recording.ApiRecorder(args.record)
+                app.aboutToQuit.connect(recorder.close)
+                transport = api_recording.RecordingTransport(transport, recorder)
+            clients.append(PyLoadClient(transport, profile))
+        client = clients[0] if len(clients) == 1 else MultiServerClient(clients)
+    window = PyLoadUI(client=client, profile=args.profile)
+    if args.watchdog:
+        window.start_watchdog(args.watchdog)
+    if args.track_memory:
+        window.start_memory_tracking(args.track_memory)
     window.show()
     app.exec()
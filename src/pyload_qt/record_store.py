@@ -0,0 +1,307 @@
+# compact records for queue, package and link data
+# the json dicts from pyload use about 3x more memory than __slots__ records
+# with 15k packages and 200k links, most memory is used by these dicts
+
+import sys
+from array import array
+
+_intern = sys.intern
+_missing = object()
+
+
+class Change:
+    """
+    Changes of records, by id (pid or fid).
+
+    - added, removed: lists of ids
+    - changed: dict of id -> set of changed field names
+    - reordered: True when the order of records has changed
+
+    Views update only the changed cells,
+    and rebuild only on structural changes.
+    """
+    __slots__ = ("added", "removed", "changed", "reordered")
+
+    def __init__(self, added=(), removed=(), changed=None, reordered=False):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = {} if changed is None else changed
+        self.reordered = reordered
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.reordered)
+
+    def is_structural(self):
+        return bool(self.added or self.removed or self.reordered)
+
+    def __repr__(self):
+        return (
+            f"Change(added={self.added!r}, removed={self.removed!r}, "
+            f"changed={self.changed!r}, reordered={self.reordered!r})"
+        )
+
+
+class Record:
+    """
+    Base class for records with __slots__.
+
+    Records support dict-style access, like the json dicts from pyload,
+    so views can use package["pid"] or package.pid.
+    Keys which are not in __slots__ are dropped.
+    """
+    __slots__ = ()
+    # these string fields repeat a lot, so we store only one copy of each value
+    _interned_fields = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key in self._interned_fields and isinstance(value, str):
+            value = _intern(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def update_from_dict(self, data):
+        """
+        Update fields from a dict or record.
+
+        Returns the set of changed field names.
+        """
+        interned_fields = self._interned_fields
+        changed = set()
+        for key in self.__slots__:
+            value = data.get(key)
+            if key in interned_fields and isinstance(value, str):
+                value = _intern(value)
+            if getattr(self, key, _missing) != value:
+                setattr(self, key, value)
+                changed.add(key)
+        return changed
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        record.update_from_dict(data)
+        return record
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+class LinkRecord(Record):
+    __slots__ = (
+        "fid",
+        "url",
+        "name",
+        "plugin",
+        "size",
+        "status",
+        "statusmsg",
+        "error",
+        "package_id",
+        "order",
+    )
+    # not error: error messages can contain urls and ids,
+    # and interned strings are never freed on newer python versions
+    _interned_fields = frozenset(("plugin", "statusmsg"))
+
+
+class PackageRecord(Record):
+    __slots__ = (
+        "pid",
+        "name",
+        "folder",
+        "site",
+        "password",
+        "dest",
+        "order",
+        "queue",
+        "linksdone",
+        "sizedone",
+        "sizetotal",
+        "linkstotal",
+        # array of int64
+        "fids",
+        # list of LinkRecord, or None for queue data
+        "links",
+    )
+    _interned_fields = frozenset(("site", "password"))
+
+    def update_from_dict(self, data):
+        fids = data.get("fids")
+        links = data.get("links")
+        changed = super().update_from_dict(data)
+        if "fids" in changed and fids is not None:
+            self.fids = array("q", fids)
+        if links is not None and not isinstance(data, PackageRecord):
+            self.links = [LinkRecord.from_dict(link) for link in links]
+        return changed
+
+    def to_dict(self):
+        data = super().to_dict()
+        if self.fids is not None:
+            data["fids"] = list(self.fids)
+        if self.links is not None:
+            data["links"] = [link.to_dict() for link in self.links]
+        return data
+
+
+def package_from_dict(package_data):
+    # package data from get_package_data
+    if isinstance(package_data, PackageRecord):
+        return package_data
+    return PackageRecord.from_dict(package_data)
+
+
+def merge_links(old_links, new_links):
+    """
+    Update old link records from new link records.
+
+    Returns (links, change).
+    links has the order of new_links and reuses the old records.
+    """
+    old_by_fid = {link.fid: link for link in old_links}
+    links = []
+    changed = {}
+    added = []
+    for new_link in new_links:
+        fid = new_link.fid
+        old_link = old_by_fid.pop(fid, None)
+        if old_link is None:
+            links.append(new_link)
+            added.append(fid)
+            continue
+        fields = old_link.update_from_dict(new_link)
+        if fields:
+            changed[fid] = fields
+        links.append(old_link)
+    removed = list(old_by_fid.keys())
+    reordered = False
+    if not added and not removed:
+        reordered = any(old.fid != new.fid for old, new in zip(old_links, links))
+    return links, Change(added, removed, changed, reordered)
+
+
+def records_footprint(records):
+    """
+    Returns the approximate memory size of records in bytes.
+
+    Strings which are shared between records are counted once.
+    """
+    size = 0
+    seen = set()
+    stack = list(records)
+    size += sys.getsizeof(stack)
+    while stack:
+        obj = stack.pop()
+        obj_id = id(obj)
+        if obj_id in seen:
+            continue
+        seen.add(obj_id)
+        size += sys.getsizeof(obj)
+        if isinstance(obj, Record):
+            for key in obj.__slots__:
+                value = getattr(obj, key, None)
+                if isinstance(value, (str, list, array, Record)):
+                    stack.append(value)
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return size
+
+
+class RecordStore:
+    """
+    Queue data from get_queue_and_collector as PackageRecord objects.
+
+    Records of known packages are updated in place,
+    so a refresh does not allocate 15k new objects.
+
+    listeners are called with a Change of pids
+    after every change of the queue.
+    """
+    def __init__(self):
+        # pid -> PackageRecord
+        self.packages = {}
+        # list of PackageRecord in queue order
+        self.queue = []
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.queue)
+
+    def get(self, pid, default=None):
+        return self.packages.get(pid, default)
+
+    def _notify(self, change):
+        if not change:
+            return
+        for listener in self.listeners:
+            listener(change)
+
+    def set_queue(self, queue_data):
+        packages = self.packages
+        new_packages = {}
+        queue = []
+        added = []
+        changed = {}
+        for package in queue_data:
+            pid = package["pid"]
+            record = packages.get(pid)
+            if record is None:
+                record = PackageRecord.from_dict(package)
+                added.append(pid)
+            else:
+                fields = record.update_from_dict(package)
+                if fields:
+                    changed[pid] = fields
+            new_packages[pid] = record
+            queue.append(record)
+        removed = [pid for pid in packages if pid not in new_packages]
+        # compare the order of the packages which are in both queues
+        old_order = (record.pid for record in self.queue if record.pid in new_packages)
+        new_order = (record.pid for record in queue if record.pid in packages)
+        reordered = any(old_pid != new_pid for old_pid, new_pid in zip(old_order, new_order))
+        self.packages = new_packages
+        self.queue = queue
+        self._notify(Change(added, removed, changed, reordered))
+        return queue
+
+    def update_package(self, pid, fields):
+        # update some fields of a package, for example from package data
+        record = self.packages.get(pid)
+        if record is None:
+            return
+        changed = set()
+        for key, value in fields.items():
+            if record[key] != value:
+                record[key] = value
+                changed.add(key)
+        if changed:
+            self._notify(Change(changed={pid: changed}))
+
+    def remove_packages(self, pids):
+        pids = [pid for pid in pids if pid in self.packages]
+        if not pids:
+            return
+        for pid in pids:
+            del self.packages[pid]
+        self.queue = [record for record in self.queue if record.pid in self.packages]
+        self._notify(Change(removed=pids))
+
+    def memory_footprint(self):
+        return records_footprint(self.queue) + sys.getsizeof(self.packages)
@@ -0,0 +1,111 @@
+# filters of the sidebar and the search input for table views
+# all filters are combined, so a status filter does not undo a name filter
+
+from PySide6.QtCore import (
+    Qt,
+)
+
+
+class RowFilter:
+    """
+    Hide the rows of a QTableWidget which do not match all filters.
+
+    The key of a row (pid, fid) is stored as Qt.UserRole in column 0.
+    Filters are predicates of records, or sets of keys (set_keys).
+    Key sets are intersected first, so with a key set,
+    matching_keys() only looks at the keys in the smallest set.
+
+    - get_record(key): record of a row, or None
+    - get_row(key): row of a key, or None.
+      without get_row, apply(keys) scans the table
+    """
+    def __init__(self, table, get_record, get_row=None):
+        self.table = table
+        self.get_record = get_record
+        self.get_row = get_row
+        # name -> predicate(record)
+        self.filters = {}
+        # name -> set of keys, updated in place by the owner
+        self.key_sets = {}
+
+    def __bool__(self):
+        return bool(self.filters or self.key_sets)
+
+    def __contains__(self, name):
+        return name in self.filters or name in self.key_sets
+
+    def set(self, name, predicate):
+        # predicate None removes the filter
+        if predicate is None:
+            if self.filters.pop(name, None) is None:
+                return
+        else:
+            self.filters[name] = predicate
+        self.apply()
+
+    def set_keys(self, name, keys):
+        # keys None removes the filter
+        if keys is None:
+            if self.key_sets.pop(name, None) is None:
+                return
+        else:
+            self.key_sets[name] = keys
+        self.apply()
+
+    def matches(self, record):
+        return all(predicate(record) for predicate in self.filters.values())
+
+    def visible_keys(self):
+        # intersection of the key sets, or None without key sets
+        if not self.key_sets:
+            return None
+        key_sets = sorted(self.key_sets.values(), key=len)
+        return key_sets[0].intersection(*key_sets[1:])
+
+    def matching_keys(self, all_keys):
+        """
+        Keys of all_keys which match all filters, also for hidden rows.
+
+        all_keys: set or dict of all keys
+        """
+        keys = self.visible_keys()
+        if keys is None:
+            keys = all_keys
+        else:
+            keys = (key for key in keys if key in all_keys)
+        filters = list(self.filters.values())
+        get_record = self.get_record
+        result = []
+        for key in keys:
+            record = get_record(key)
+            if record is not None and all(predicate(record) for predicate in filters):
+                result.append(key)
+        return result
+
+    def apply(self, keys=None):
+        # keys: only check the rows of these keys
+        table = self.table
+        model = table.model()
+        if keys is None or self.get_row is None:
+            rows = (
+                (model.index(row, 0).data(Qt.UserRole), row)
+                for row in range(table.rowCount())
+            )
+            if keys is not None:
+                keys = set(keys)
+                rows = ((key, row) for key, row in rows if key in keys)
+        else:
+            rows = ((key, self.get_row(key)) for key in keys)
+        filters = list(self.filters.values())
+        visible_keys = self.visible_keys()
+        get_record = self.get_record
+        for key, row in rows:
+            if row is None:
+                continue
+            record = get_record(key)
+            hidden = record is not None and (
+                (visible_keys is not None and key not in visible_keys)
+                or not all(predicate(record) for predicate in filters)
+            )
+            if table.isRowHidden(row) != hidden:
+                table.setRowHidden(row, hidden)
@@ -0,0 +1,207 @@
+# pyload servers to connect to, in ~/.config/pyload-qt/servers.json
+# and the discovery of the reachable address of a server
+#
+#   {
+#     "default": "localhost",
+#     "servers": [
+#       {
+#         "name": "localhost",
+#         "urls": ["http://[::1]:8000", "http://127.0.0.1:8000"],
+#         "auth": "session",
+#         "username": "pyload",
+#         "password": "pyload"
+#       },
+#       {
+#         "name": "nas",
+#         "urls": ["http://nas.lan:8000"],
+#         "auth": "api_key",
+#         "api_key": "..."
+#       }
+#     ]
+#   }
+#
+# auth is one of
+# - session: csrf token from the html login page, then POST login (pyload default)
+# - basic: Authorization header with username and password on every request
+# - api_key: X-API-Key header on every request
+# header auth saves the round trips of the session login
+
+import base64
+import json
+import os
+import urllib.parse
+
+from PySide6.QtCore import (
+    QTimer,
+)
+from PySide6.QtNetwork import QNetworkReply
+
+from . import api
+from . import transports
+from .user_dirs import config_dir
+
+NetworkError = QNetworkReply.NetworkError
+
+AUTH_METHODS = ("session", "basic", "api_key")
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+class ServerProfile:
+    """
+    Address and credentials of one pyload server.
+
+    - urls: base urls of the same server, for example with ipv6 and ipv4.
+      the first url which answers is used, see discover_base_url
+    """
+    __slots__ = ("name", "urls", "auth", "username", "password", "api_key")
+
+    def __init__(self, name, urls, auth="session", username="pyload", password="pyload", api_key=None):
+        if auth not in AUTH_METHODS:
+            raise ValueError(f"server {name!r}: unknown auth method {auth!r}")
+        if not urls:
+            raise ValueError(f"server {name!r}: no urls")
+        self.name = name
+        self.urls = [url.rstrip("/") for url in urls]
+        self.auth = auth
+        self.username = username
+        self.password = password
+        self.api_key = api_key
+
+    @property
+    def is_localhost(self):
+        # local servers allow to open and verify the downloaded files
+        return all(urllib.parse.urlsplit(url).hostname in LOCAL_HOSTS for url in self.urls)
+
+    def auth_headers(self):
+        # headers for every request, empty for session auth
+        if self.auth == "basic":
+            credentials = f"{self.username}:{self.password}".encode()
+            return {b"Authorization": b"Basic " + base64.b64encode(credentials)}
+        if self.auth == "api_key":
+            return {b"X-API-Key": self.api_key.encode()}
+        return {}
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def default_profile():
+    # by default, the pyload server runs with ipv6
+    # but with webui.develop=True in ~/.pyload/settings/pyload.cfg it runs with ipv4
+    return ServerProfile("localhost", ["http://[::1]:8000", "http://127.0.0.1:8000"])
+
+
+def profiles_path():
+    return os.path.join(config_dir(), "servers.json")
+
+
+def load_profiles(path=None):
+    """
+    Returns (profiles, name of the default profile).
+
+    Without a servers.json file, the only profile is default_profile().
+    """
+    path = path or profiles_path()
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        profile = default_profile()
+        return [profile], profile.name
+    profiles = [ServerProfile.from_dict(server) for server in data.get("servers", [])]
+    if not profiles:
+        profiles = [default_profile()]
+    default_name = data.get("default") or profiles[0].name
+    return profiles, default_name
+
+
+def save_profiles(profiles, default_name, path=None):
+    path = path or profiles_path()
+    data = {
+        "default": default_name,
+        "servers": [profile.to_dict() for profile in profiles],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def get_profile(name=None, path=None):
+    profiles, default_name = load_profiles(path)
+    name = name or default_name
+    for profile in profiles:
+        if profile.name == name:
+            return profile
+    names = ", ".join(profile.name for profile in profiles)
+    raise KeyError(f"no server profile {name!r} in {path or profiles_path()}, known: {names}")
+
+
+def server_reached(error):
+    # http errors (401, 404, ...) are answers of the server,
+    # network errors (1-99) and proxy errors (101-199) are not
+    return error == NetworkError.NoError or error.value > 200
+
+
+def discover_base_url(transport, profile, attempt_delay=0.25, timeout=5):
+    """
+    Happy eyeballs over the urls of profile.
+
+    Sends a small request to each url, the next one after attempt_delay seconds
+    or when the previous attempt fails, so a preferred ipv6 address
+    does not have to time out before ipv4 is tried.
+    Returns an ApiFuture with the base url of the first answer,
+    or raises ApiError with the error of the last attempt.
+    """
+    future = api.ApiFuture("discover_base_url")
+    if len(profile.urls) == 1:
+        future.set_result(profile.urls[0])
+        return future
+    # retries and the circuit breaker would only delay the answer
+    transport = transports.find_transport(transport, transports.HostLimitTransport) or transport
+    pending = list(reversed(profile.urls))
+    num_running = 0
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.setInterval(int(attempt_delay * 1000))
+
+    def start_next():
+        nonlocal num_running
+        timer.stop()
+        if future.done() or not pending:
+            return
+        url = pending.pop()
+        num_running += 1
+        request = api.ApiRequest(
+            "_discover", "GET", f"{url}/api/status",
+            headers=profile.auth_headers(), timeout=timeout,
+        )
+        transport.send(request, lambda error, _body: on_done(url, error))
+        if pending:
+            timer.start()
+
+    def on_done(url, error):
+        nonlocal num_running
+        num_running -= 1
+        if future.done():
+            return
+        if server_reached(error):
+            timer.stop()
+            future.set_result(url)
+            return
+        print(f"discover_base_url: {url}: {error}")
+        if pending:
+            start_next()
+        elif num_running == 0:
+            future.set_exception(api.ApiError("discover_base_url", error))
+
+    timer.timeout.connect(start_next)
+    # keep the timer alive until the result is set
+    future.add_done_callback(lambda _future: timer.stop())
+    start_next()
+    return future
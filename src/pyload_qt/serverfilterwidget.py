@@ -0,0 +1,48 @@
+# filter the packages by pyload server, see MultiServerClient
+
+from PySide6.QtWidgets import (
+    QListWidgetItem,
+    QListWidget,
+)
+from PySide6.QtCore import (
+    Qt,
+    Signal,
+    QSize,
+)
+
+class ServerFilterWidget(QListWidget):
+    # server index, or -1 for all servers
+    serverChanged = Signal(int)
+
+    def __init__(self, parent=None, server_names=()):
+        super().__init__(parent)
+        self.server_names = list(server_names)
+
+        all_item = QListWidgetItem(self)
+        all_item.setData(Qt.DisplayRole, self.tr("All"))
+        all_item.setData(Qt.UserRole, -1)
+        for index, name in enumerate(self.server_names):
+            item = QListWidgetItem(self)
+            item.setData(Qt.DisplayRole, name)
+            item.setData(Qt.UserRole, index)
+
+        self.setCurrentRow(0)
+        self.currentRowChanged.connect(self.applyFilter)
+
+    def sizeHint(self):
+        return QSize(
+            self.sizeHintForColumn(0),
+            int((self.sizeHintForRow(0) + 2 * self.spacing()) * (self.count() + 0.5))
+        )
+
+    def updateCounts(self, counts):
+        # counts: server index -> number of packages
+        self.item(0).setData(Qt.DisplayRole, self.tr("All ({})").format(sum(counts.values())))
+        for index, name in enumerate(self.server_names):
+            self.item(index + 1).setData(Qt.DisplayRole, f"{name} ({counts.get(index, 0)})")
+
+    def applyFilter(self, row):
+        item = self.item(row)
+        if item is None:
+            return
+        self.serverChanged.emit(item.data(Qt.UserRole))
@@ -0,0 +1,343 @@
+# find disk usage per package folder in the storage folder
+# and folders which dont belong to a package
+
+import os
+import json
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QCheckBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+)
+from PySide6.QtCore import (
+    Qt,
+    QThread,
+    Signal,
+)
+
+from . import user_dirs
+from .item_delegates import SizeDelegate, format_size
+from .worker_threads import stop_thread_later
+
+class DirSizeCache:
+    """
+    path -> (inode, mtime_ns, size of files, names of subdirs)
+
+    a directory with the same inode and mtime has the same entries,
+    so we can skip the stat calls for all files in that directory.
+    note: files which grow in place (active downloads)
+    keep their old size until the directory changes.
+    """
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_dirs.cache_dir(), "storage-size-cache.json")
+        self.data = {}
+        self.lock = threading.Lock()
+        self.changed = False
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def save(self):
+        if not self.changed:
+            return
+        tmp_path = self.path + ".tmp"
+        with self.lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, separators=(",", ":"))
+            self.changed = False
+        os.replace(tmp_path, self.path)
+
+    def get(self, path, stat):
+        entry = self.data.get(path)
+        if entry is None:
+            return None
+        inode, mtime_ns, files_size, subdirs = entry
+        if inode != stat.st_ino or mtime_ns != stat.st_mtime_ns:
+            return None
+        return files_size, subdirs
+
+    def put(self, path, stat, files_size, subdirs):
+        with self.lock:
+            self.data[path] = (stat.st_ino, stat.st_mtime_ns, files_size, subdirs)
+            self.changed = True
+
+    def prune(self, root_path, seen_paths):
+        # remove deleted directories
+        with self.lock:
+            for path in list(self.data.keys()):
+                if path.startswith(root_path) and path not in seen_paths:
+                    del self.data[path]
+                    self.changed = True
+
+
+def folder_size(path, size_cache, seen_paths, use_cache=True, is_interrupted=None):
+    """
+    Returns the size of all files in path, recursive.
+
+    is_interrupted() is checked before each directory,
+    the size is incomplete when it returns True.
+    """
+    total_size = 0
+    stack = [path]
+    while stack:
+        if is_interrupted and is_interrupted():
+            break
+        dir_path = stack.pop()
+        try:
+            stat = os.stat(dir_path)
+        except OSError:
+            continue
+        seen_paths.add(dir_path)
+        cached = size_cache.get(dir_path, stat) if use_cache else None
+        if cached is not None:
+            files_size, subdirs = cached
+        else:
+            files_size = 0
+            subdirs = []
+            try:
+                with os.scandir(dir_path) as it:
+                    for dir_entry in it:
+                        try:
+                            if dir_entry.is_dir(follow_symlinks=False):
+                                subdirs.append(dir_entry.name)
+                            elif dir_entry.is_file(follow_symlinks=False):
+                                files_size += dir_entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            size_cache.put(dir_path, stat, files_size, subdirs)
+        total_size += files_size
+        stack.extend(os.path.join(dir_path, name) for name in subdirs)
+    return total_size
+
+
+class StorageScanner(QThread):
+    """
+    Get the size of every folder in the storage folder.
+
+    The folders are scanned in parallel by a thread pool,
+    os.scandir and os.stat release the GIL.
+    """
+    # num_done, num_total
+    progress = Signal(int, int)
+    # list of (folder_name, size, is_dir)
+    done = Signal(list)
+
+    def __init__(self, storage_folder, use_cache=True, max_workers=8, parent=None):
+        super().__init__(parent)
+        self.storage_folder = os.path.abspath(storage_folder)
+        self.use_cache = use_cache
+        self.max_workers = max_workers
+
+    def run(self):
+        size_cache = DirSizeCache()
+        size_cache.load()
+        seen_paths = set()
+        try:
+            with os.scandir(self.storage_folder) as it:
+                dir_entries = list(it)
+        except OSError as exc:
+            print(f"StorageScanner: {exc}")
+            self.done.emit([])
+            return
+        results = []
+        num_total = len(dir_entries)
+
+        def scan(dir_entry):
+            try:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    # each worker has its own seen_paths, merged below
+                    worker_seen_paths = set()
+                    size = folder_size(
+                        dir_entry.path, size_cache, worker_seen_paths, self.use_cache,
+                        self.isInterruptionRequested,
+                    )
+                    return (dir_entry.name, size, True), worker_seen_paths
+                return (dir_entry.name, dir_entry.stat(follow_symlinks=False).st_size, False), set()
+            except OSError:
+                return (dir_entry.name, 0, False), set()
+
+        # no "with": its __exit__ would wait for all running walks
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        for num_done, (result, worker_seen_paths) in enumerate(executor.map(scan, dir_entries), 1):
+            if self.isInterruptionRequested():
+                # the running walks check the same flag
+                executor.shutdown(wait=False, cancel_futures=True)
+                return
+            results.append(result)
+            seen_paths.update(worker_seen_paths)
+            if num_done % 10 == 0 or num_done == num_total:
+                self.progress.emit(num_done, num_total)
+        executor.shutdown()
+        size_cache.prune(self.storage_folder + os.sep, seen_paths)
+        try:
+            size_cache.save()
+        except OSError as exc:
+            print(f"StorageScanner: failed to save size cache: {exc}")
+        self.done.emit(results)
+
+
+class StorageReportDialog(QDialog):
+    """
+    Disk usage of package folders and orphaned folders.
+
+    - parent_pyload_ui: instance of PyLoadUI (main window)
+    """
+    def __init__(self, parent_pyload_ui, storage_folder):
+        super().__init__(parent=parent_pyload_ui)
+        self.pyload_ui = parent_pyload_ui
+        self.storage_folder = storage_folder
+        self.scanner = None
+        self.setWindowTitle("Storage Usage")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 600)
+        self._init_ui()
+        self.scan()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Folder", "Size", "Package"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setColumnWidth(1, 100)
+        self.table.setColumnWidth(2, 250)
+        self.table.setItemDelegateForColumn(1, SizeDelegate(self.table))
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSortingEnabled(True)
+        self.table.itemDoubleClicked.connect(self.open_folder)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.orphaned_only_input = QCheckBox("Only orphaned folders")
+        self.orphaned_only_input.toggled.connect(self.apply_filter)
+        btn_layout.addWidget(self.orphaned_only_input)
+        btn_layout.addStretch()
+        self.rescan_btn = QPushButton("Rescan")
+        self.rescan_btn.clicked.connect(lambda: self.scan())
+        self.full_rescan_btn = QPushButton("Full Rescan")
+        self.full_rescan_btn.setToolTip("Ignore the size cache")
+        self.full_rescan_btn.clicked.connect(lambda: self.scan(use_cache=False))
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(self.rescan_btn)
+        btn_layout.addWidget(self.full_rescan_btn)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+    def scan(self, use_cache=True):
+        if self.scanner:
+            return
+        self.rescan_btn.setEnabled(False)
+        self.full_rescan_btn.setEnabled(False)
+        self.status_label.setText(f"Scanning {self.storage_folder} ...")
+        self.scanner = StorageScanner(self.storage_folder, use_cache, parent=self)
+        self.scanner.progress.connect(
+            lambda num_done, num_total: self.status_label.setText(
+                f"Scanning {self.storage_folder} ... {num_done} of {num_total} folders"
+            )
+        )
+        self.scanner.done.connect(self.on_scan_done)
+        self.scanner.start()
+
+    def done(self, result):
+        # stop the scanner before the dialog is deleted
+        if self.scanner:
+            stop_thread_later(self.scanner, (self.scanner.progress, self.scanner.done))
+            self.scanner = None
+        super().done(result)
+
+    def get_package_folders(self):
+        # folder name -> package
+        package_folders = {}
+        for package in (self.pyload_ui.queue_data_cache or []):
+            folder = package.get("folder")
+            if folder is None:
+                package_data = self.pyload_ui.package_cache.get(package["pid"])
+                if package_data is None: continue
+                folder = package_data["folder"]
+            # packages can share a folder
+            folder = folder.strip("/").split("/")[0]
+            package_folders.setdefault(folder, []).append(package)
+        return package_folders
+
+    def on_scan_done(self, results):
+        self.scanner.wait()
+        self.scanner.deleteLater()
+        self.scanner = None
+        self.rescan_btn.setEnabled(True)
+        self.full_rescan_btn.setEnabled(True)
+
+        package_folders = self.get_package_folders()
+        table = self.table
+        table.setSortingEnabled(False)
+        table.clearContents()
+        table.setRowCount(len(results))
+        total_size = 0
+        orphaned_size = 0
+        num_orphaned = 0
+        for row, (name, size, is_dir) in enumerate(results):
+            packages = package_folders.get(name)
+            total_size += size
+            if not packages:
+                orphaned_size += size
+                num_orphaned += 1
+
+            item = QTableWidgetItem(name + ("/" if is_dir else ""))
+            item.setData(Qt.UserRole, name)
+            table.setItem(row, 0, item)
+
+            item = QTableWidgetItem()
+            item.setData(Qt.DisplayRole, size)
+            table.setItem(row, 1, item)
+
+            if packages:
+                package_text = ", ".join(package["name"] for package in packages)
+            else:
+                package_text = "(orphaned)"
+            item = QTableWidgetItem(package_text)
+            item.setData(Qt.UserRole, bool(packages))
+            item.setToolTip(package_text)
+            table.setItem(row, 2, item)
+        table.setSortingEnabled(True)
+        # largest consumers first
+        table.sortItems(1, Qt.DescendingOrder)
+        self.apply_filter()
+        num_packages = len(self.pyload_ui.queue_data_cache or [])
+        self.status_label.setText(
+            f"{len(results)} folders, {format_size(total_size)}. "
+            f"{num_orphaned} orphaned folders, {format_size(orphaned_size)}. "
+            f"{num_packages} packages."
+        )
+
+    def apply_filter(self):
+        orphaned_only = self.orphaned_only_input.isChecked()
+        table = self.table
+        for row in range(table.rowCount()):
+            item = table.item(row, 2)
+            table.setRowHidden(row, orphaned_only and item.data(Qt.UserRole))
+
+    def open_folder(self, item):
+        name = self.table.item(item.row(), 0).data(Qt.UserRole)
+        folder_path = os.path.join(self.storage_folder, name)
+        subprocess.Popen(["xdg-open", folder_path])
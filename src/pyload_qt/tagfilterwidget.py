@@ -0,0 +1,126 @@
+# based on
+# https://github.com/qbittorrent/qBittorrent/blob/master/src/gui/transferlistfilters/categoryfilterwidget.cpp
+# https://github.com/qbittorrent/qBittorrent/blob/master/src/gui/transferlistfilters/tagfilterwidget.cpp
+# filter packages by the categories or tags of PackageTagStore
+
+from PySide6.QtWidgets import (
+    QListWidgetItem,
+    QListWidget,
+    QMenu,
+    QInputDialog,
+    QMessageBox,
+)
+from PySide6.QtCore import (
+    Qt,
+    Signal,
+    QSize,
+)
+from PySide6.QtGui import QCursor
+
+from .package_tags import CATEGORY
+
+# item data of the "All" and "Uncategorized" items
+ALL = None
+NONE = ""
+
+class TagFilterWidget(QListWidget):
+    # name, ALL or NONE
+    labelChanged = Signal(object)
+    # bulk actions on the packages of the current filter
+    actionStartTriggered = Signal()
+    actionPauseTriggered = Signal()
+    actionDeleteTriggered = Signal()
+
+    def __init__(self, parent=None, store=None, kind=CATEGORY):
+        super().__init__(parent)
+        self.store = store
+        self.kind = kind
+        self.label = "Category" if kind == CATEGORY else "Tag"
+        self.num_packages = 0
+
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.showMenu)
+        self.currentItemChanged.connect(self.applyFilter)
+        store.listeners.append(self.onStoreChanged)
+        self.populate()
+        self.setCurrentRow(0)
+
+    def sizeHint(self):
+        return QSize(
+            self.sizeHintForColumn(0),
+            int((self.sizeHintForRow(0) + 2 * self.spacing()) * (self.count() + 0.5))
+        )
+
+    def currentLabel(self):
+        item = self.currentItem()
+        return ALL if item is None else item.data(Qt.UserRole)
+
+    def onStoreChanged(self, kind, _pids):
+        if kind == self.kind:
+            self.populate()
+
+    def updateCounts(self, num_packages):
+        self.num_packages = num_packages
+        self.populate()
+
+    def populate(self):
+        # only the names change here, the number of names is small
+        index = self.store.index(self.kind)
+        current = self.currentLabel()
+        none_text = "Uncategorized" if self.kind == CATEGORY else "Untagged"
+        rows = [
+            (self.tr("All ({})").format(self.num_packages), ALL),
+            (f"{none_text} ({max(self.num_packages - index.num_labeled(), 0)})", NONE),
+        ]
+        rows += [(f"{name} ({len(index.get_pids(name))})", name) for name in index.names()]
+        self.blockSignals(True)
+        while self.count() > len(rows):
+            self.takeItem(self.count() - 1)
+        current_row = 0
+        for row, (text, name) in enumerate(rows):
+            item = self.item(row)
+            if item is None:
+                item = QListWidgetItem(self)
+            item.setData(Qt.DisplayRole, text)
+            item.setData(Qt.UserRole, name)
+            if name == current:
+                current_row = row
+        self.setCurrentRow(current_row)
+        self.blockSignals(False)
+        self.updateGeometry()
+        if current is not ALL and current_row == 0:
+            # the current name was removed
+            self.applyFilter(self.item(0))
+
+    def showMenu(self):
+        item = self.currentItem()
+        name = None if item is None else item.data(Qt.UserRole)
+        menu = QMenu(self)
+        menu.setAttribute(Qt.WA_DeleteOnClose)
+        menu.addAction(f"Add {self.label}...", self.addLabel)
+        if name:
+            menu.addAction(f"Remove {self.label}", lambda: self.removeLabel(name))
+        menu.addSeparator()
+        menu.addAction(self.tr("Start Packages"), self.actionStartTriggered.emit)
+        menu.addAction(self.tr("Pause Packages"), self.actionPauseTriggered.emit)
+        menu.addAction(self.tr("Remove Packages"), self.actionDeleteTriggered.emit)
+        menu.popup(QCursor.pos())
+
+    def addLabel(self):
+        name, ok = QInputDialog.getText(self, f"Add {self.label}", f"{self.label}:")
+        name = name.strip()
+        if ok and name:
+            self.store.add_name(self.kind, name)
+
+    def removeLabel(self, name):
+        answer = QMessageBox.question(
+            self, f"Remove {self.label}",
+            f"Remove the {self.label.lower()} {name!r}? The packages are not removed.",
+        )
+        if answer == QMessageBox.Yes:
+            self.store.remove_name(self.kind, name)
+
+    def applyFilter(self, item, _previous=None):
+        if item is None:
+            return
+        self.labelChanged.emit(item.data(Qt.UserRole))
@@ -21,6 +21,10 @@ from PySide6.QtCore import (
 )
 from typing import Optional
 from .statusfilterwidget import StatusFilterWidget
+from .serverfilterwidget import ServerFilterWidget
+from .hosterfilterwidget import HosterFilterWidget
+from .tagfilterwidget import TagFilterWidget
+from .package_tags import CATEGORY, TAG
 
 class ArrowCheckBox(QCheckBox):
     def __init__(self, text, parent=None):
@@ -52,7 +56,7 @@ class ArrowCheckBox(QCheckBox):
 
 
 class TransferListFiltersWidget(QWidget):
-    def __init__(self, parent: Optional[QWidget], transferList, downloadFavicon: bool = False):
+    def __init__(self, parent: Optional[QWidget], transferList, downloadFavicon: bool = False, serverNames=(), hosterIndex=None, tagStore=None):
         super().__init__(parent)
         self.m_transferList = transferList
         self.setBackgroundRole(QPalette.ColorRole.Base)
@@ -87,51 +91,81 @@ class TransferListFiltersWidget(QWidget):
         statusFilters.filterChanged.connect(self.m_transferList.set_status_filter)
         mainWidgetLayout.addWidget(statusFilters)
 
-        """
-        categoryLabel = ArrowCheckBox(self.tr("Categories"), self)
-        categoryLabel.setChecked(pref.getCategoryFilterState())
-        categoryLabel.setFont(font)
-        categoryLabel.toggled.connect(self.onCategoryFilterStateChanged)
-        mainWidgetLayout.addWidget(categoryLabel)
-
-        self.m_categoryFilterWidget = CategoryFilterWidget(self)
-        self.m_categoryFilterWidget.actionDeleteTorrentsTriggered.connect(
-            transferList.deleteVisibleTorrents
-        )
-        self.m_categoryFilterWidget.actionStopTorrentsTriggered.connect(
-            transferList.stopVisibleTorrents
-        )
-        self.m_categoryFilterWidget.actionStartTorrentsTriggered.connect(
-            transferList.startVisibleTorrents
-        )
-        self.m_categoryFilterWidget.categoryChanged.connect(
-            transferList.applyCategoryFilter
-        )
-        self.toggleCategoryFilter(pref.getCategoryFilterState())
-        mainWidgetLayout.addWidget(self.m_categoryFilterWidget)
-
-        tagsLabel = ArrowCheckBox(self.tr("Tags"), self)
-        tagsLabel.setChecked(pref.getTagFilterState())
-        tagsLabel.setFont(font)
-        tagsLabel.toggled.connect(self.onTagFilterStateChanged)
-        mainWidgetLayout.addWidget(tagsLabel)
-
-        self.m_tagFilterWidget = TagFilterWidget(self)
-        self.m_tagFilterWidget.actionDeleteTorrentsTriggered.connect(
-            transferList.deleteVisibleTorrents
-        )
-        self.m_tagFilterWidget.actionStopTorrentsTriggered.connect(
-            transferList.stopVisibleTorrents
-        )
-        self.m_tagFilterWidget.actionStartTorrentsTriggered.connect(
-            transferList.startVisibleTorrents
-        )
-        self.m_tagFilterWidget.tagChanged.connect(
-            transferList.applyTagFilter
-        )
-        self.toggleTagFilter(pref.getTagFilterState())
-        mainWidgetLayout.addWidget(self.m_tagFilterWidget)
+        # only with more than one pyload server
+        self.m_serverFilterWidget = None
+        if len(serverNames) > 1:
+            serverLabel = ArrowCheckBox(self.tr("Servers"), self)
+            serverLabel.setChecked(True)
+            serverLabel.setFont(font)
+            mainWidgetLayout.addWidget(serverLabel)
+
+            self.m_serverFilterWidget = ServerFilterWidget(self, serverNames)
+            serverLabel.toggled.connect(self.toggleServerFilter)
+            self.m_serverFilterWidget.serverChanged.connect(self.m_transferList.set_server_filter)
+            mainWidgetLayout.addWidget(self.m_serverFilterWidget)
+
+        # links per hoster plugin, from the cached package data
+        # collapsed by default: expanding it indexes all packages
+        self.m_hosterFilterWidget = None
+        if hosterIndex is not None:
+            hosterLabel = ArrowCheckBox(self.tr("Hosters"), self)
+            hosterLabel.setChecked(False)
+            hosterLabel.setFont(font)
+            mainWidgetLayout.addWidget(hosterLabel)
+
+            self.m_hosterFilterWidget = HosterFilterWidget(self, hosterIndex)
+            self.m_hosterFilterWidget.hosterChanged.connect(self.m_transferList.set_hoster_filter)
+            hosterLabel.toggled.connect(self.toggleHosterFilter)
+            self.m_hosterFilterWidget.hide()
+            mainWidgetLayout.addWidget(self.m_hosterFilterWidget)
+
+        # user defined categories and tags, see PackageTagStore
+        self.m_categoryFilterWidget = None
+        self.m_tagFilterWidget = None
+        if tagStore is not None:
+            categoryLabel = ArrowCheckBox(self.tr("Categories"), self)
+            categoryLabel.setChecked(True)
+            categoryLabel.setFont(font)
+            categoryLabel.toggled.connect(self.toggleCategoryFilter)
+            mainWidgetLayout.addWidget(categoryLabel)
+
+            self.m_categoryFilterWidget = TagFilterWidget(self, tagStore, CATEGORY)
+            self.m_categoryFilterWidget.actionDeleteTriggered.connect(
+                transferList.remove_visible_packages
+            )
+            self.m_categoryFilterWidget.actionPauseTriggered.connect(
+                transferList.pause_visible_packages
+            )
+            self.m_categoryFilterWidget.actionStartTriggered.connect(
+                transferList.start_visible_packages
+            )
+            self.m_categoryFilterWidget.labelChanged.connect(
+                transferList.set_category_filter
+            )
+            mainWidgetLayout.addWidget(self.m_categoryFilterWidget)
+
+            tagsLabel = ArrowCheckBox(self.tr("Tags"), self)
+            tagsLabel.setChecked(True)
+            tagsLabel.setFont(font)
+            tagsLabel.toggled.connect(self.toggleTagFilter)
+            mainWidgetLayout.addWidget(tagsLabel)
+
+            self.m_tagFilterWidget = TagFilterWidget(self, tagStore, TAG)
+            self.m_tagFilterWidget.actionDeleteTriggered.connect(
+                transferList.remove_visible_packages
+            )
+            self.m_tagFilterWidget.actionPauseTriggered.connect(
+                transferList.pause_visible_packages
+            )
+            self.m_tagFilterWidget.actionStartTriggered.connect(
+                transferList.start_visible_packages
+            )
+            self.m_tagFilterWidget.labelChanged.connect(
+                transferList.set_tag_filter
+            )
+            mainWidgetLayout.addWidget(self.m_tagFilterWidget)
 
+        """
         trackerLabel = ArrowCheckBox(self.tr("Trackers"), self)
         trackerLabel.setChecked(pref.getTrackerFilterState())
         trackerLabel.setFont(font)
@@ -153,6 +187,24 @@ class TransferListFiltersWidget(QWidget):
         vLayout.setContentsMargins(0, 0, 0, 0)
         vLayout.addWidget(scroll)
 
+    def toggleServerFilter(self, enabled: bool):
+        self.m_serverFilterWidget.setVisible(enabled)
+        current_row = self.m_serverFilterWidget.currentRow() if enabled else 0
+        self.m_serverFilterWidget.applyFilter(max(current_row, 0))
+
+    def toggleHosterFilter(self, enabled: bool):
+        self.m_hosterFilterWidget.setVisible(enabled)
+        if enabled:
+            self.m_transferList.index_hosters()
+            current_item = self.m_hosterFilterWidget.currentItem()
+            self.m_hosterFilterWidget.applyFilter(current_item)
+        else:
+            self.m_transferList.set_hoster_filter("")
+
+    def updateServerCounts(self, counts):
+        if self.m_serverFilterWidget:
+            self.m_serverFilterWidget.updateCounts(counts)
+
     def setDownloadTrackerFavicon(self, value: bool):
         self.m_trackersFilterWidget.setDownloadTrackerFavicon(value)
 
@@ -168,20 +220,17 @@ class TransferListFiltersWidget(QWidget):
     def trackerEntryStatusesUpdated(self, torrent, updatedTrackers):
         self.m_trackersFilterWidget.handleTrackerStatusesUpdated(torrent, updatedTrackers)
 
-    def onCategoryFilterStateChanged(self, enabled: bool):
-        self.toggleCategoryFilter(enabled)
-        Preferences.instance().setCategoryFilterState(enabled)
-
     def toggleCategoryFilter(self, enabled: bool):
         self.m_categoryFilterWidget.setVisible(enabled)
-        current_category = self.m_categoryFilterWidget.currentCategory() if enabled else ""
-        self.m_transferList.applyCategoryFilter(current_category)
-
-    def onTagFilterStateChanged(self, enabled: bool):
-        self.toggleTagFilter(enabled)
-        Preferences.instance().setTagFilterState(enabled)
+        current_category = self.m_categoryFilterWidget.currentLabel() if enabled else None
+        self.m_transferList.set_category_filter(current_category)
 
     def toggleTagFilter(self, enabled: bool):
         self.m_tagFilterWidget.setVisible(enabled)
-        current_tag = self.m_tagFilterWidget.currentTag() if enabled else None
-        self.m_transferList.applyTagFilter(current_tag)
+        current_tag = self.m_tagFilterWidget.currentLabel() if enabled else None
+        self.m_transferList.set_tag_filter(current_tag)
+
+    def updateTagCounts(self, num_packages):
+        if self.m_categoryFilterWidget:
+            self.m_categoryFilterWidget.updateCounts(num_packages)
+            self.m_tagFilterWidget.updateCounts(num_packages)
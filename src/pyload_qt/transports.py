@@ -0,0 +1,508 @@
+# transports send an ApiRequest and call on_done(error, body) on the gui thread
+# error is a QNetworkReply.NetworkError, body is the response text
+#
+# - QtTransport: QNetworkAccessManager, the default
+# - ThreadPoolTransport: http.client in worker threads
+# - HostLimitTransport: at most max_per_host requests in flight, by priority
+# - RetryTransport: retry failed GET requests with backoff
+# - CircuitBreakerTransport: hold background requests while the server is failing
+# - RecordingTransport, ReplayTransport: see api_recording.py
+#
+# responses are requested with "Accept-Encoding: gzip, deflate".
+# a queue of 15k packages is about 10x smaller with gzip
+
+import heapq
+import http.client
+import http.cookies
+import itertools
+import random
+import socket
+import threading
+import time
+import urllib.parse
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import (
+    QObject,
+    QTimer,
+    QUrl,
+    Signal,
+)
+from PySide6.QtNetwork import (
+    QNetworkAccessManager,
+    QNetworkReply,
+    QNetworkRequest,
+)
+
+from . import api
+from .network_stats import TransferStats
+
+NetworkError = QNetworkReply.NetworkError
+
+ACCEPT_ENCODING = b"gzip, deflate"
+
+
+def decode_body(data, content_encoding):
+    """
+    Decompress a response body.
+
+    Returns the decoded bytes, or None when the encoding is not supported.
+    """
+    content_encoding = content_encoding.strip().lower()
+    if not content_encoding or content_encoding == "identity":
+        return data
+    if content_encoding in ("gzip", "x-gzip"):
+        return zlib.decompress(data, wbits=zlib.MAX_WBITS | 16)
+    if content_encoding == "deflate":
+        try:
+            # zlib stream, as specified
+            return zlib.decompress(data)
+        except zlib.error:
+            # raw deflate stream, as sent by some servers
+            return zlib.decompress(data, wbits=-zlib.MAX_WBITS)
+    return None
+
+
+class QtTransport:
+    """
+    Send requests with QNetworkAccessManager.
+
+    Qt keeps persistent connections, with up to 6 connections per host.
+    We set Accept-Encoding ourselves, so Qt does not decompress the body,
+    and we can count the bytes on the wire.
+    """
+    def __init__(self):
+        self.manager = QNetworkAccessManager()
+        self.stats = TransferStats()
+
+    def send(self, request, on_done):
+        qt_request = QNetworkRequest(QUrl(request.url))
+        qt_request.setRawHeader(b"Accept-Encoding", ACCEPT_ENCODING)
+        for key, val in request.headers.items():
+            qt_request.setRawHeader(key, val)
+        start_time = time.monotonic()
+        if request.method == "GET":
+            reply = self.manager.get(qt_request)
+        else:
+            qt_request.setHeader(
+                QNetworkRequest.ContentTypeHeader, "application/x-www-form-urlencoded"
+            )
+            reply = self.manager.post(qt_request, request.body or b"")
+        # abort requests which hang on a busy server
+        timer = QTimer(reply)
+        timer.setSingleShot(True)
+        timer.timeout.connect(reply.abort)
+        timer.start(int(request.timeout * 1000))
+        def on_reply_finished():
+            try:
+                error = reply.error()
+                if error == NetworkError.OperationCanceledError and not timer.isActive():
+                    error = NetworkError.TimeoutError
+                timer.stop()
+                # aborted replies are closed
+                data = reply.readAll().data() if reply.isOpen() else b""
+                content_encoding = reply.rawHeader("Content-Encoding").data().decode()
+                try:
+                    decoded = decode_body(data, content_encoding)
+                except zlib.error:
+                    decoded = None
+                if decoded is None:
+                    print(f"{request.name}: failed to decode body with Content-Encoding {content_encoding!r}")
+                    if error == NetworkError.NoError:
+                        error = NetworkError.ProtocolFailure
+                    decoded = b""
+                self.stats.record(
+                    request.name, len(data), len(decoded), time.monotonic() - start_time,
+                    error != NetworkError.NoError,
+                )
+                on_done(error, decoded.decode())
+            finally:
+                # also delete the reply when the callback raises
+                reply.deleteLater()
+        reply.finished.connect(on_reply_finished)
+
+
+# http status -> NetworkError, like QNetworkAccessManager
+_http_errors = {
+    401: NetworkError.AuthenticationRequiredError,
+    403: NetworkError.ContentAccessDenied,
+    404: NetworkError.ContentNotFoundError,
+    405: NetworkError.ContentOperationNotPermittedError,
+    409: NetworkError.ContentConflictError,
+    410: NetworkError.ContentGoneError,
+    500: NetworkError.InternalServerError,
+    501: NetworkError.OperationNotImplementedError,
+    503: NetworkError.ServiceUnavailableError,
+}
+
+
+def http_status_error(status):
+    if status < 400:
+        return NetworkError.NoError
+    if status in _http_errors:
+        return _http_errors[status]
+    if status >= 500:
+        return NetworkError.UnknownServerError
+    return NetworkError.UnknownContentError
+
+
+def _network_error(exception):
+    if isinstance(exception, ConnectionRefusedError):
+        return NetworkError.ConnectionRefusedError
+    if isinstance(exception, (socket.timeout, TimeoutError)):
+        return NetworkError.TimeoutError
+    if isinstance(exception, socket.gaierror):
+        return NetworkError.HostNotFoundError
+    if isinstance(exception, (ConnectionResetError, http.client.RemoteDisconnected)):
+        return NetworkError.RemoteHostClosedError
+    return NetworkError.UnknownNetworkError
+
+
+class _ResultRelay(QObject):
+    # signals from worker threads are delivered on the gui thread
+    result = Signal(object)
+
+
+class ThreadPoolTransport:
+    """
+    Send requests with http.client in a thread pool.
+
+    Each worker thread keeps one persistent connection per host.
+    Responses are read and decompressed in the worker threads,
+    so large responses dont block the gui thread.
+    Cookies are shared between all threads.
+    """
+    def __init__(self, max_workers=8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ThreadPoolTransport")
+        self.local = threading.local()
+        self.cookies = {}
+        self.cookies_lock = threading.Lock()
+        self.stats = TransferStats()
+        self.relay = _ResultRelay()
+        self.relay.result.connect(self._on_result)
+
+    def send(self, request, on_done):
+        self.executor.submit(self._send, request, on_done)
+
+    def _get_connection(self, scheme, netloc, new=False):
+        connections = getattr(self.local, "connections", None)
+        if connections is None:
+            connections = self.local.connections = {}
+        key = (scheme, netloc)
+        connection = connections.get(key)
+        if connection is not None and new:
+            connection.close()
+            connection = None
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connection = connections[key] = connection_class(netloc)
+        return connection
+
+    def _request(self, connection, method, path, body, headers, timeout):
+        # timeout of the next socket operation, not of the whole request
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        data = response.read()
+        return response, data
+
+    def _send(self, request, on_done):
+        # called in a worker thread
+        start_time = time.monotonic()
+        url = urllib.parse.urlsplit(request.url)
+        path = url.path or "/"
+        if url.query:
+            path += "?" + url.query
+        headers = {key.decode(): val.decode() for key, val in request.headers.items()}
+        headers["Accept-Encoding"] = ACCEPT_ENCODING.decode()
+        with self.cookies_lock:
+            if self.cookies and "Cookie" not in headers:
+                headers["Cookie"] = "; ".join(f"{key}={val}" for key, val in self.cookies.items())
+        body = None
+        if request.method == "POST":
+            body = request.body or b""
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        data = b""
+        decoded = b""
+        try:
+            connection = self._get_connection(url.scheme, url.netloc)
+            try:
+                response, data = self._request(connection, request.method, path, body, headers, request.timeout)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # the server has closed the idle keep-alive connection.
+                # the server can also have run the request before it closed,
+                # so POST requests (add_package, delete_packages) are not sent again
+                if request.method != "GET":
+                    raise
+                connection = self._get_connection(url.scheme, url.netloc, new=True)
+                response, data = self._request(connection, request.method, path, body, headers, request.timeout)
+            self._store_cookies(response)
+            error = http_status_error(response.status)
+            decoded = decode_body(data, response.getheader("Content-Encoding", ""))
+            if decoded is None:
+                if error == NetworkError.NoError:
+                    error = NetworkError.ProtocolFailure
+                decoded = b""
+        except (OSError, http.client.HTTPException, zlib.error) as exception:
+            self._get_connection(url.scheme, url.netloc, new=True)
+            error = _network_error(exception)
+        self.stats.record(
+            request.name, len(data), len(decoded), time.monotonic() - start_time,
+            error != NetworkError.NoError,
+        )
+        self.relay.result.emit((on_done, error, decoded.decode(errors="replace")))
+
+    def _store_cookies(self, response):
+        set_cookies = response.headers.get_all("Set-Cookie")
+        if not set_cookies:
+            return
+        cookie = http.cookies.SimpleCookie()
+        for set_cookie in set_cookies:
+            cookie.load(set_cookie)
+        with self.cookies_lock:
+            for key, morsel in cookie.items():
+                self.cookies[key] = morsel.value
+
+    def _on_result(self, result):
+        on_done, error, body = result
+        on_done(error, body)
+
+
+class HostLimitTransport:
+    """
+    Send at most max_per_host requests per host at the same time.
+
+    Waiting requests are sent by priority (see api.PRIORITY_*),
+    so interactive requests are sent before background prefetches,
+    and in order of sending within the same priority.
+    """
+    def __init__(self, transport, max_per_host=4):
+        self.transport = transport
+        self.max_per_host = max_per_host
+        self.stats = getattr(transport, "stats", None) or TransferStats()
+        # host -> number of requests in flight
+        self.in_flight = {}
+        # host -> heap of (priority, seq, queue time, request, on_done)
+        self.waiting = {}
+        self.seq = itertools.count()
+
+    def __getattr__(self, name):
+        # manager, ... of the inner transport
+        return getattr(self.transport, name)
+
+    def num_waiting(self):
+        return sum(len(heap) for heap in self.waiting.values())
+
+    def send(self, request, on_done):
+        host = urllib.parse.urlsplit(request.url).netloc
+        if self.in_flight.get(host, 0) < self.max_per_host:
+            self._send(host, request, on_done)
+            return
+        heap = self.waiting.setdefault(host, [])
+        heapq.heappush(heap, (request.priority, next(self.seq), time.monotonic(), request, on_done))
+
+    def _send(self, host, request, on_done):
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        def on_request_done(error, body):
+            self.in_flight[host] -= 1
+            self._send_next(host)
+            on_done(error, body)
+        self.transport.send(request, on_request_done)
+
+    def _send_next(self, host):
+        heap = self.waiting.get(host)
+        while heap and self.in_flight[host] < self.max_per_host:
+            _priority, _seq, queue_time, request, on_done = heapq.heappop(heap)
+            self.stats.record_queue_time(request.name, time.monotonic() - queue_time)
+            self._send(host, request, on_done)
+
+
+# errors which can go away when we try again later
+TRANSIENT_ERRORS = frozenset((
+    NetworkError.ConnectionRefusedError,
+    NetworkError.RemoteHostClosedError,
+    NetworkError.TimeoutError,
+    NetworkError.TemporaryNetworkFailureError,
+    NetworkError.NetworkSessionFailedError,
+    NetworkError.ProxyTimeoutError,
+    NetworkError.ServiceUnavailableError,
+    NetworkError.UnknownServerError,
+))
+
+
+class RetryTransport:
+    """
+    Retry GET requests which failed with a transient error.
+
+    GET requests of the pyload api dont change data, so they can be sent again.
+    The delay is random between 0 and base_delay * 2 ** attempt (full jitter),
+    so many failed requests dont come back at the same time.
+    """
+    def __init__(self, transport, max_retries=3, base_delay=0.5, max_delay=10):
+        self.transport = transport
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.num_retries = 0
+
+    def __getattr__(self, name):
+        return getattr(self.transport, name)
+
+    def send(self, request, on_done, attempt=0):
+        def on_attempt_done(error, body):
+            if (
+                error not in TRANSIENT_ERRORS
+                or request.method != "GET"
+                or attempt >= self.max_retries
+            ):
+                on_done(error, body)
+                return
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            self.num_retries += 1
+            print(f"{request.name}: {error}, retry {attempt + 1} of {self.max_retries} in {delay:.1f} seconds")
+            QTimer.singleShot(int(delay * 1000), lambda: self.send(request, on_done, attempt + 1))
+        self.transport.send(request, on_attempt_done)
+
+
+class CircuitBreakerTransport:
+    """
+    Stop sending background requests while the server is failing.
+
+    After failure_threshold transient errors in a row, the breaker opens.
+    While open, polling and background requests are held,
+    and sent when the breaker closes again.
+    Interactive requests are always sent.
+    After open_time seconds, the breaker is half open:
+    the next request is a probe, its result closes or opens the breaker.
+    While the probe is in flight, other polling and background requests are held.
+    open_time is doubled for every failed probe, up to max_open_time.
+
+    listeners are called with the breaker after every change of state.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half open"
+
+    def __init__(self, transport, failure_threshold=5, open_time=10, max_open_time=300):
+        self.transport = transport
+        self.failure_threshold = failure_threshold
+        self.min_open_time = open_time
+        self.open_time = open_time
+        self.max_open_time = max_open_time
+        self.state = self.CLOSED
+        self.num_failures = 0
+        self.last_error = None
+        # time.time() when the breaker gets half open
+        self.retry_time = None
+        # list of (request, on_done)
+        self.held = []
+        self.probe_in_flight = False
+        self.listeners = []
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.half_open)
+
+    def __getattr__(self, name):
+        return getattr(self.transport, name)
+
+    def is_open(self):
+        return self.state == self.OPEN
+
+    def send(self, request, on_done):
+        is_probe = False
+        if request.priority != api.PRIORITY_INTERACTIVE:
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self.probe_in_flight):
+                self.held.append((request, on_done))
+                return
+            if self.state == self.HALF_OPEN:
+                is_probe = self.probe_in_flight = True
+        def on_request_done(error, body):
+            if is_probe:
+                self.probe_in_flight = False
+            self._on_result(error)
+            on_done(error, body)
+        self.transport.send(request, on_request_done)
+
+    def _on_result(self, error):
+        if error in TRANSIENT_ERRORS:
+            self.num_failures += 1
+            self.last_error = error
+            if self.state == self.HALF_OPEN:
+                # the probe failed
+                self.open_time = min(self.open_time * 2, self.max_open_time)
+                self._open()
+            elif self.state == self.CLOSED and self.num_failures >= self.failure_threshold:
+                self._open()
+            return
+        # any response means that the server is alive
+        self.num_failures = 0
+        if self.state != self.CLOSED:
+            self.close()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.retry_time = time.time() + self.open_time
+        self.timer.start(int(self.open_time * 1000))
+        print(f"CircuitBreakerTransport: open for {self.open_time} seconds after {self.last_error}")
+        self._notify()
+
+    def half_open(self):
+        # also called by "retry now" in the gui
+        if self.state == self.CLOSED:
+            return
+        self.timer.stop()
+        self.state = self.HALF_OPEN
+        self.retry_time = None
+        self._notify()
+        if self.held and not self.probe_in_flight:
+            # send one held request as probe
+            request, on_done = self.held.pop(0)
+            self.send(request, on_done)
+
+    def close(self):
+        self.timer.stop()
+        self.state = self.CLOSED
+        self.probe_in_flight = False
+        self.num_failures = 0
+        self.open_time = self.min_open_time
+        self.retry_time = None
+        held, self.held = self.held, []
+        self._notify()
+        for request, on_done in held:
+            self.send(request, on_done)
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener(self)
+
+
+def find_transport(transport, transport_class):
+    # find a transport in a chain of wrapping transports, or None
+    while transport is not None:
+        if isinstance(transport, transport_class):
+            return transport
+        transport = vars(transport).get("transport")
+    return None
+
+
+def default_transport(transport=None, max_per_host=4):
+    """
+    Returns the transport chain of PyLoadClient.
+
+    circuit breaker -> retry -> host limit -> transport,
+    so retries wait for a free connection,
+    and the circuit breaker sees the result after all retries.
+    """
+    transport = transport or QtTransport()
+    transport = HostLimitTransport(transport, max_per_host)
+    transport = RetryTransport(transport)
+    return CircuitBreakerTransport(transport)
+
+
+TRANSPORTS = {
+    "qt": QtTransport,
+    "threads": ThreadPoolTransport,
+}
@@ -0,0 +1,19 @@
+# https://specifications.freedesktop.org/basedir-spec/latest/
+
+import os
+
+app_name = "pyload-qt"
+
+
+def cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, app_name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def config_dir():
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    path = os.path.join(base, app_name)
+    os.makedirs(path, exist_ok=True)
+    return path
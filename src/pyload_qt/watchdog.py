@@ -0,0 +1,159 @@
+# find what blocks the gui thread
+# a timer on the gui thread updates a heartbeat,
+# a watchdog thread captures the python stack of the gui thread
+# when the heartbeat is older than threshold_ms
+
+import os
+import sys
+import time
+import heapq
+import threading
+import traceback
+
+from PySide6.QtCore import (
+    QTimer,
+)
+
+_profiler_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiler.py")
+
+class Stall:
+    __slots__ = ("start_time", "duration", "stack", "slot", "api_call")
+
+    def __init__(self, start_time, stack, slot, api_call):
+        self.start_time = start_time
+        self.duration = 0
+        # list of FrameSummary, outermost first
+        self.stack = stack
+        # "file:line function" of the slot or callback which was running
+        self.slot = slot
+        # name of the PyLoadClient method whose reply was handled, or None
+        self.api_call = api_call
+
+    def __lt__(self, other):
+        return self.duration < other.duration
+
+    def format(self, max_frames=12):
+        api_call = f" in reply of client.{self.api_call}" if self.api_call else ""
+        lines = [f"stall {(self.duration * 1000):.0f} ms: {self.slot}{api_call}"]
+        lines += [
+            "  " + line.rstrip().replace("\n", "\n  ")
+            for line in traceback.format_list(self.stack[-max_frames:])
+        ]
+        return "\n".join(lines)
+
+
+def _describe_frame(frame_summary):
+    file_name = os.path.basename(frame_summary.filename)
+    return f"{file_name}:{frame_summary.lineno} {frame_summary.name}"
+
+
+class EventLoopWatchdog:
+    """
+    Detect when the Qt event loop does not run for threshold_ms.
+
+    The stack is captured once per stall, when the stall is detected,
+    so it shows the code which was blocking at that time.
+    The worst max_stalls stalls are kept for summary().
+    """
+    def __init__(self, threshold_ms=250, interval_ms=50, max_stalls=20, log=print):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.max_stalls = max_stalls
+        self.log = log
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.num_stalls = 0
+        self.total_stall_time = 0
+        # min-heap of the worst stalls
+        self.worst_stalls = []
+        self.current_stall = None
+        self.stopped = threading.Event()
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.beat)
+        self.thread = threading.Thread(target=self.run, name="EventLoopWatchdog", daemon=True)
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self.timer.start()
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.timer.stop()
+
+    def beat(self):
+        # called on the gui thread
+        self.last_beat = time.monotonic()
+
+    def run(self):
+        # called on the watchdog thread
+        while not self.stopped.wait(self.interval):
+            last_beat = self.last_beat
+            blocked_time = time.monotonic() - last_beat
+            stall = self.current_stall
+            if stall is not None and stall.start_time != last_beat:
+                # the event loop is running again
+                self.current_stall = None
+                self._finish_stall(stall, self.last_beat - stall.start_time)
+                continue
+            if stall is None and blocked_time > self.threshold:
+                self.current_stall = self._capture_stall(last_beat)
+
+    def _capture_stall(self, start_time):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)
+        api_call = None
+        # find the PyLoadClient reply handler
+        while frame is not None:
+            if frame.f_code.co_name == "handle_result":
+                api_call = frame.f_locals.get("name")
+                break
+            frame = frame.f_back
+        del frame
+        # the slot was called by the innermost event loop: app.exec() or dialog.exec()
+        slot_idx = 0
+        for idx, frame_summary in enumerate(stack[:-1]):
+            if ".exec(" in (frame_summary.line or ""):
+                slot_idx = idx + 1
+        # skip the wrappers of --profile
+        while slot_idx < len(stack) - 1 and (
+            stack[slot_idx].filename == _profiler_file or stack[slot_idx].name in ("run_callback", "handle_result")
+        ):
+            slot_idx += 1
+        slot = _describe_frame(stack[slot_idx]) if stack else "(qt)"
+        return Stall(start_time, stack, slot, api_call)
+
+    def _finish_stall(self, stall, duration):
+        # time between the last beat and the next beat, minus the timer interval
+        stall.duration = max(duration - self.interval, 0)
+        self.num_stalls += 1
+        self.total_stall_time += stall.duration
+        if len(self.worst_stalls) < self.max_stalls:
+            heapq.heappush(self.worst_stalls, stall)
+        else:
+            heapq.heappushpop(self.worst_stalls, stall)
+        if self.log:
+            self.log(f"EventLoopWatchdog: {stall.format()}")
+
+    def summary(self, num_stalls=10):
+        stalls = sorted(self.worst_stalls, reverse=True)[:num_stalls]
+        lines = [
+            f"{self.num_stalls} stalls longer than {(self.threshold * 1000):.0f} ms, "
+            f"{self.total_stall_time:.1f} seconds total"
+        ]
+        # group the worst stalls by slot and api call
+        groups = {}
+        for stall in self.worst_stalls:
+            key = (stall.slot, stall.api_call)
+            count, total = groups.get(key, (0, 0))
+            groups[key] = (count + 1, total + stall.duration)
+        for (slot, api_call), (count, total) in sorted(groups.items(), key=lambda item: -item[1][1]):
+            api_call = f" in reply of client.{api_call}" if api_call else ""
+            lines.append(f"  {(total * 1000):.0f} ms in {count} stalls: {slot}{api_call}")
+        lines.append("")
+        lines += [stall.format() for stall in stalls]
+        return "\n".join(lines)
@@ -0,0 +1,31 @@
+# stop QThreads of closed dialogs without blocking the gui
+# QThread.wait() on the gui thread freezes the window
+# until a long scan or hash has finished
+
+# threads which were stopped but are still running
+# the python references keep them alive without a parent
+stopping_threads = set()
+
+
+def stop_thread_later(thread, signals=()):
+    """
+    Request interruption of thread and delete it when it has finished.
+
+    signals are disconnected, so the dialog does not get results
+    after it was deleted.
+    """
+    for signal in signals:
+        signal.disconnect()
+    thread.requestInterruption()
+    if thread.isFinished():
+        thread.deleteLater()
+        return
+    # dont delete the running thread with its parent dialog
+    thread.setParent(None)
+    stopping_threads.add(thread)
+
+    def on_finished():
+        stopping_threads.discard(thread)
+        thread.deleteLater()
+
+    thread.finished.connect(on_finished)